@@ -1,25 +1,65 @@
+import hmac
 from typing import Any
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Path, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import get_settings
 from ..core.database import get_db
-from ..core.security import Auth0TokenVerifier
+from ..core.loop_monitor import LoopMonitor
+from ..core.security import Auth0TokenVerifier, verify_judge_signature
+from ..repositories.check_cache_repository import CheckCacheRepository
 from ..repositories.session_repository import SessionRepository
+from ..services.check_coordinator import CheckCoordinator
 from ..services.check_service import CheckService
 from ..services.geoip_service import GeoIPService
+from ..services import result_codec
 from ..services.password_crypto import PasswordCrypto
+from ..services.proxy_index import ProxyIndex
 
 settings = get_settings()
+if not result_codec.available(settings.results_storage_codec):
+    raise RuntimeError(
+        f"RESULTS_STORAGE_CODEC={settings.results_storage_codec} needs the `zstandard` package"
+    )
+if settings.check_workers and not settings.worker_token:
+    raise RuntimeError("CHECK_WORKERS needs WORKER_TOKEN to authenticate to the workers")
 _geoip_service = GeoIPService()
-_password_crypto = PasswordCrypto(secret=settings.proxy_password_secret)
+_password_crypto = PasswordCrypto(
+    secret=settings.proxy_password_secret,
+    scheme=settings.proxy_password_scheme,
+)
 _token_verifier = Auth0TokenVerifier(
     domain=settings.auth0_domain,
     audience=settings.auth0_audience,
     algorithms=settings.auth0_algorithms,
     issuer=settings.auth0_issuer,
+    token_cache_size=settings.auth_token_cache_size,
+)
+_loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval_ms / 1000,
+    slow_threshold=settings.loop_slow_callback_ms / 1000,
+)
+_check_coordinator = (
+    CheckCoordinator(
+        workers=settings.check_workers,
+        token=settings.worker_token,
+        chunk_size=settings.worker_chunk_size,
+        chunks_per_worker=settings.worker_chunks_in_flight,
+        local_checks=settings.worker_local_checks,
+    )
+    if settings.check_workers
+    else None
+)
+_proxy_index = (
+    ProxyIndex(
+        max_age=settings.proxy_index_max_age,
+        max_per_owner=settings.proxy_index_max_per_owner,
+        max_owners=settings.proxy_index_max_owners,
+    )
+    if settings.proxy_index_enabled
+    else None
 )
 _bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -28,19 +68,48 @@ def get_geoip_service() -> GeoIPService:
     return _geoip_service
 
 
+def get_loop_monitor() -> LoopMonitor:
+    return _loop_monitor
+
+
+def get_password_crypto() -> PasswordCrypto:
+    return _password_crypto
+
+
+def get_proxy_index() -> ProxyIndex | None:
+    return _proxy_index
+
+
 def get_session_repository(
     db: AsyncSession = Depends(get_db),
 ) -> SessionRepository:
-    return SessionRepository(db=db, password_crypto=_password_crypto)
+    return SessionRepository(
+        db=db,
+        password_crypto=_password_crypto,
+        results_codec=settings.results_storage_codec,
+    )
+
+
+def get_check_cache_repository(
+    db: AsyncSession = Depends(get_db),
+) -> CheckCacheRepository:
+    return CheckCacheRepository(db=db, password_crypto=_password_crypto)
 
 
 def get_check_service(
     session_repository: SessionRepository = Depends(get_session_repository),
     geoip_service: GeoIPService = Depends(get_geoip_service),
+    cache_repository: CheckCacheRepository = Depends(get_check_cache_repository),
 ) -> CheckService:
     return CheckService(
         session_repository=session_repository,
         geoip_service=geoip_service,
+        cache_repository=cache_repository,
+        cache_always_store=settings.check_cache_always_store,
+        coordinator=_check_coordinator,
+        proxy_index=_proxy_index,
+        bandwidth_url=settings.bandwidth_url,
+        judge_token=settings.judge_token,
     )
 
 
@@ -70,3 +139,73 @@ async def require_auth(
             detail="Token missing subject claim",
         )
     return principal
+
+
+async def require_admin(
+    principal: dict[str, Any] = Depends(require_auth),
+) -> dict[str, Any]:
+    permissions = principal.get("permissions") or []
+    if principal["sub"] in settings.admin_subjects or settings.admin_permission in permissions:
+        return principal
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Admin permission required",
+    )
+
+
+def _check_static_token(
+    credentials: HTTPAuthorizationCredentials | None,
+    expected: str,
+    name: str,
+) -> None:
+    """404 when no token is configured, 401 unless the bearer token matches it."""
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if (
+        credentials is None
+        or credentials.scheme.lower() != "bearer"
+        or not hmac.compare_digest(credentials.credentials, expected)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid {name} token",
+        )
+
+
+async def require_worker_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
+) -> None:
+    _check_static_token(credentials, settings.worker_token, "worker")
+
+
+async def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
+) -> None:
+    _check_static_token(credentials, settings.metrics_token, "metrics")
+
+
+def require_judge() -> int:
+    """404 unless the built-in judge is enabled; returns the download size cap."""
+    if not settings.judge_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return settings.judge_max_bytes
+
+
+def require_judge_download(
+    size: int = Path(ge=1),
+    expires: int = Query(0),
+    signature: str = Query(""),
+    max_bytes: int = Depends(require_judge),
+) -> int:
+    """
+    Gate judge downloads on a link signed with `judge_token`, so only this
+    app's bandwidth jobs can pull data; 404 while no token is configured.
+    """
+    if not settings.judge_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not verify_judge_signature(size, expires, signature, settings.judge_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired download signature",
+        )
+    return max_bytes
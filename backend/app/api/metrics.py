@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+
+from ..core import metrics
+from .dependencies import require_metrics_token
+
+router = APIRouter(tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
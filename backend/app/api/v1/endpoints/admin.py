@@ -0,0 +1,71 @@
+import asyncio
+from contextlib import suppress
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+
+from ...dependencies import get_loop_monitor, require_admin
+from ....core.loop_monitor import LoopMonitor
+from ....core.profiling import LoopLagSampler, SamplingProfiler
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+_profile_lock = asyncio.Lock()
+
+
+@router.post("/profile")
+async def capture_profile(
+    seconds: float = Query(default=10, gt=0, le=300),
+    interval_ms: float = Query(default=10, ge=1, le=1000),
+    output: Literal["collapsed", "json"] = Query(default="collapsed", alias="format"),
+    _: dict = Depends(require_admin),
+):
+    """
+    Sample every thread's stack for `seconds` while the server keeps serving,
+    and return collapsed stacks for a flamegraph plus event-loop lag stats.
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+
+    async with _profile_lock:
+        profiler = SamplingProfiler(interval=interval_ms / 1000)
+        lag_sampler = LoopLagSampler()
+        lag_task = asyncio.create_task(lag_sampler.run())
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+            lag_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await lag_task
+
+    loop_stats = lag_sampler.stats.to_dict()
+    if output == "json":
+        return {
+            "duration_s": round(profiler.duration, 3),
+            "samples": profiler.samples,
+            "loop": loop_stats,
+            "collapsed": profiler.collapsed(),
+        }
+    return Response(
+        profiler.collapsed(),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.collapsed"',
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Loop-Lag-P99-Ms": str(loop_stats["p99_ms"]),
+            "X-Loop-Lag-Max-Ms": str(loop_stats["max_ms"]),
+            "X-Max-Asyncio-Tasks": str(loop_stats["max_tasks"]),
+        },
+    )
+
+
+@router.get("/loop")
+async def loop_status(
+    _: dict = Depends(require_admin),
+    monitor: LoopMonitor = Depends(get_loop_monitor),
+):
+    """Event-loop lag since startup and the most recent slow-callback stacks."""
+    return monitor.snapshot()
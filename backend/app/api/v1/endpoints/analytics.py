@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+
+from ...dependencies import get_session_repository, require_auth
+from ....repositories.session_repository import SessionRepository
+
+router = APIRouter(tags=["analytics"])
+
+
+@router.get("/analytics")
+async def session_analytics(
+    group_by: Literal["session", "tag", "country"] = "session",
+    interval: Literal["day", "week", "month", "none"] = "day",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    key: str | None = Query(default=None, description="Only this tag or country code"),
+    session_repository: SessionRepository = Depends(get_session_repository),
+    principal: dict = Depends(require_auth),
+):
+    """
+    Totals, alive ratio and average latency across this user's sessions,
+    per tag or exit country (`group_by`) and per `interval` of session
+    creation time. Computed in the database from per-session rollups.
+    """
+    items = await session_repository.aggregate(
+        owner_sub=str(principal["sub"]),
+        dimension=group_by,
+        interval=None if interval == "none" else interval,
+        since=since,
+        until=until,
+        key=key.upper() if key and group_by == "country" else key,
+    )
+    return {"items": items}
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
 from ...dependencies import get_check_service, require_auth
+from ....core import metrics
 from ....schemas.check import CheckRequest
 from ....services.check_service import CheckService
 
@@ -16,11 +17,17 @@ async def run_check(
     check_service: CheckService = Depends(get_check_service),
 ):
     owner_sub = str(principal["sub"])
+    if payload.measure_bandwidth and check_service.bandwidth_url(payload) is None:
+        raise HTTPException(
+            status_code=400,
+            detail="measure_bandwidth needs bandwidth_url or the BANDWIDTH_URL setting",
+        )
 
     async def stream_events():
         async for event in check_service.stream_check_events(payload, owner_sub=owner_sub):
             if await request.is_disconnected():
                 break
+            metrics.SSE_BYTES_SENT.inc(len(event))
             yield event
 
     return StreamingResponse(
@@ -0,0 +1,39 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from fastapi.responses import StreamingResponse
+
+from ...dependencies import require_judge, require_judge_download
+
+JUDGE_CHUNK_SIZE = 64 * 1024
+# Random rather than zero bytes, so a compressing proxy cannot inflate the
+# measured throughput.
+_PAYLOAD = os.urandom(JUDGE_CHUNK_SIZE)
+
+router = APIRouter(prefix="/judge", tags=["judge"])
+
+
+@router.get("/ip", dependencies=[Depends(require_judge)])
+async def judge_ip(request: Request):
+    """Caller's address in httpbin's `/ip` format, usable as a `check_url`."""
+    return {"origin": request.client.host if request.client else ""}
+
+
+@router.get("/bytes/{size}")
+async def judge_bytes(size: int = Path(ge=1), max_bytes: int = Depends(require_judge_download)):
+    """`size` bytes of incompressible payload for the bandwidth stage, behind a signed link."""
+    if size > max_bytes:
+        raise HTTPException(status_code=400, detail=f"size exceeds {max_bytes} bytes")
+
+    async def payload():
+        remaining = size
+        while remaining > 0:
+            chunk = _PAYLOAD[: min(remaining, JUDGE_CHUNK_SIZE)]
+            remaining -= len(chunk)
+            yield chunk
+
+    return StreamingResponse(
+        payload(),
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(size), "Cache-Control": "no-store"},
+    )
@@ -0,0 +1,40 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ...dependencies import get_proxy_index, require_auth
+from ....services.proxy_index import ProxyIndex
+
+router = APIRouter(tags=["proxies"])
+
+
+@router.get("/proxies/best")
+async def best_proxies(
+    n: int = Query(default=10, ge=1, le=100),
+    country: str | None = Query(default=None, description="ISO country code, e.g. DE"),
+    max_latency: int | None = Query(default=None, ge=1),
+    strategy: Literal["weighted", "fastest"] = "weighted",
+    reveal_passwords: bool = False,
+    proxy_index: ProxyIndex | None = Depends(get_proxy_index),
+    principal: dict = Depends(require_auth),
+):
+    """
+    Alive proxies from this user's recent sessions, served from memory.
+    `weighted` picks at random with weight 1/latency to spread load;
+    `fastest` returns the lowest-latency proxies in order.
+    """
+    if proxy_index is None:
+        raise HTTPException(status_code=404, detail="Proxy index is disabled")
+
+    owner_sub = str(principal["sub"])
+    proxies = proxy_index.best(
+        owner_sub,
+        n=n,
+        country=country,
+        max_latency=max_latency,
+        weighted=strategy == "weighted",
+    )
+    return {
+        "items": [proxy.as_dict(reveal_password=reveal_passwords) for proxy in proxies],
+        "indexed": proxy_index.size(owner_sub),
+    }
@@ -1,38 +1,128 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
 
-from ...dependencies import get_session_repository, require_auth
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ...dependencies import get_proxy_index, get_session_repository, require_auth
 from ....repositories.session_repository import SessionRepository
+from ....schemas.session import PasswordRevealRequest
+from ....services import session_export
+from ....services.proxy_index import ProxyIndex
+
+EXPORT_CHUNK_SIZE = 5000
 
 router = APIRouter(tags=["sessions"])
 
 
 @router.get("/sessions")
 async def list_sessions(
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    tag: str | None = None,
+    q: str | None = Query(default=None, description="Case-insensitive name filter"),
     session_repository: SessionRepository = Depends(get_session_repository),
     principal: dict = Depends(require_auth),
 ):
-    return await session_repository.list_summaries(owner_sub=str(principal["sub"]))
+    try:
+        return await session_repository.list_summaries(
+            owner_sub=str(principal["sub"]),
+            limit=limit,
+            cursor=cursor,
+            tag=tag,
+            name=q,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @router.get("/sessions/{session_id}")
 async def get_session(
     session_id: str,
+    reveal_passwords: bool = False,
+    sort: Literal["latency", "throughput"] | None = Query(
+        default=None,
+        description="Order results by latency (fastest first) or measured throughput (highest first)",
+    ),
     session_repository: SessionRepository = Depends(get_session_repository),
     principal: dict = Depends(require_auth),
 ):
-    session = await session_repository.get(session_id, owner_sub=str(principal["sub"]))
+    session = await session_repository.get(
+        session_id,
+        owner_sub=str(principal["sub"]),
+        reveal_passwords=reveal_passwords,
+        sort=sort,
+    )
     if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     return session
 
 
+@router.post("/sessions/{session_id}/passwords")
+async def reveal_session_passwords(
+    session_id: str,
+    payload: PasswordRevealRequest,
+    session_repository: SessionRepository = Depends(get_session_repository),
+    principal: dict = Depends(require_auth),
+):
+    passwords = await session_repository.get_passwords(
+        session_id,
+        owner_sub=str(principal["sub"]),
+        result_ids=payload.result_ids,
+    )
+    if passwords is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return passwords
+
+
+@router.get("/sessions/{session_id}/export")
+async def export_session(
+    session_id: str,
+    export_format: Literal["csv", "ndjson", "parquet"] = Query(default="csv", alias="format"),
+    alive_only: bool = False,
+    country: str | None = Query(default=None, description="Country code or name"),
+    max_latency: int | None = Query(default=None, ge=0, description="Max response time in ms"),
+    reveal_passwords: bool = False,
+    session_repository: SessionRepository = Depends(get_session_repository),
+    principal: dict = Depends(require_auth),
+):
+    if not session_export.available(export_format):
+        raise HTTPException(status_code=400, detail="Parquet export needs the `pyarrow` package")
+
+    chunks = await session_repository.stream_results(
+        session_id,
+        owner_sub=str(principal["sub"]),
+        reveal_passwords=reveal_passwords,
+        chunk_size=EXPORT_CHUNK_SIZE,
+    )
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return StreamingResponse(
+        session_export.stream_export(
+            chunks,
+            export_format,
+            alive_only=alive_only,
+            country=country,
+            max_latency=max_latency,
+        ),
+        media_type=session_export.MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="session_{session_id}.{export_format}"',
+        },
+    )
+
+
 @router.delete("/sessions/{session_id}")
 async def delete_session(
     session_id: str,
     session_repository: SessionRepository = Depends(get_session_repository),
+    proxy_index: ProxyIndex | None = Depends(get_proxy_index),
     principal: dict = Depends(require_auth),
 ):
-    deleted = await session_repository.delete(session_id, owner_sub=str(principal["sub"]))
+    owner_sub = str(principal["sub"])
+    deleted = await session_repository.delete(session_id, owner_sub=owner_sub)
     if not deleted:
         raise HTTPException(status_code=404, detail="Session not found")
+    if proxy_index is not None:
+        await proxy_index.remove_session(owner_sub, session_id)
     return {"status": "deleted"}
@@ -0,0 +1,31 @@
+import json
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from ...dependencies import require_worker_token
+from ....schemas.check import WorkerChunk
+from ....services.check_service import check_proxies
+
+router = APIRouter(prefix="/worker", tags=["worker"])
+
+
+@router.post("/check", dependencies=[Depends(require_worker_token)])
+async def check_chunk(chunk: WorkerChunk):
+    """
+    Check one chunk for a coordinator node and stream an NDJSON line
+    `{"index": ..., "result": {...}}` per proxy as soon as it finishes.
+    """
+
+    async def stream_results():
+        async for index, result in check_proxies(
+            chunk.proxies,
+            chunk.check_url,
+            chunk.timeout,
+            chunk.proxy_type,
+            chunk.max_workers,
+        ):
+            line = json.dumps({"index": index, "result": result.as_dict()}, separators=(",", ":"))
+            yield line + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
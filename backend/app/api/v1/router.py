@@ -1,10 +1,20 @@
 from fastapi import APIRouter
 
+from .endpoints.admin import router as admin_router
+from .endpoints.analytics import router as analytics_router
 from .endpoints.checks import router as checks_router
 from .endpoints.health import router as health_router
+from .endpoints.judge import router as judge_router
+from .endpoints.proxies import router as proxies_router
 from .endpoints.sessions import router as sessions_router
+from .endpoints.worker import router as worker_router
 
 api_router = APIRouter()
 api_router.include_router(checks_router)
 api_router.include_router(sessions_router)
+api_router.include_router(proxies_router)
+api_router.include_router(analytics_router)
 api_router.include_router(health_router)
+api_router.include_router(judge_router)
+api_router.include_router(admin_router)
+api_router.include_router(worker_router)
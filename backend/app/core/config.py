@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,7 +17,59 @@ class Settings(BaseSettings):
     auth0_audience: str
     auth0_issuer: str | None = None
     auth0_algorithms: list[str] = ["RS256"]
+    auth_token_cache_size: int = 1024
     proxy_password_secret: str = "change-this-proxy-password-secret"
+    proxy_password_scheme: Literal["fernet", "aesgcm"] = "fernet"
+    results_storage_codec: Literal["json", "zlib", "zstd"] = "zlib"
+    results_reencode_legacy: bool = True
+    # Write every run's results to the check cache, not only runs that set
+    # max_age, so a later max_age run can reuse them. Entries older than the
+    # largest max_age are pruned every `check_cache_prune_interval` seconds.
+    check_cache_always_store: bool = False
+    check_cache_prune_interval: int = 3600
+    # Default download for CheckRequest.measure_bandwidth; `{bytes}` is
+    # replaced by the requested size, e.g.
+    # https://checker.example.com/api/judge/bytes/{bytes}
+    bandwidth_url: str = ""
+    # Built-in judge (/api/judge/ip, /api/judge/bytes/{n}). It is public,
+    # so it is off by default and downloads are capped. Downloads also need
+    # a link signed with `judge_token`, which jobs using `bandwidth_url` get.
+    judge_enabled: bool = False
+    judge_max_bytes: int = 50_000_000
+    judge_token: str = ""
+    # Write analytics rollups for sessions saved before they existed.
+    rollup_backfill: bool = True
+    # /metrics is served only to `Authorization: Bearer <metrics_token>`;
+    # without a token it is 404.
+    metrics_enabled: bool = True
+    metrics_token: str = ""
+    # In-memory index of alive proxies behind GET /api/proxies/best.
+    proxy_index_enabled: bool = True
+    proxy_index_max_age: int = 24 * 3600
+    proxy_index_max_per_owner: int = 1_000_000
+    proxy_index_max_owners: int = 10_000
+    # Concurrent check sockets across all jobs; None derives it from
+    # RLIMIT_NOFILE and the local port range at startup.
+    socket_budget: int | None = None
+    raise_nofile_limit: bool = True
+    # Distributed checks: with `check_workers` set this node coordinates and
+    # sends chunks of each job to those worker base URLs. A node accepts
+    # chunks on /api/worker/check when `worker_token` is set; coordinator
+    # and workers must share the same token.
+    check_workers: list[str] = []
+    worker_token: str = ""
+    worker_chunk_size: int = 500
+    worker_chunks_in_flight: int = 2
+    worker_local_checks: bool = True
+    # Background event-loop lag monitor; lags over the threshold are logged
+    # with the stack of whatever was holding the loop.
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_ms: int = 100
+    loop_slow_callback_ms: int = 100
+    # Admin endpoints (/api/admin/*) accept tokens whose `sub` is listed here
+    # or whose Auth0 RBAC `permissions` claim contains `admin_permission`.
+    admin_subjects: list[str] = []
+    admin_permission: str = "admin:debug"
 
     model_config = SettingsConfigDict(
         env_file=".env",
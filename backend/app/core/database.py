@@ -38,11 +38,14 @@ async def init_db() -> None:
         return
 
     # Migrations are preferred for production, but create_all keeps local setup simple.
-    from ..models import ProxySession  # noqa: F401
+    from ..models import CheckCacheEntry, ProxySession, ProxySessionRollup  # noqa: F401
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
         await conn.run_sync(_migrate_proxy_sessions_owner_sub)
+        await conn.run_sync(_migrate_proxy_sessions_listing_index)
+        await conn.run_sync(_migrate_proxy_sessions_results_blob)
+        await conn.run_sync(_migrate_proxy_check_cache_checked_at_index)
 
 
 async def close_db() -> None:
@@ -72,3 +75,33 @@ def _migrate_proxy_sessions_owner_sub(sync_conn) -> None:
         "CREATE INDEX IF NOT EXISTS ix_proxy_sessions_owner_sub "
         "ON proxy_sessions (owner_sub)"
     )
+
+
+def _migrate_proxy_sessions_listing_index(sync_conn) -> None:
+    """
+    Add the composite index behind paginated session listing to tables that
+    were created before it existed.
+    """
+    sync_conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_proxy_sessions_owner_sub_created_at "
+        "ON proxy_sessions (owner_sub, created_at)"
+    )
+
+
+def _migrate_proxy_sessions_results_blob(sync_conn) -> None:
+    """Add the compact `results_blob` column to tables created before it existed."""
+    inspector = inspect(sync_conn)
+    columns = {column["name"] for column in inspector.get_columns("proxy_sessions")}
+    if "results_blob" in columns:
+        return
+
+    blob_type = "BYTEA" if sync_conn.dialect.name == "postgresql" else "BLOB"
+    sync_conn.exec_driver_sql(f"ALTER TABLE proxy_sessions ADD COLUMN results_blob {blob_type}")
+
+
+def _migrate_proxy_check_cache_checked_at_index(sync_conn) -> None:
+    """Add the index behind check cache pruning to tables created before it existed."""
+    sync_conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_proxy_check_cache_checked_at "
+        "ON proxy_check_cache (checked_at)"
+    )
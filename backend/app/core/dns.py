@@ -0,0 +1,149 @@
+"""
+Async DNS resolution with a shared in-process cache.
+
+Hostname proxies (rotating gateways) repeat the same few names thousands
+of times in one job. `DNSCache` resolves each name once per TTL, and
+concurrent lookups of a name wait on the same query instead of starting
+their own. With the optional `aiodns` package, queries run on c-ares
+without a thread and honour the record TTL (clamped to MIN_TTL..MAX_TTL);
+otherwise they go through `loop.getaddrinfo` (the system resolver on the
+default executor) and are kept for FALLBACK_TTL. Failed lookups are kept
+for NEGATIVE_TTL so a dead name does not cost a query per proxy.
+
+The cache is used from the event loop only, like the metrics it updates.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+
+try:  # c-ares resolver with record TTLs is optional.
+    import aiodns
+except ImportError:  # pragma: no cover - depends on the local environment
+    aiodns = None
+
+from . import metrics
+
+MIN_TTL = 5.0
+MAX_TTL = 300.0
+FALLBACK_TTL = 60.0
+NEGATIVE_TTL = 5.0
+
+# (family, ip) in resolver order.
+Address = tuple[int, str]
+
+
+class DNSCache:
+    def __init__(self, max_entries: int = 10_000, use_aiodns: bool = True) -> None:
+        self.max_entries = max_entries
+        self.use_aiodns = use_aiodns and aiodns is not None
+        self._entries: OrderedDict[str, tuple[float, list[Address] | OSError]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._resolver = None
+        self._resolver_loop: asyncio.AbstractEventLoop | None = None
+
+    async def lookup(self, host: str) -> list[Address]:
+        """Addresses for `host`; raises `socket.gaierror` if it does not resolve."""
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return [(socket.AF_INET6 if ip.version == 6 else socket.AF_INET, str(ip))]
+
+        host = host.lower()
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(host)
+            metrics.DNS_LOOKUPS.labels("hit").inc()
+            return _unwrap(entry[1])
+
+        task = self._inflight.get(host)
+        if task is None:
+            metrics.DNS_LOOKUPS.labels("miss").inc()
+            task = self._inflight[host] = asyncio.create_task(self._query(host))
+            task.add_done_callback(lambda _: self._inflight.pop(host, None))
+        else:
+            metrics.DNS_LOOKUPS.labels("coalesced").inc()
+        # A cancelled caller must not cancel the query others are waiting on.
+        return _unwrap(await asyncio.shield(task))
+
+    async def resolve(self, host: str, port: int) -> list[tuple]:
+        """`socket.getaddrinfo`-style TCP entries for `host`:`port`."""
+        return [
+            (
+                family,
+                socket.SOCK_STREAM,
+                socket.IPPROTO_TCP,
+                "",
+                (ip, port, 0, 0) if family == socket.AF_INET6 else (ip, port),
+            )
+            for family, ip in await self.lookup(host)
+        ]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _query(self, host: str) -> list[Address] | OSError:
+        start = time.perf_counter()
+        try:
+            if self.use_aiodns:
+                addresses, ttl = await self._query_aiodns(host)
+            else:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    host, None, type=socket.SOCK_STREAM
+                )
+                addresses = list(dict.fromkeys((info[0], info[4][0]) for info in infos))
+                ttl = FALLBACK_TTL
+            if not addresses:
+                raise socket.gaierror(socket.EAI_NONAME, "No address associated with hostname")
+            answer: list[Address] | OSError = addresses
+        except OSError as exc:
+            metrics.DNS_QUERY_FAILURES.inc()
+            answer, ttl = exc, NEGATIVE_TTL
+        metrics.DNS_QUERY_DURATION.observe(time.perf_counter() - start)
+
+        self._entries[host] = (time.monotonic() + ttl, answer)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return answer
+
+    async def _query_aiodns(self, host: str) -> tuple[list[Address], float]:
+        loop = asyncio.get_running_loop()
+        if self._resolver is None or self._resolver_loop is not loop:
+            self._resolver = aiodns.DNSResolver(loop=loop)
+            self._resolver_loop = loop
+        try:
+            answer = await self._resolver.getaddrinfo(host, type=socket.SOCK_STREAM)
+        except aiodns.error.DNSError as exc:
+            message = exc.args[1] if len(exc.args) > 1 else str(exc)
+            raise socket.gaierror(socket.EAI_NONAME, message) from None
+
+        addresses = list(
+            dict.fromkeys(
+                (node.family, node.addr[0].decode() if isinstance(node.addr[0], bytes) else node.addr[0])
+                for node in answer.nodes
+            )
+        )
+        ttl = min((node.ttl for node in answer.nodes), default=0)
+        return addresses, min(max(ttl, MIN_TTL), MAX_TTL)
+
+
+def _unwrap(answer: list[Address] | OSError) -> list[Address]:
+    if isinstance(answer, OSError):
+        raise socket.gaierror(*answer.args)
+    return answer
+
+
+_cache: DNSCache | None = None
+
+
+def get_dns_cache() -> DNSCache:
+    """Process-wide cache shared by the check engine, the HTTP client and the CLI tools."""
+    global _cache
+    if _cache is None:
+        _cache = DNSCache()
+    return _cache
@@ -0,0 +1,30 @@
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive client for outbound calls (JWKS, GeoIP, check workers).
+
+    Opened in the app lifespan; created lazily for code paths that run
+    without it (scripts, benchmarks).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def start_http_client() -> None:
+    get_http_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,123 @@
+"""
+Event-loop lag monitor with slow-callback stack capture.
+
+A `LoopLagSampler` runs for the app's lifetime, waking every `interval`
+and recording how late it woke up (the lag). A watchdog thread watches
+those ticks: when one is overdue by more than `slow_threshold`, some
+callback is holding the loop, so it snapshots the loop thread's stack
+right then. When the loop resumes, the lag and the captured stack are
+logged and kept for the debug endpoint.
+
+This works with any loop implementation (including uvloop) because it
+never wraps loop internals; the overhead is one timer per `interval` and
+one thread wake-up per half threshold.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timezone
+
+from . import metrics
+from .profiling import LoopLagSampler
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames kept per captured stack.
+STACK_LIMIT = 25
+
+
+class LoopMonitor(LoopLagSampler):
+    # The lag histogram gives percentiles; a lifetime of samples isn't kept,
+    # and `snapshot()` counts tasks when asked instead of on every tick.
+    MAX_KEPT = 0
+    COUNT_TASKS = False
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow_threshold: float = 0.1,
+        history: int = 50,
+    ) -> None:
+        super().__init__(interval)
+        self.slow_threshold = slow_threshold
+        self.slow_events: deque[dict] = deque(maxlen=history)
+        self.last_lag = 0.0
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._pending_stack: list[str] | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self.run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def snapshot(self) -> dict:
+        stats = self.stats
+        return {
+            "interval_ms": stats.interval_ms,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "samples": stats.samples,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "mean_lag_ms": round(stats.mean_ms, 3),
+            "max_lag_ms": round(stats.max_ms, 3),
+            "tasks": len(asyncio.all_tasks()),
+            "slow_events": list(self.slow_events),
+        }
+
+    def record(self, lag_ms: float) -> None:
+        self._last_tick = time.monotonic()
+        super().record(lag_ms)
+        lag = self.last_lag = lag_ms / 1000
+        metrics.EVENT_LOOP_LAG.observe(lag)
+
+        stack, self._pending_stack = self._pending_stack, None
+        if lag < self.slow_threshold:
+            return
+
+        metrics.EVENT_LOOP_SLOW_CALLBACKS.inc()
+        self.slow_events.append(
+            {
+                "at": datetime.now(timezone.utc).isoformat(),
+                "lag_ms": round(lag_ms, 1),
+                "stack": stack or [],
+            }
+        )
+        logger.warning(
+            "Event loop blocked for %.0f ms%s",
+            lag_ms,
+            ":\n" + "".join(stack) if stack else " (stack not captured)",
+        )
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.slow_threshold / 2):
+            overdue = time.monotonic() - self._last_tick - self.interval
+            if overdue < self.slow_threshold or self._pending_stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._pending_stack = traceback.format_stack(frame, limit=STACK_LIMIT)
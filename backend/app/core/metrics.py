@@ -0,0 +1,325 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Metrics are only updated from the event loop (thread-pool work is timed
+around `asyncio.to_thread`), so updates are plain attribute arithmetic:
+no locks, no allocation once a label set has been seen. `render()` builds
+the `/metrics` payload on scrape.
+"""
+
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        if not labelnames:
+            self._children[()] = self._new_child()
+        _registry.append(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self._children[()].inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        function: Callable[[], float] | Callable[[], dict[tuple[str, ...], float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        # Gauges backed by a function are read at scrape time instead; with
+        # labels the function returns a value per tuple of label values.
+        self._function = function
+
+    def dec(self, amount: float = 1) -> None:
+        self._children[()].dec(amount)
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+    def _samples(self) -> Iterator[str]:
+        if self._function is not None and self.labelnames:
+            for values, value in self._function().items():
+                self.labels(*values).set(value)
+        elif self._function is not None:
+            self._children[()].set(self._function())
+        yield from super()._samples()
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def _samples(self) -> Iterator[str]:
+        names = (*self.labelnames, "le")
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                labels = _format_labels(names, (*values, _format_value(float(bound))))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+def _default_executor() -> Executor | None:
+    try:
+        return asyncio.get_running_loop()._default_executor
+    except (RuntimeError, AttributeError):
+        return None
+
+
+# Thread pools reported by the executor gauges, by `executor` label.
+_executors: dict[str, Callable[[], Executor | None]] = {"default": _default_executor}
+
+
+def track_executor(name: str, get: Callable[[], Executor | None]) -> None:
+    """Report a ThreadPoolExecutor (None until created) in the executor gauges."""
+    _executors[name] = get
+
+
+def _executor_stats(name: str) -> dict[tuple[str, ...], float]:
+    stats = {}
+    for label, get in _executors.items():
+        executor = get()
+        if executor is None:
+            stats[(label,)] = 0
+        elif name == "threads":
+            stats[(label,)] = len(executor._threads)
+        elif name == "max_threads":
+            stats[(label,)] = executor._max_workers
+        else:
+            stats[(label,)] = executor._work_queue.qsize()
+    return stats
+
+
+# ── Check engine ─────────────────────────────────────────────────────────────
+CHECKS_TOTAL = Counter(
+    "proxy_checks_total",
+    "Completed proxy checks by outcome (ok, fail, cached); rate() gives checks/s.",
+    ("outcome",),
+)
+CHECKS_IN_FLIGHT = Gauge("proxy_checks_in_flight", "Proxy checks currently running.")
+CHECKS_QUEUED = Gauge(
+    "proxy_checks_queued",
+    "Proxy checks waiting for a CheckService worker slot (semaphore queue depth).",
+)
+CHECK_DURATION = Histogram(
+    "proxy_check_duration_seconds",
+    "Wall time of a single proxy check by outcome.",
+    ("outcome",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+CHECK_SOCKET_BUDGET = Gauge(
+    "proxy_check_socket_budget",
+    "Concurrent check sockets allowed by RLIMIT_NOFILE and the local port range.",
+)
+CHECK_SOCKETS_IN_USE = Gauge("proxy_check_sockets_in_use", "Check sockets currently open.")
+CHECK_LOCAL_ERRORS = Counter(
+    "proxy_check_local_errors_total",
+    "Check attempts that failed for lack of local descriptors, ports or buffers (retried).",
+)
+THROUGHPUT_MEASUREMENTS = Counter(
+    "proxy_throughput_measurements_total",
+    "Bandwidth measurements of alive proxies by outcome (ok, fail).",
+    ("outcome",),
+)
+THROUGHPUT = Histogram(
+    "proxy_throughput_bytes_per_second",
+    "Measured download throughput of alive proxies.",
+    buckets=(10e3, 50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6, 25e6, 50e6),
+)
+WORKER_CHUNKS = Counter(
+    "check_worker_chunks_total",
+    "Chunks sent to worker nodes by outcome (ok, error); failed chunks are requeued.",
+    ("outcome",),
+)
+EXECUTOR_THREADS = Gauge(
+    "executor_threads",
+    "Threads started by each thread pool (default: asyncio.to_thread, check: proxy checks).",
+    ("executor",),
+    function=lambda: _executor_stats("threads"),
+)
+EXECUTOR_MAX_THREADS = Gauge(
+    "executor_max_threads",
+    "Thread limit of each thread pool.",
+    ("executor",),
+    function=lambda: _executor_stats("max_threads"),
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Work items waiting for a thread, by thread pool.",
+    ("executor",),
+    function=lambda: _executor_stats("queue"),
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop monitor's periodic timer fired; time other callbacks held the loop.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_SLOW_CALLBACKS = Counter(
+    "event_loop_slow_callbacks_total",
+    "Loop stalls longer than LOOP_SLOW_CALLBACK_MS (logged with the blocking stack).",
+)
+SSE_BYTES_SENT = Counter("sse_bytes_sent_total", "Bytes of SSE events sent by /api/check.")
+
+# ── Dependencies ─────────────────────────────────────────────────────────────
+GEOIP_BATCH_DURATION = Histogram(
+    "geoip_batch_duration_seconds",
+    "Duration of GeoIP batch lookups.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+GEOIP_BATCH_FAILURES = Counter("geoip_batch_failures_total", "GeoIP batch lookups that failed.")
+DNS_LOOKUPS = Counter(
+    "dns_lookups_total",
+    "Hostname lookups by outcome (hit, miss, coalesced onto a query in flight).",
+    ("outcome",),
+)
+DNS_QUERY_DURATION = Histogram(
+    "dns_query_duration_seconds",
+    "Duration of DNS queries made on cache misses.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DNS_QUERY_FAILURES = Counter("dns_query_failures_total", "DNS queries that failed (cached briefly).")
+JWKS_FETCHES = Counter("jwks_fetches_total", "JWKS fetches by outcome (ok, error).", ("outcome",))
+DB_OPERATION_DURATION = Histogram(
+    "db_operation_duration_seconds",
+    "Duration of session repository operations.",
+    ("operation",),
+)
@@ -0,0 +1,180 @@
+"""
+Low-overhead sampling profiler and event-loop lag sampler.
+
+`SamplingProfiler` snapshots every thread's Python stack from a background
+thread (`sys._current_frames`) at a fixed interval and aggregates them as
+collapsed stacks (`frame;frame;frame count`), the input format of
+flamegraph.pl, speedscope and inferno. Samples are wall-clock: a thread
+blocked in a socket read shows up in the function doing the read. Stacks
+that end in an idle wait (thread pool workers waiting for work, the event
+loop's selector) are dropped so they don't drown out real work.
+
+`LoopLagSampler` runs on an event loop and measures how late a periodic
+timer fires; any lag means some callback held the loop for that long. It
+backs both `/api/admin/profile` windows and the always-on `LoopMonitor`.
+"""
+
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Leaf frames in these modules are threads parked waiting for something to do.
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+_POOL_WORKER_FILE = os.path.join("concurrent", "futures", "thread.py")
+
+
+def _is_idle(code) -> bool:
+    if code.co_filename.endswith(_IDLE_MODULES):
+        return True
+    # ThreadPoolExecutor workers block on a C-level queue.get() inside `_worker`.
+    return code.co_name == "_worker" and code.co_filename.endswith(_POOL_WORKER_FILE)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.01, include_idle: bool = False) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self.started_at: float | None = None
+        self.stopped_at: float | None = None
+        self._stacks: Counter[str] = Counter()
+        self._labels: dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.stopped_at or time.perf_counter()) - self.started_at
+
+    def start(self) -> "SamplingProfiler":
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self.stopped_at = None
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one `root;...;leaf count` line each, hottest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.collapsed())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and _is_idle(frame.f_code):
+                    continue
+                labels = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = self._labels.get(code)
+                    if label is None:
+                        label = self._labels[code] = _frame_label(code)
+                    labels.append(label)
+                    frame = frame.f_back
+                labels.append(_thread_group(names.get(thread_id, "thread")))
+                labels.reverse()
+                self._stacks[";".join(labels)] += 1
+            self.samples += 1
+
+
+def _thread_group(name: str) -> str:
+    # Pool threads are numbered ("asyncio_3", "ThreadPoolExecutor-0_12");
+    # merge them so a flamegraph shows one tower per pool, not per thread.
+    base = name.rstrip("0123456789").rstrip("_-")
+    return base or name
+
+
+@dataclass
+class LoopLagStats:
+    interval_ms: float
+    samples: int = 0
+    max_ms: float = 0.0
+    total_ms: float = 0.0
+    lags_ms: list[float] = field(default_factory=list, repr=False)
+    max_tasks: int = 0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.samples if self.samples else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.lags_ms:
+            return 0.0
+        ordered = sorted(self.lags_ms)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * pct / 100) - 1))]
+
+    def to_dict(self) -> dict:
+        return {
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "mean_ms": round(self.mean_ms, 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "max_tasks": self.max_tasks,
+        }
+
+
+class LoopLagSampler:
+    """Measure event-loop lag for as long as `run()` is awaited (cancel to stop)."""
+
+    # Keep individual lags for percentiles up to this many samples.
+    MAX_KEPT = 100_000
+    # Track the peak asyncio task count (walks every task on each sample).
+    COUNT_TASKS = True
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.stats = LoopLagStats(interval_ms=interval * 1000)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (loop.time() - expected) * 1000))
+
+    def record(self, lag_ms: float) -> None:
+        stats = self.stats
+        stats.samples += 1
+        stats.total_ms += lag_ms
+        stats.max_ms = max(stats.max_ms, lag_ms)
+        if len(stats.lags_ms) < self.MAX_KEPT:
+            stats.lags_ms.append(lag_ms)
+        if self.COUNT_TASKS:
+            stats.max_tasks = max(stats.max_tasks, len(asyncio.all_tasks()))
@@ -1,11 +1,47 @@
 import asyncio
+import hashlib
+import hmac
+import logging
 import time
+from collections import OrderedDict
+from contextlib import suppress
 from typing import Any
 
 import httpx
 from fastapi import HTTPException, status
 from jose import JWTError, jwt
 
+from . import metrics
+from .http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# How long a signed judge download link stays valid, in seconds.
+JUDGE_URL_TTL = 3600
+
+
+def _judge_signature(secret: str, size: int, expires: int) -> str:
+    return hmac.new(secret.encode("utf-8"), f"{size}:{expires}".encode("ascii"), hashlib.sha256).hexdigest()
+
+
+def sign_judge_url(url: str, size: int, secret: str, ttl: int = JUDGE_URL_TTL) -> str:
+    """
+    Append `expires` and `signature` to a judge `/bytes/{size}` URL.
+
+    The signature covers only the size and expiry, so the secret itself
+    never travels through the proxies and a captured link stops working
+    after `ttl` seconds.
+    """
+    expires = int(time.time()) + ttl
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}expires={expires}&signature={_judge_signature(secret, size, expires)}"
+
+
+def verify_judge_signature(size: int, expires: int, signature: str, secret: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(signature, _judge_signature(secret, size, expires))
+
 
 class Auth0TokenVerifier:
     def __init__(
@@ -15,6 +51,9 @@ class Auth0TokenVerifier:
         algorithms: list[str],
         issuer: str | None = None,
         jwks_ttl_seconds: int = 3600,
+        token_cache_size: int = 1024,
+        jwks_min_refresh_interval: float = 10.0,
+        jwks_retry_seconds: float = 30.0,
     ) -> None:
         normalized_domain = domain.replace("https://", "").rstrip("/")
         self._audience = audience
@@ -25,14 +64,53 @@ class Auth0TokenVerifier:
 
         self._jwks_cache: dict[str, Any] | None = None
         self._jwks_expires_at: float = 0.0
+        self._jwks_fetched_at: float = 0.0
+        self._jwks_min_refresh_interval = jwks_min_refresh_interval
+        self._jwks_retry_seconds = jwks_retry_seconds
+        # Refresh ahead of expiry so request handlers never wait on a fetch.
+        self._jwks_refresh_margin = min(300.0, jwks_ttl_seconds * 0.1)
+        self._signing_keys: dict[str, dict[str, Any]] = {}
         self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+        self._revalidate_task: asyncio.Task | None = None
+
+        # sha256(token) -> (exp, claims) for tokens that already passed full
+        # verification; entries are dropped once the token itself expires.
+        self._token_cache: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._token_cache_size = token_cache_size
+
+    async def start(self) -> None:
+        """Prefetch the JWKS and keep it refreshed in the background."""
+        try:
+            await self._get_jwks(force_refresh=True)
+        except (httpx.HTTPError, ValueError):
+            logger.warning("Initial JWKS fetch from %s failed; retrying in background", self._jwks_url)
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._refresh_task, self._revalidate_task):
+            if task is not None and not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        self._refresh_task = None
+        self._revalidate_task = None
 
     async def verify_token(self, token: str) -> dict[str, Any]:
-        jwks = await self._get_jwks()
-        signing_key = self._find_signing_key(token, jwks)
+        cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self._token_cache.get(cache_key)
+        if cached is not None:
+            expires_at, claims = cached
+            if time.time() < expires_at:
+                self._token_cache.move_to_end(cache_key)
+                return claims
+            del self._token_cache[cache_key]
+
+        await self._get_jwks()
+        signing_key = self._find_signing_key(token)
         if signing_key is None:
-            jwks = await self._get_jwks(force_refresh=True)
-            signing_key = self._find_signing_key(token, jwks)
+            await self._get_jwks(force_refresh=True)
+            signing_key = self._find_signing_key(token)
 
         if signing_key is None:
             raise HTTPException(
@@ -54,37 +132,81 @@ class Auth0TokenVerifier:
                 detail="Invalid or expired token",
             ) from exc
 
+        self._remember_token(cache_key, payload)
         return payload
 
+    def _remember_token(self, cache_key: bytes, payload: dict[str, Any]) -> None:
+        expires_at = payload.get("exp")
+        if self._token_cache_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        self._token_cache[cache_key] = (float(expires_at), payload)
+        self._token_cache.move_to_end(cache_key)
+        while len(self._token_cache) > self._token_cache_size:
+            self._token_cache.popitem(last=False)
+
     async def _get_jwks(self, force_refresh: bool = False) -> dict[str, Any]:
-        now = time.time()
-        if (
-            not force_refresh
-            and self._jwks_cache is not None
-            and now < self._jwks_expires_at
-        ):
+        if not force_refresh and self._jwks_cache is not None:
+            # Stale-while-revalidate: serve the cached keys and refresh behind.
+            if time.time() >= self._jwks_expires_at:
+                self._schedule_revalidate()
             return self._jwks_cache
 
         async with self._lock:
-            now = time.time()
-            if (
+            if self._jwks_cache is not None and (
                 not force_refresh
-                and self._jwks_cache is not None
-                and now < self._jwks_expires_at
+                or time.time() - self._jwks_fetched_at < self._jwks_min_refresh_interval
             ):
+                # Someone else fetched while we waited, or a forced refresh
+                # (unknown kid) just happened; don't hammer the JWKS endpoint.
                 return self._jwks_cache
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(self._jwks_url)
+            try:
+                response = await get_http_client().get(self._jwks_url)
                 response.raise_for_status()
                 jwks = response.json()
+            except (httpx.HTTPError, ValueError):
+                metrics.JWKS_FETCHES.labels("error").inc()
+                raise
+            metrics.JWKS_FETCHES.labels("ok").inc()
 
             self._jwks_cache = jwks
-            self._jwks_expires_at = time.time() + self._jwks_ttl_seconds
+            self._signing_keys = self._index_signing_keys(jwks)
+            self._jwks_fetched_at = time.time()
+            self._jwks_expires_at = self._jwks_fetched_at + self._jwks_ttl_seconds
             return jwks
 
+    def _schedule_revalidate(self) -> None:
+        if self._revalidate_task is None or self._revalidate_task.done():
+            self._revalidate_task = asyncio.create_task(self._revalidate())
+
+    async def _revalidate(self) -> None:
+        try:
+            await self._get_jwks(force_refresh=True)
+        except (httpx.HTTPError, ValueError):
+            logger.warning("Background JWKS refresh from %s failed", self._jwks_url)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            delay = self._jwks_expires_at - time.time() - self._jwks_refresh_margin
+            # A non-positive delay means the last refresh failed; back off.
+            await asyncio.sleep(delay if delay > 0 else self._jwks_retry_seconds)
+            await self._revalidate()
+
     @staticmethod
-    def _find_signing_key(token: str, jwks: dict[str, Any]) -> dict[str, Any] | None:
+    def _index_signing_keys(jwks: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        return {
+            key["kid"]: {
+                "kty": key.get("kty"),
+                "kid": key.get("kid"),
+                "use": key.get("use"),
+                "n": key.get("n"),
+                "e": key.get("e"),
+            }
+            for key in jwks.get("keys", [])
+            if key.get("kid")
+        }
+
+    def _find_signing_key(self, token: str) -> dict[str, Any] | None:
         try:
             header = jwt.get_unverified_header(token)
         except JWTError:
@@ -93,14 +215,4 @@ class Auth0TokenVerifier:
         kid = header.get("kid")
         if not kid:
             return None
-
-        for key in jwks.get("keys", []):
-            if key.get("kid") == kid:
-                return {
-                    "kty": key.get("kty"),
-                    "kid": key.get("kid"),
-                    "use": key.get("use"),
-                    "n": key.get("n"),
-                    "e": key.get("e"),
-                }
-        return None
+        return self._signing_keys.get(kid)
@@ -0,0 +1,131 @@
+"""
+Process-wide budget for outbound check sockets.
+
+Every proxy check holds one socket (one file descriptor and, towards a
+given proxy, one local port) for its whole run. With a high `max_workers`,
+or several jobs at once, the process can run out of descriptors (EMFILE)
+or ephemeral ports (EADDRNOTAVAIL). At startup the budget reads
+RLIMIT_NOFILE (raising the soft limit to the hard one if allowed) and the
+local port range, and allows as many concurrent check sockets as fit
+under both with headroom. All running checks share it, and the check
+thread pool is sized to match, so `max_workers` is bounded by what the
+host can actually open.
+"""
+
+import asyncio
+import errno
+import logging
+from dataclasses import dataclass
+
+from . import metrics
+
+try:  # Unix only.
+    import resource
+except ImportError:  # pragma: no cover - depends on the platform
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PORT_RANGE_PATH = "/proc/sys/net/ipv4/ip_local_port_range"
+# IANA dynamic range, used where the kernel setting can't be read.
+DEFAULT_PORT_RANGE = (49152, 65535)
+# Descriptors left for the DB pool, HTTP clients, DNS, logs and the server's
+# own listening and client sockets.
+RESERVED_FDS = 256
+MIN_BUDGET = 16
+
+# Errors that mean this host is out of a resource, not that the proxy failed.
+LOCAL_ERRNOS = frozenset(
+    {errno.EMFILE, errno.ENFILE, errno.EADDRNOTAVAIL, errno.ENOBUFS, errno.ENOMEM}
+)
+
+
+@dataclass
+class SocketLimits:
+    nofile_soft: int | None
+    nofile_hard: int | None
+    port_range: tuple[int, int]
+
+    @property
+    def ports(self) -> int:
+        return self.port_range[1] - self.port_range[0] + 1
+
+    def budget(self) -> int:
+        # Half the port range: closed check sockets sit in TIME_WAIT on a
+        # port for a while, and other outbound connections need ports too.
+        budget = self.ports // 2
+        if self.nofile_soft is not None and self.nofile_soft != resource.RLIM_INFINITY:
+            budget = min(budget, self.nofile_soft - RESERVED_FDS)
+        return max(budget, MIN_BUDGET)
+
+
+def discover_limits(raise_nofile: bool = True) -> SocketLimits:
+    soft = hard = None
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if raise_nofile and soft != hard:
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+                soft = hard
+            except (ValueError, OSError):
+                logger.warning("Could not raise RLIMIT_NOFILE from %s to %s", soft, hard)
+
+    port_range = DEFAULT_PORT_RANGE
+    try:
+        with open(PORT_RANGE_PATH, encoding="ascii") as fh:
+            low, high = (int(value) for value in fh.read().split())
+        port_range = (low, high)
+    except (OSError, ValueError):
+        pass
+    return SocketLimits(nofile_soft=soft, nofile_hard=hard, port_range=port_range)
+
+
+class SocketBudget:
+    """Counting semaphore shared by every check in the process."""
+
+    def __init__(self, limit: int, limits: SocketLimits | None = None) -> None:
+        self.limit = limit
+        self.limits = limits
+        self.in_use = 0
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            # Scripts and benchmarks may call asyncio.run() more than once.
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        await self._semaphore.acquire()
+        self.in_use += 1
+        metrics.CHECK_SOCKETS_IN_USE.inc()
+
+    def release(self) -> None:
+        self.in_use -= 1
+        metrics.CHECK_SOCKETS_IN_USE.dec()
+        self._semaphore.release()
+
+
+_budget: SocketBudget | None = None
+
+
+def configure_socket_budget(limit: int | None = None, raise_nofile: bool = True) -> SocketBudget:
+    """Discover the host limits and set the process budget (`limit` overrides it)."""
+    global _budget
+    limits = discover_limits(raise_nofile)
+    _budget = SocketBudget(limit or limits.budget(), limits)
+    metrics.CHECK_SOCKET_BUDGET.set(_budget.limit)
+    logger.info(
+        "Check socket budget %d (RLIMIT_NOFILE %s/%s, local ports %d-%d)",
+        _budget.limit,
+        limits.nofile_soft,
+        limits.nofile_hard,
+        *limits.port_range,
+    )
+    return _budget
+
+
+def get_socket_budget() -> SocketBudget:
+    if _budget is None:
+        return configure_socket_budget()
+    return _budget
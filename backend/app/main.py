@@ -1,20 +1,73 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .api.dependencies import (
+    get_loop_monitor,
+    get_password_crypto,
+    get_proxy_index,
+    get_token_verifier,
+)
+from .api.metrics import router as metrics_router
 from .api.v1.router import api_router
 from .core.config import get_settings
 from .core.database import close_db, init_db
+from .core.http import close_http_client, start_http_client
+from .core.socket_budget import configure_socket_budget
+from .services.cache_pruner import prune_check_cache
+from .services.proxy_index import warm_proxy_index
+from .services.result_reencoder import reencode_legacy_sessions
+from .services.rollup_backfill import backfill_session_rollups
 
 settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    configure_socket_budget(settings.socket_budget, settings.raise_nofile_limit)
+    loop_monitor = get_loop_monitor()
+    if settings.loop_monitor_enabled:
+        await loop_monitor.start()
     await init_db()
+    await start_http_client()
+    token_verifier = get_token_verifier()
+    await token_verifier.start()
+    background: list[asyncio.Task] = []
+    if settings.results_reencode_legacy and settings.results_storage_codec != "json":
+        background.append(
+            asyncio.create_task(
+                reencode_legacy_sessions(get_password_crypto(), settings.results_storage_codec)
+            )
+        )
+    background.append(
+        asyncio.create_task(
+            prune_check_cache(get_password_crypto(), settings.check_cache_prune_interval)
+        )
+    )
+    if settings.rollup_backfill:
+        background.append(
+            asyncio.create_task(
+                backfill_session_rollups(get_password_crypto(), settings.results_storage_codec)
+            )
+        )
+    proxy_index = get_proxy_index()
+    if proxy_index is not None:
+        background.append(
+            asyncio.create_task(
+                warm_proxy_index(proxy_index, get_password_crypto(), settings.results_storage_codec)
+            )
+        )
     yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await token_verifier.stop()
+    await close_http_client()
     await close_db()
+    await loop_monitor.stop()
 
 
 app = FastAPI(
@@ -32,3 +85,5 @@ app.add_middleware(
 )
 
 app.include_router(api_router, prefix=settings.api_prefix)
+if settings.metrics_enabled:
+    app.include_router(metrics_router)
@@ -1 +1,3 @@
+from .check_cache import CheckCacheEntry
 from .session import ProxySession
+from .session_rollup import ProxySessionRollup
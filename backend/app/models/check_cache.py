@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.database import Base
+
+
+class CheckCacheEntry(Base):
+    """Latest check outcome per owner and proxy, reused by `CheckRequest.max_age`."""
+
+    __tablename__ = "proxy_check_cache"
+    __table_args__ = (Index("ix_proxy_check_cache_checked_at", "checked_at"),)
+
+    owner_sub: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # Keyed digest of (check_url, proxy_type, ip, port, user, pass); see
+    # CheckCacheRepository.proxy_key. Credentials are never stored here.
+    proxy_key: Mapped[str] = mapped_column(String(32), primary_key=True)
+    checked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    result: Mapped[dict] = mapped_column(JSON, nullable=False)
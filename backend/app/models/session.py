@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import JSON, DateTime, String
+from sqlalchemy import JSON, DateTime, Index, LargeBinary, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..core.database import Base
@@ -9,6 +9,9 @@ from ..core.database import Base
 
 class ProxySession(Base):
     __tablename__ = "proxy_sessions"
+    __table_args__ = (
+        Index("ix_proxy_sessions_owner_sub_created_at", "owner_sub", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -20,5 +23,8 @@ class ProxySession(Base):
     tags: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     config: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Legacy rows keep results as JSON; new rows store them in `results_blob`
+    # (see services/result_codec.py) and leave `results` empty.
     results: Mapped[list[dict]] = mapped_column(JSON, nullable=False, default=list)
+    results_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
     stats: Mapped[dict] = mapped_column(JSON, nullable=False)
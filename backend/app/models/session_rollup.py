@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.database import Base
+
+
+class ProxySessionRollup(Base):
+    """
+    Per-session aggregates behind the analytics endpoint, written by
+    `SessionRepository.upsert` in the same transaction as the session.
+
+    Each session has one `session` row (key ""), one `tag` row per tag and
+    one `country` row per exit country code, so dashboards aggregate these
+    small rows instead of decoding `results`.
+    """
+
+    __tablename__ = "proxy_session_rollups"
+    __table_args__ = (
+        Index(
+            "ix_proxy_session_rollups_owner_dimension_created_at",
+            "owner_sub",
+            "dimension",
+            "created_at",
+        ),
+    )
+
+    session_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(16), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    owner_sub: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Copied from the session so range filters and time buckets need no join.
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    total: Mapped[int] = mapped_column(Integer, nullable=False)
+    alive: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Sum and count of alive response times, so averages combine across sessions.
+    latency_sum: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    latency_count: Mapped[int] = mapped_column(Integer, nullable=False)
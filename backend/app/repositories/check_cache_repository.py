@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.check_cache import CheckCacheEntry
+from ..services.password_crypto import PasswordCrypto
+
+# Keys per IN (...) lookup and rows per upsert statement; keeps bind
+# parameter counts well below driver limits.
+BATCH_SIZE = 1000
+
+
+class CheckCacheRepository:
+    def __init__(self, db: AsyncSession, password_crypto: PasswordCrypto) -> None:
+        self._db = db
+        self._password_crypto = password_crypto
+
+    def proxy_key(self, check_url: str, proxy_type: str, proxy: dict[str, str]) -> str:
+        return self._password_crypto.fingerprint(
+            "\0".join(
+                (
+                    check_url,
+                    proxy_type,
+                    proxy["ip"],
+                    proxy["port"],
+                    proxy.get("user", ""),
+                    proxy.get("pass", ""),
+                )
+            )
+        )
+
+    async def lookup(self, owner_sub: str, keys: list[str], max_age: int) -> dict[str, dict]:
+        """Return cached results checked within the last `max_age` seconds, by key."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+        found: dict[str, dict] = {}
+        for start in range(0, len(keys), BATCH_SIZE):
+            result = await self._db.execute(
+                select(CheckCacheEntry.proxy_key, CheckCacheEntry.result).where(
+                    CheckCacheEntry.owner_sub == owner_sub,
+                    CheckCacheEntry.proxy_key.in_(keys[start : start + BATCH_SIZE]),
+                    CheckCacheEntry.checked_at >= cutoff,
+                )
+            )
+            found.update((row.proxy_key, row.result) for row in result)
+        return found
+
+    async def store(self, owner_sub: str, entries: dict[str, dict], checked_at: datetime) -> None:
+        """Insert or refresh cache entries keyed by proxy key."""
+        if not entries:
+            return
+        insert = pg_insert if self._db.bind.dialect.name == "postgresql" else sqlite_insert
+        items = list(entries.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            statement = insert(CheckCacheEntry).values(
+                [
+                    {
+                        "owner_sub": owner_sub,
+                        "proxy_key": key,
+                        "checked_at": checked_at,
+                        "result": result,
+                    }
+                    for key, result in items[start : start + BATCH_SIZE]
+                ]
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[CheckCacheEntry.owner_sub, CheckCacheEntry.proxy_key],
+                set_={
+                    "checked_at": statement.excluded.checked_at,
+                    "result": statement.excluded.result,
+                },
+            )
+            await self._db.execute(statement)
+        await self._db.commit()
+
+    async def prune(self, max_age: int) -> int:
+        """Delete entries older than `max_age` seconds; returns how many were removed."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+        result = await self._db.execute(
+            delete(CheckCacheEntry).where(CheckCacheEntry.checked_at < cutoff)
+        )
+        await self._db.commit()
+        return result.rowcount
@@ -1,78 +1,369 @@
+import asyncio
+import base64
+import binascii
+import json
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
+from itertools import islice
 
-from sqlalchemy import desc, select
+from sqlalchemy import String, and_, cast, delete, desc, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core import metrics
 from ..models.session import ProxySession
+from ..models.session_rollup import ProxySessionRollup
 from ..schemas.session import SessionRecord
+from ..services import result_codec
 from ..services.password_crypto import PasswordCrypto
+from ..services.session_rollups import RollupRow, session_rollups
+
+MASKED_PASSWORD = "********"
+
+# Result orderings for `get`: (field, descending). Rows without the field go last.
+RESULT_SORTS = {
+    "latency": ("response_time_ms", False),
+    "throughput": ("throughput_bps", True),
+}
 
 
 class SessionRepository:
-    def __init__(self, db: AsyncSession, password_crypto: PasswordCrypto) -> None:
+    def __init__(
+        self,
+        db: AsyncSession,
+        password_crypto: PasswordCrypto,
+        results_codec: str = "zlib",
+    ) -> None:
         self._db = db
         self._password_crypto = password_crypto
+        self._results_codec = results_codec
 
     async def upsert(self, session: SessionRecord) -> None:
-        existing = await self._db.get(ProxySession, session.id)
-        values = {
-            "owner_sub": session.owner_sub,
-            "name": session.name,
-            "tags": session.tags,
-            "created_at": self._parse_created_at(session.created_at),
-            "config": session.config.model_dump(),
-            "results": self._encrypt_results([result.model_dump() for result in session.results]),
-            "stats": session.stats.model_dump(),
+        with metrics.DB_OPERATION_DURATION.labels("upsert").time():
+            existing = await self._db.get(ProxySession, session.id)
+            rows = [result.as_dict() for result in session.results]
+            rollups, (results, results_blob) = await asyncio.to_thread(
+                lambda: (session_rollups(rows, session.tags), self._prepare_results(rows))
+            )
+            created_at = self._parse_created_at(session.created_at)
+            values = {
+                "owner_sub": session.owner_sub,
+                "name": session.name,
+                "tags": session.tags,
+                "created_at": created_at,
+                "config": session.config.model_dump(),
+                "results": results,
+                "results_blob": results_blob,
+                "stats": session.stats.model_dump(),
+            }
+
+            if existing is None:
+                db_obj = ProxySession(id=session.id, **values)
+                self._db.add(db_obj)
+            else:
+                for field_name, value in values.items():
+                    setattr(existing, field_name, value)
+                await self._db.execute(
+                    delete(ProxySessionRollup).where(ProxySessionRollup.session_id == session.id)
+                )
+            self._add_rollups(session.id, session.owner_sub, created_at, rollups)
+
+            await self._db.commit()
+
+    async def list_summaries(
+        self,
+        owner_sub: str,
+        limit: int = 50,
+        cursor: str | None = None,
+        tag: str | None = None,
+        name: str | None = None,
+    ) -> dict:
+        """
+        Page through a user's sessions, newest first.
+
+        Only summary columns are selected (never `results`/`config`), and the
+        `(owner_sub, created_at)` index serves both the filter and the order.
+        Raises ValueError for a malformed cursor.
+        """
+        query = (
+            select(
+                ProxySession.id,
+                ProxySession.name,
+                ProxySession.tags,
+                ProxySession.created_at,
+                ProxySession.stats,
+            )
+            .where(ProxySession.owner_sub == owner_sub)
+            .order_by(desc(ProxySession.created_at), desc(ProxySession.id))
+            .limit(limit + 1)
+        )
+        if cursor:
+            created_at, session_id = self._decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    ProxySession.created_at < created_at,
+                    and_(ProxySession.created_at == created_at, ProxySession.id < session_id),
+                )
+            )
+        if tag:
+            query = query.where(self._tag_filter(tag))
+        if name:
+            query = query.where(ProxySession.name.ilike(f"%{self._escape_like(name)}%", escape="\\"))
+
+        rows = (await self._db.execute(query)).all()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = self._encode_cursor(last.created_at, last.id)
+
+        return {
+            "items": [
+                {
+                    "id": item.id,
+                    "name": item.name,
+                    "tags": item.tags or [],
+                    "created_at": self._serialize_created_at(item.created_at),
+                    "stats": item.stats or {},
+                }
+                for item in page
+            ],
+            "next_cursor": next_cursor,
         }
 
-        if existing is None:
-            db_obj = ProxySession(id=session.id, **values)
-            self._db.add(db_obj)
+    async def get(
+        self,
+        session_id: str,
+        owner_sub: str,
+        reveal_passwords: bool = False,
+        sort: str | None = None,
+    ) -> dict | None:
+        """
+        Load a session. Passwords are masked unless `reveal_passwords` is set,
+        so ordinary reads never pay for decryption. `sort` orders results by
+        a `RESULT_SORTS` key instead of check completion.
+        """
+        with metrics.DB_OPERATION_DURATION.labels("get").time():
+            result = await self._db.execute(
+                select(ProxySession).where(
+                    ProxySession.id == session_id,
+                    ProxySession.owner_sub == owner_sub,
+                )
+            )
+            session = result.scalar_one_or_none()
+            if session is None:
+                return None
+
+            # Decode in the worker thread too; decompressing a large blob is
+            # the most expensive step of a read.
+            process = self._decrypt_results if reveal_passwords else self._mask_results
+            results = await asyncio.to_thread(
+                lambda: self._sort_results(
+                    process(self._load_results(session.results, session.results_blob)),
+                    sort,
+                )
+            )
+
+            return {
+                "id": session.id,
+                "name": session.name,
+                "tags": session.tags or [],
+                "created_at": self._serialize_created_at(session.created_at),
+                "config": session.config or {},
+                "results": results,
+                "stats": session.stats or {},
+            }
+
+    async def get_passwords(
+        self,
+        session_id: str,
+        owner_sub: str,
+        result_ids: list[str] | None = None,
+    ) -> dict[str, str] | None:
+        """Decrypt passwords for the given result IDs (all results if None)."""
+        result = await self._db.execute(
+            select(ProxySession.results, ProxySession.results_blob).where(
+                ProxySession.id == session_id,
+                ProxySession.owner_sub == owner_sub,
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        results = await asyncio.to_thread(self._load_results, row.results, row.results_blob)
+        if result_ids is not None:
+            wanted = set(result_ids)
+            results = [item for item in results if item.get("id") in wanted]
+        decrypted = await asyncio.to_thread(self._decrypt_results, results)
+        return {item["id"]: item.get("password", "") for item in decrypted if "id" in item}
+
+    async def stream_results(
+        self,
+        session_id: str,
+        owner_sub: str,
+        reveal_passwords: bool = False,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[list[dict]] | None:
+        """
+        Load only the stored results of a session and return an iterator of
+        result chunks, or None if the session does not exist.
+
+        The row is read up front so the DB session is not held while the
+        caller streams; rows are then built, masked or decrypted
+        `chunk_size` at a time in a worker thread.
+        """
+        result = await self._db.execute(
+            select(ProxySession.results, ProxySession.results_blob).where(
+                ProxySession.id == session_id,
+                ProxySession.owner_sub == owner_sub,
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        if row.results_blob:
+            rows = await asyncio.to_thread(result_codec.iter_results, row.results_blob)
         else:
-            for field_name, value in values.items():
-                setattr(existing, field_name, value)
+            rows = iter(row.results or [])
+        return self._iter_chunks(rows, reveal_passwords, chunk_size)
 
-        await self._db.commit()
+    async def iter_recent_results(
+        self,
+        since: datetime,
+    ) -> AsyncIterator[tuple[str, str, datetime, list[dict]]]:
+        """
+        Yield `(owner_sub, session_id, created_at, results)` for sessions
+        created since `since`, oldest first. Passwords are decrypted for
+        alive results only; the others keep their stored value.
+        """
+        result = await self._db.execute(
+            select(ProxySession.id, ProxySession.owner_sub, ProxySession.created_at)
+            .where(ProxySession.created_at >= since)
+            .order_by(ProxySession.created_at, ProxySession.id)
+        )
+        for row in result.all():
+            loaded = await self._db.execute(
+                select(ProxySession.results, ProxySession.results_blob).where(
+                    ProxySession.id == row.id
+                )
+            )
+            stored = loaded.one_or_none()
+            if stored is None:
+                continue
+            results = await asyncio.to_thread(self._load_alive_results, stored.results, stored.results_blob)
+            yield row.owner_sub, row.id, row.created_at, results
+
+    async def reencode_legacy(self, batch_size: int = 50) -> int:
+        """
+        Move up to `batch_size` sessions stored as plain JSON into the compact
+        format; returns how many were converted (0 once nothing is left).
+        """
+        if self._results_codec == "json":
+            return 0
 
-    async def list_summaries(self, owner_sub: str) -> list[dict]:
         result = await self._db.execute(
-            select(ProxySession)
-            .where(ProxySession.owner_sub == owner_sub)
-            .order_by(desc(ProxySession.created_at))
+            select(ProxySession).where(ProxySession.results_blob.is_(None)).limit(batch_size)
         )
         sessions = result.scalars().all()
+        for session in sessions:
+            session.results_blob = await asyncio.to_thread(
+                result_codec.encode_results,
+                session.results or [],
+                self._results_codec,
+            )
+            session.results = []
+        await self._db.commit()
+        return len(sessions)
 
+    async def aggregate(
+        self,
+        owner_sub: str,
+        dimension: str,
+        interval: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        key: str | None = None,
+    ) -> list[dict]:
+        """
+        Sum a user's session rollups per `dimension` key, optionally per
+        `interval` ("day", "week" or "month", UTC) of session creation time.
+
+        Only `proxy_session_rollups` is read, through its
+        `(owner_sub, dimension, created_at)` index; results are never loaded.
+        """
+        bucket = self._time_bucket(interval) if interval else None
+        columns = [ProxySessionRollup.key] if bucket is None else [bucket, ProxySessionRollup.key]
+        # Group by the label: PostgreSQL would see the repeated expression's
+        # bound format strings as different parameters.
+        group_by = [ProxySessionRollup.key] if bucket is None else ["bucket", ProxySessionRollup.key]
+        query = (
+            select(
+                *columns,
+                func.count().label("sessions"),
+                func.sum(ProxySessionRollup.total).label("total"),
+                func.sum(ProxySessionRollup.alive).label("alive"),
+                func.sum(ProxySessionRollup.latency_sum).label("latency_sum"),
+                func.sum(ProxySessionRollup.latency_count).label("latency_count"),
+            )
+            .where(
+                ProxySessionRollup.owner_sub == owner_sub,
+                ProxySessionRollup.dimension == dimension,
+            )
+            .group_by(*group_by)
+            .order_by(*group_by)
+        )
+        if since is not None:
+            query = query.where(ProxySessionRollup.created_at >= since)
+        if until is not None:
+            query = query.where(ProxySessionRollup.created_at < until)
+        if key is not None:
+            query = query.where(ProxySessionRollup.key == key)
+
+        with metrics.DB_OPERATION_DURATION.labels("aggregate").time():
+            rows = (await self._db.execute(query)).all()
         return [
             {
-                "id": item.id,
-                "name": item.name,
-                "tags": item.tags or [],
-                "created_at": self._serialize_created_at(item.created_at),
-                "stats": item.stats or {},
+                "bucket": str(row.bucket) if bucket is not None else None,
+                "key": row.key,
+                "sessions": row.sessions,
+                "total": row.total,
+                "alive": row.alive,
+                "alive_ratio": round(row.alive / row.total, 4) if row.total else None,
+                "avg_latency": round(row.latency_sum / row.latency_count) if row.latency_count else None,
             }
-            for item in sessions
+            for row in rows
         ]
 
-    async def get(self, session_id: str, owner_sub: str) -> dict | None:
+    async def backfill_rollups(self, batch_size: int = 50) -> int:
+        """
+        Write rollups for up to `batch_size` sessions saved before rollups
+        existed; returns how many were done (0 once nothing is left).
+        """
         result = await self._db.execute(
-            select(ProxySession).where(
-                ProxySession.id == session_id,
-                ProxySession.owner_sub == owner_sub,
+            select(
+                ProxySession.id,
+                ProxySession.owner_sub,
+                ProxySession.tags,
+                ProxySession.created_at,
+                ProxySession.results,
+                ProxySession.results_blob,
             )
+            .where(~exists().where(ProxySessionRollup.session_id == ProxySession.id))
+            .limit(batch_size)
         )
-        session = result.scalar_one_or_none()
-        if session is None:
-            return None
-
-        return {
-            "id": session.id,
-            "name": session.name,
-            "tags": session.tags or [],
-            "created_at": self._serialize_created_at(session.created_at),
-            "config": session.config or {},
-            "results": self._decrypt_results(session.results or []),
-            "stats": session.stats or {},
-        }
+        sessions = result.all()
+        for session in sessions:
+            rollups = await asyncio.to_thread(
+                lambda: session_rollups(
+                    self._load_results(session.results, session.results_blob),
+                    session.tags or [],
+                )
+            )
+            self._add_rollups(session.id, session.owner_sub, session.created_at, rollups)
+        await self._db.commit()
+        return len(sessions)
 
     async def delete(self, session_id: str, owner_sub: str) -> bool:
         result = await self._db.execute(
@@ -86,9 +377,89 @@ class SessionRepository:
             return False
 
         await self._db.delete(session)
+        await self._db.execute(
+            delete(ProxySessionRollup).where(ProxySessionRollup.session_id == session_id)
+        )
         await self._db.commit()
         return True
 
+    def _add_rollups(
+        self,
+        session_id: str,
+        owner_sub: str,
+        created_at: datetime,
+        rollups: list[RollupRow],
+    ) -> None:
+        self._db.add_all(
+            ProxySessionRollup(
+                session_id=session_id,
+                owner_sub=owner_sub,
+                created_at=created_at,
+                dimension=dimension,
+                key=key,
+                total=total,
+                alive=alive,
+                latency_sum=latency_sum,
+                latency_count=latency_count,
+            )
+            for dimension, key, total, alive, latency_sum, latency_count in rollups
+        )
+
+    def _time_bucket(self, interval: str):
+        """Start date (YYYY-MM-DD, UTC) of the `interval` holding each rollup; weeks start on Monday."""
+        column = ProxySessionRollup.created_at
+        if self._db.bind.dialect.name == "postgresql":
+            return func.to_char(
+                func.date_trunc(interval, func.timezone("UTC", column)),
+                "YYYY-MM-DD",
+            ).label("bucket")
+        # SQLite stores UTC timestamps as text.
+        if interval == "month":
+            return func.strftime("%Y-%m-01", column).label("bucket")
+        if interval == "week":
+            return func.date(column, "weekday 0", "-6 days").label("bucket")
+        return func.date(column).label("bucket")
+
+    async def _iter_chunks(
+        self,
+        rows: Iterator[dict],
+        reveal_passwords: bool,
+        chunk_size: int,
+    ) -> AsyncIterator[list[dict]]:
+        process = self._decrypt_results if reveal_passwords else self._mask_results
+        while True:
+            chunk = await asyncio.to_thread(
+                lambda: process(list(islice(rows, chunk_size)))
+            )
+            if not chunk:
+                return
+            yield chunk
+
+    def _tag_filter(self, tag: str):
+        if self._db.bind.dialect.name == "postgresql":
+            return cast(ProxySession.tags, JSONB).contains([tag])
+        # Portable fallback: match the JSON-encoded element in the serialized list.
+        needle = self._escape_like(json.dumps(tag))
+        return cast(ProxySession.tags, String).like(f"%{needle}%", escape="\\")
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @staticmethod
+    def _encode_cursor(created_at: datetime, session_id: str) -> str:
+        raw = f"{created_at.isoformat()}|{session_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            created_at, session_id = raw.split("|", 1)
+            return datetime.fromisoformat(created_at), session_id
+        except (binascii.Error, UnicodeError, ValueError) as exc:
+            raise ValueError("Invalid cursor") from exc
+
     @staticmethod
     def _parse_created_at(value: str) -> datetime:
         return datetime.fromisoformat(value)
@@ -97,24 +468,56 @@ class SessionRepository:
     def _serialize_created_at(value: datetime) -> str:
         return value.isoformat()
 
+    # The helpers below run in a worker thread and update the (freshly built)
+    # result dicts in place instead of copying them.
+    def _prepare_results(self, results: list[dict]) -> tuple[list[dict], bytes | None]:
+        """Encrypt passwords and encode for storage as (results, results_blob)."""
+        self._encrypt_results(results)
+        if self._results_codec == "json":
+            return results, None
+        return [], result_codec.encode_results(results, self._results_codec)
+
+    @staticmethod
+    def _load_results(results: list[dict] | None, results_blob: bytes | None) -> list[dict]:
+        if results_blob:
+            return result_codec.decode_results(results_blob)
+        return results or []
+
+    def _load_alive_results(self, results: list[dict] | None, results_blob: bytes | None) -> list[dict]:
+        rows = self._load_results(results, results_blob)
+        self._decrypt_results([item for item in rows if item.get("status") == "OK"])
+        return rows
+
     def _encrypt_results(self, results: list[dict]) -> list[dict]:
-        encrypted_results: list[dict] = []
-        for result in results:
-            item = dict(result)
-            password = item.get("password")
-            if isinstance(password, str):
-                item["password"] = self._password_crypto.encrypt(password)
-            encrypted_results.append(item)
-        return encrypted_results
+        items = [item for item in results if isinstance(item.get("password"), str)]
+        encrypted = self._password_crypto.encrypt_many(item["password"] for item in items)
+        for item, password in zip(items, encrypted):
+            item["password"] = password
+        return results
+
+    @staticmethod
+    def _mask_results(results: list[dict]) -> list[dict]:
+        for item in results:
+            legacy_password = item.pop("pass", None)
+            password = item.get("password", legacy_password)
+            item["password"] = MASKED_PASSWORD if password else ""
+        return results
+
+    @staticmethod
+    def _sort_results(results: list[dict], sort: str | None) -> list[dict]:
+        if sort is None:
+            return results
+        field, descending = RESULT_SORTS[sort]
+        measured = [item for item in results if item.get(field) is not None]
+        measured.sort(key=lambda item: item[field], reverse=descending)
+        return measured + [item for item in results if item.get(field) is None]
 
     def _decrypt_results(self, results: list[dict]) -> list[dict]:
-        decrypted_results: list[dict] = []
-        for result in results:
-            item = dict(result)
+        for item in results:
             if "password" not in item and isinstance(item.get("pass"), str):
-                item["password"] = item.get("pass", "")
-            password = item.get("password")
-            if isinstance(password, str):
-                item["password"] = self._password_crypto.decrypt(password)
-            decrypted_results.append(item)
-        return decrypted_results
+                item["password"] = item["pass"]
+        items = [item for item in results if isinstance(item.get("password"), str)]
+        decrypted = self._password_crypto.decrypt_many(item["password"] for item in items)
+        for item, password in zip(items, decrypted):
+            item["password"] = password
+        return results
@@ -2,6 +2,9 @@ from typing import Literal
 
 from pydantic import BaseModel, Field
 
+# Largest `CheckRequest.max_age`; older check cache entries are pruned.
+MAX_CACHE_AGE = 7 * 24 * 3600
+
 
 class CheckRequest(BaseModel):
     proxies: str
@@ -13,6 +16,26 @@ class CheckRequest(BaseModel):
     proxy_type: Literal["http", "socks5"] = "http"
     delimiter: str = ":"
     field_order: str = "ip:port:user:pass"
+    # Reuse this user's results for the same proxy, check_url and proxy_type
+    # if they are at most `max_age` seconds old. None always re-checks.
+    max_age: int | None = Field(default=None, ge=1, le=MAX_CACHE_AGE)
+    # Second stage for alive proxies: download up to `bandwidth_bytes` from
+    # `bandwidth_url` (default: the BANDWIDTH_URL setting; `{bytes}` is
+    # replaced by the size) and record throughput and time to first byte.
+    measure_bandwidth: bool = False
+    bandwidth_url: str | None = None
+    bandwidth_bytes: int = Field(default=1_000_000, ge=1024, le=50_000_000)
+    bandwidth_workers: int = Field(default=5, ge=1, le=50)
+
+
+class WorkerChunk(BaseModel):
+    """A slice of a check job sent by the coordinator to a worker node."""
+
+    check_url: str
+    timeout: int = Field(ge=1, le=60)
+    max_workers: int = Field(ge=1, le=200)
+    proxy_type: Literal["http", "socks5"]
+    proxies: list[dict[str, str]]
 
 
 class SessionConfig(BaseModel):
@@ -22,3 +45,7 @@ class SessionConfig(BaseModel):
     proxy_type: str
     delimiter: str
     field_order: str
+    max_age: int | None = None
+    measure_bandwidth: bool = False
+    bandwidth_url: str | None = None
+    bandwidth_bytes: int | None = None
@@ -1,3 +1,6 @@
+import uuid
+from dataclasses import dataclass, field
+
 from pydantic import BaseModel, Field
 
 from .check import SessionConfig
@@ -9,21 +12,52 @@ class SessionStats(BaseModel):
     dead: int
     avg_latency: int | None
     countries: dict[str, int] = Field(default_factory=dict)
+    # p50/p90/p99 in ms per phase ("total", "dns", "connect", ...) of alive proxies.
+    percentiles: dict[str, dict[str, int | None]] = Field(default_factory=dict)
 
 
-class ProxyResult(BaseModel):
-    id: str
+@dataclass(slots=True)
+class ProxyResult:
+    """
+    One check result, carried as-is from the checker to SSE and storage.
+
+    A slotted dataclass rather than a pydantic model: pydantic accepts
+    instances in `SessionRecord.results` without copying them, and
+    `as_dict` is the only serialization step on the hot path.
+    """
+
     proxy_ip: str
     proxy_port: str
-    user: str
+    user: str = ""
     password: str = ""
-    status: str
-    exit_ip: str
-    response_time_ms: int | None
-    error: str
+    status: str = "FAIL"
+    exit_ip: str = ""
+    response_time_ms: int | None = None
+    error: str = ""
     country: str = ""
     country_code: str = ""
     city: str = ""
+    # Per-phase timings in ms; None when the phase did not run (no TLS for
+    # http:// judges, no handshake for plain HTTP through an HTTP proxy).
+    dns_ms: int | None = None
+    connect_ms: int | None = None
+    handshake_ms: int | None = None
+    tls_ms: int | None = None
+    ttfb_ms: int | None = None
+    body_ms: int | None = None
+    # Set by the optional bandwidth stage: body bytes/s after the first
+    # byte, and time to first byte of the download.
+    throughput_bps: int | None = None
+    throughput_ttfb_ms: int | None = None
+    throughput_error: str = ""
+    cached: bool = False
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in _PROXY_RESULT_FIELDS}
+
+
+_PROXY_RESULT_FIELDS = ProxyResult.__slots__
 
 
 class SessionRecord(BaseModel):
@@ -35,3 +69,7 @@ class SessionRecord(BaseModel):
     config: SessionConfig
     results: list[ProxyResult]
     stats: SessionStats
+
+
+class PasswordRevealRequest(BaseModel):
+    result_ids: list[str] | None = None
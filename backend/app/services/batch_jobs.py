@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core.database import SessionLocal
+from ..repositories.session_repository import SessionRepository
+from .password_crypto import PasswordCrypto
+
+logger = logging.getLogger(__name__)
+
+
+async def run_in_batches(
+    step: Callable[[SessionRepository], Awaitable[int]],
+    description: str,
+    password_crypto: PasswordCrypto,
+    results_codec: str,
+    pause_seconds: float = 0.5,
+) -> int:
+    """
+    Call `step` with a fresh repository until it reports no more work,
+    pausing between batches so request traffic keeps priority.
+
+    `step` returns how many sessions it handled. A database error stops the
+    run; whatever is left is picked up on the next startup. Returns the
+    total handled.
+    """
+    total = 0
+    while True:
+        try:
+            async with SessionLocal() as db:
+                repository = SessionRepository(
+                    db=db,
+                    password_crypto=password_crypto,
+                    results_codec=results_codec,
+                )
+                done = await step(repository)
+        except SQLAlchemyError:
+            logger.exception("%s failed; will retry on next startup", description)
+            break
+        if not done:
+            break
+        total += done
+        await asyncio.sleep(pause_seconds)
+    return total
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core.database import SessionLocal
+from ..repositories.check_cache_repository import CheckCacheRepository
+from ..schemas.check import MAX_CACHE_AGE
+from .password_crypto import PasswordCrypto
+
+logger = logging.getLogger(__name__)
+
+
+async def prune_check_cache(password_crypto: PasswordCrypto, interval: float = 3600) -> None:
+    """
+    Delete check cache entries too old for any `max_age` to reuse, now and
+    then every `interval` seconds until cancelled.
+    """
+    while True:
+        try:
+            async with SessionLocal() as db:
+                repository = CheckCacheRepository(db=db, password_crypto=password_crypto)
+                removed = await repository.prune(MAX_CACHE_AGE)
+        except SQLAlchemyError:
+            logger.exception("Pruning the check result cache failed; retrying later")
+        else:
+            if removed:
+                logger.info("Pruned %d expired check cache entries", removed)
+        await asyncio.sleep(interval)
@@ -0,0 +1,172 @@
+"""
+Spread one check job over several worker nodes.
+
+A worker is another instance of this app with `WORKER_TOKEN` set; it
+accepts chunks on `POST /api/worker/check` and streams back one NDJSON
+line per result as each check finishes. The coordinator splits the
+pending proxies into chunks and keeps a small number of chunks in flight
+per worker; the coordinator itself can take chunks too. Results from all
+nodes are merged into one `(index, result)` stream, so `CheckService`
+builds the SSE stream and session record exactly as for a local run.
+
+A worker that fails (connection error, non-200, bad line) is dropped for
+the rest of the job and the unanswered part of its chunk goes back on the
+queue. Whatever is left once every worker has dropped out is checked
+locally, so a job never loses proxies to a dead node.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from contextlib import aclosing, suppress
+
+import httpx
+
+from ..core import metrics
+from ..core.http import get_http_client
+from ..schemas.check import CheckRequest
+from ..schemas.session import ProxyResult
+from .check_service import check_proxies
+
+logger = logging.getLogger(__name__)
+
+WORKER_CHECK_PATH = "/api/worker/check"
+
+_DONE = object()
+
+
+class CheckCoordinator:
+    def __init__(
+        self,
+        workers: Sequence[str],
+        token: str,
+        chunk_size: int = 500,
+        chunks_per_worker: int = 2,
+        local_checks: bool = True,
+    ) -> None:
+        self.workers = [url.rstrip("/") for url in workers]
+        self.chunk_size = chunk_size
+        self.chunks_per_worker = chunks_per_worker
+        self.local_checks = local_checks
+        self._headers = {"Authorization": f"Bearer {token}"}
+
+    async def check(
+        self,
+        proxies: Sequence[dict[str, str]],
+        request: CheckRequest,
+    ) -> AsyncIterator[tuple[int, ProxyResult]]:
+        """Check `proxies` across the workers, yielding `(index, result)` as results arrive."""
+        chunks: deque[list[int]] = deque(
+            list(range(start, min(start + self.chunk_size, len(proxies))))
+            for start in range(0, len(proxies), self.chunk_size)
+        )
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def run_local() -> None:
+            while chunks:
+                chunk = chunks.popleft()
+                stream = check_proxies(
+                    [proxies[index] for index in chunk],
+                    request.check_url,
+                    request.timeout,
+                    request.proxy_type,
+                    request.max_workers,
+                )
+                async with aclosing(stream):
+                    async for position, result in stream:
+                        results.put_nowait((chunk[position], result))
+
+        async def run_remote(url: str, failed: set[str]) -> None:
+            while chunks and url not in failed:
+                chunk = chunks.popleft()
+                answered: set[int] = set()
+                try:
+                    async with aclosing(self._check_remote(url, proxies, chunk, request)) as stream:
+                        async for position, result in stream:
+                            if position in answered:
+                                continue
+                            answered.add(position)
+                            results.put_nowait((chunk[position], result))
+                    if len(answered) < len(chunk):
+                        raise ValueError(f"worker answered {len(answered)} of {len(chunk)} proxies")
+                except (httpx.HTTPError, ValueError, KeyError, TypeError) as exc:
+                    metrics.WORKER_CHUNKS.labels("error").inc()
+                    missing = [index for position, index in enumerate(chunk) if position not in answered]
+                    if missing:
+                        chunks.appendleft(missing)
+                    if url not in failed:
+                        failed.add(url)
+                        logger.warning(
+                            "Check worker %s failed, requeued %d proxies: %s",
+                            url,
+                            len(missing),
+                            str(exc) or type(exc).__name__,
+                        )
+                    return
+                metrics.WORKER_CHUNKS.labels("ok").inc()
+
+        async def supervise() -> None:
+            try:
+                failed: set[str] = set()
+                runners = [
+                    run_remote(url, failed)
+                    for url in self.workers
+                    for _ in range(self.chunks_per_worker)
+                ]
+                if self.local_checks:
+                    runners.append(run_local())
+                await asyncio.gather(*runners)
+                # Every worker dropped out with chunks still queued.
+                await run_local()
+            finally:
+                results.put_nowait(_DONE)
+
+        supervisor = asyncio.create_task(supervise())
+        try:
+            while (item := await results.get()) is not _DONE:
+                yield item
+            await supervisor
+        finally:
+            if not supervisor.done():
+                supervisor.cancel()
+                with suppress(asyncio.CancelledError):
+                    await supervisor
+
+    async def _check_remote(
+        self,
+        url: str,
+        proxies: Sequence[dict[str, str]],
+        chunk: list[int],
+        request: CheckRequest,
+    ) -> AsyncIterator[tuple[int, ProxyResult]]:
+        payload = {
+            "check_url": request.check_url,
+            "timeout": request.timeout,
+            "max_workers": request.max_workers,
+            "proxy_type": request.proxy_type,
+            "proxies": [proxies[index] for index in chunk],
+        }
+        # Results stream in as checks finish, so a silence longer than one
+        # check can take (every phase timing out) means the worker is stuck.
+        timeout = httpx.Timeout(10.0, read=request.timeout * 6 + 10)
+        async with get_http_client().stream(
+            "POST",
+            url + WORKER_CHECK_PATH,
+            json=payload,
+            headers=self._headers,
+            timeout=timeout,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                position = data["index"]
+                if not 0 <= position < len(chunk):
+                    raise ValueError(f"result index {position} outside chunk")
+                fields = data["result"]
+                yield position, ProxyResult(
+                    **{name: fields[name] for name in ProxyResult.__slots__ if name in fields}
+                )
@@ -1,15 +1,54 @@
 import asyncio
 import json
+import logging
+import time
 import uuid
 from collections import Counter
+from collections.abc import AsyncIterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import AsyncGenerator
+from typing import TYPE_CHECKING, AsyncGenerator
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core import metrics
+from ..core.dns import get_dns_cache
+from ..core.security import sign_judge_url
+from ..core.socket_budget import get_socket_budget
+from ..repositories.check_cache_repository import CheckCacheRepository
 from ..repositories.session_repository import SessionRepository
 from ..schemas.check import CheckRequest, SessionConfig
 from ..schemas.session import ProxyResult, SessionRecord, SessionStats
+from .check_stats import PhaseStats
 from .geoip_service import GeoIPService
-from .proxy_service import check_proxy_sync, parse_proxy
+from .proxy_service import (
+    LOCAL_ERROR_PREFIX,
+    LocalResourceError,
+    check_proxy_sync,
+    measure_throughput_sync,
+    prepare_proxies,
+)
+
+if TYPE_CHECKING:
+    from .check_coordinator import CheckCoordinator
+    from .proxy_index import ProxyIndex
+
+logger = logging.getLogger(__name__)
+
+# Result fields kept in the cross-session cache; identity and credentials
+# always come from the current request.
+CACHED_FIELDS = ("status", "exit_ip", "response_time_ms", "error", "country", "country_code", "city")
+
+# Attempts after a local resource error (EMFILE, EADDRNOTAVAIL, ...), with
+# exponential backoff from LOCAL_RETRY_DELAY seconds.
+LOCAL_RETRIES = 3
+LOCAL_RETRY_DELAY = 0.25
+
+# Checks block a thread on socket I/O for their whole run, so they get a
+# pool sized to the socket budget rather than sharing the small default
+# executor (min(32, CPUs + 4) threads) with database and codec work.
+MAX_CHECK_THREADS = 512
+_check_executor: ThreadPoolExecutor | None = None
 
 
 def sse_event(event: str, data: dict | str) -> str:
@@ -17,14 +56,204 @@ def sse_event(event: str, data: dict | str) -> str:
     return f"event: {event}\ndata: {payload}\n\n"
 
 
+def _get_check_executor() -> ThreadPoolExecutor:
+    global _check_executor
+    if _check_executor is None:
+        _check_executor = ThreadPoolExecutor(
+            max_workers=min(get_socket_budget().limit, MAX_CHECK_THREADS),
+            thread_name_prefix="check",
+        )
+    return _check_executor
+
+
+metrics.track_executor("check", lambda: _check_executor)
+
+
+async def check_proxies(
+    proxies: Sequence[dict[str, str]],
+    check_url: str,
+    timeout: int,
+    proxy_type: str,
+    max_workers: int,
+) -> AsyncIterator[tuple[int, ProxyResult]]:
+    """
+    Check `proxies` on the check thread pool, yielding `(index, result)` as
+    each finishes. At most `max_workers` run at once for this call, and at
+    most the socket budget across all calls in the process.
+    """
+    semaphore = asyncio.Semaphore(min(max_workers, max(len(proxies), 1)))
+    dns_cache = get_dns_cache()
+    budget = get_socket_budget()
+    executor = _get_check_executor()
+    loop = asyncio.get_running_loop()
+
+    async def run_single(index: int, proxy: dict[str, str]) -> tuple[int, ProxyResult]:
+        metrics.CHECKS_QUEUED.inc()
+        try:
+            await semaphore.acquire()
+        finally:
+            metrics.CHECKS_QUEUED.dec()
+
+        metrics.CHECKS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            # Resolve on the loop through the shared cache; the thread only
+            # does the socket work.
+            try:
+                addresses = await dns_cache.resolve(proxy["ip"], int(proxy["port"]))
+            except (OSError, ValueError) as exc:
+                addresses = exc
+            dns_seconds = time.perf_counter() - start
+
+            for attempt in range(LOCAL_RETRIES + 1):
+                if attempt:
+                    await asyncio.sleep(LOCAL_RETRY_DELAY * 2 ** (attempt - 1))
+                await budget.acquire()
+                try:
+                    result = await loop.run_in_executor(
+                        executor,
+                        check_proxy_sync,
+                        proxy,
+                        check_url,
+                        timeout,
+                        proxy_type,
+                        addresses,
+                        dns_seconds,
+                    )
+                    break
+                except LocalResourceError as exc:
+                    metrics.CHECK_LOCAL_ERRORS.inc()
+                    local_error = exc
+                finally:
+                    budget.release()
+            else:
+                logger.warning(
+                    "Check of %s:%s failed locally after %d retries: %s",
+                    proxy["ip"],
+                    proxy["port"],
+                    LOCAL_RETRIES,
+                    local_error,
+                )
+                result = ProxyResult(
+                    proxy_ip=proxy["ip"],
+                    proxy_port=proxy["port"],
+                    user=proxy.get("user", ""),
+                    password=proxy.get("pass", proxy.get("password", "")),
+                    error=f"{LOCAL_ERROR_PREFIX}{local_error}"[:200],
+                )
+        finally:
+            metrics.CHECKS_IN_FLIGHT.dec()
+            semaphore.release()
+        metrics.CHECK_DURATION.labels(result.status.lower()).observe(time.perf_counter() - start)
+        return index, result
+
+    tasks = [asyncio.create_task(run_single(index, proxy)) for index, proxy in enumerate(proxies)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def measure_throughputs(
+    results: Sequence[ProxyResult],
+    url: str,
+    timeout: int,
+    proxy_type: str,
+    max_bytes: int,
+    max_workers: int,
+) -> AsyncIterator[ProxyResult]:
+    """
+    Measure download throughput through each of `results` (alive proxies),
+    at most `max_workers` at a time, and yield each result once its
+    `throughput_*` fields are set. Downloads share the check socket budget
+    and thread pool.
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+    dns_cache = get_dns_cache()
+    budget = get_socket_budget()
+    executor = _get_check_executor()
+    loop = asyncio.get_running_loop()
+
+    async def run_single(result: ProxyResult) -> ProxyResult:
+        proxy = {
+            "ip": result.proxy_ip,
+            "port": result.proxy_port,
+            "user": result.user,
+            "pass": result.password,
+        }
+        result.throughput_bps = result.throughput_ttfb_ms = None
+        result.throughput_error = ""
+        async with semaphore:
+            try:
+                addresses = await dns_cache.resolve(result.proxy_ip, int(result.proxy_port))
+            except (OSError, ValueError) as exc:
+                addresses = exc
+            await budget.acquire()
+            try:
+                result.throughput_bps, result.throughput_ttfb_ms = await loop.run_in_executor(
+                    executor,
+                    measure_throughput_sync,
+                    proxy,
+                    url,
+                    timeout,
+                    proxy_type,
+                    max_bytes,
+                    addresses,
+                )
+            except LocalResourceError as exc:
+                result.throughput_error = f"{LOCAL_ERROR_PREFIX}{exc}"[:200]
+            except Exception as exc:  # pragma: no cover - network/runtime dependent
+                result.throughput_error = (str(exc) or type(exc).__name__)[:200]
+            finally:
+                budget.release()
+
+        if result.throughput_bps is not None:
+            metrics.THROUGHPUT_MEASUREMENTS.labels("ok").inc()
+            metrics.THROUGHPUT.observe(result.throughput_bps)
+        else:
+            metrics.THROUGHPUT_MEASUREMENTS.labels("fail").inc()
+        return result
+
+    tasks = [asyncio.create_task(run_single(result)) for result in results]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
 class CheckService:
     def __init__(
         self,
         session_repository: SessionRepository,
         geoip_service: GeoIPService,
+        cache_repository: CheckCacheRepository | None = None,
+        cache_always_store: bool = False,
+        coordinator: "CheckCoordinator | None" = None,
+        proxy_index: "ProxyIndex | None" = None,
+        bandwidth_url: str = "",
+        judge_token: str = "",
     ) -> None:
         self._session_repository = session_repository
         self._geoip_service = geoip_service
+        self._cache_repository = cache_repository
+        self._cache_always_store = cache_always_store
+        self._coordinator = coordinator
+        self._proxy_index = proxy_index
+        self._bandwidth_url = bandwidth_url
+        self._judge_token = judge_token
+
+    def bandwidth_url(self, request: CheckRequest) -> str | None:
+        """Download URL for the request's bandwidth stage, or None if there is none."""
+        url = request.bandwidth_url or self._bandwidth_url
+        if not url:
+            return None
+        return url.replace("{bytes}", str(request.bandwidth_bytes))
 
     async def stream_check_events(
         self,
@@ -33,16 +262,52 @@ class CheckService:
     ) -> AsyncGenerator[str, None]:
         field_order = [field.strip() for field in request.field_order.split(":") if field.strip()]
 
-        proxy_list: list[dict[str, str]] = []
-        for line in request.proxies.strip().splitlines():
-            proxy = parse_proxy(line, request.delimiter, field_order)
-            if proxy is not None:
-                proxy_list.append(proxy)
+        proxy_list, list_stats = prepare_proxies(
+            request.proxies.splitlines(),
+            request.delimiter,
+            field_order,
+        )
 
         total = len(proxy_list)
         session_id = str(uuid.uuid4())
+        checked_at = datetime.now(timezone.utc)
 
-        yield sse_event("start", {"total": total, "session_id": session_id})
+        # The cache is only read for requests with max_age and only written
+        # for those, unless CHECK_CACHE_ALWAYS_STORE prepares it for later ones.
+        use_cache = self._cache_repository is not None and bool(
+            request.max_age or self._cache_always_store
+        )
+        cache_keys: list[str | None] = [None] * total
+        cached_results: dict[str, dict] = {}
+        if use_cache and total:
+            cache_keys = [
+                self._cache_repository.proxy_key(request.check_url, request.proxy_type, proxy)
+                for proxy in proxy_list
+            ]
+            if request.max_age:
+                cached_results = await self._cache_repository.lookup(
+                    owner_sub,
+                    cache_keys,
+                    request.max_age,
+                )
+
+        pending = [
+            (proxy, key)
+            for proxy, key in zip(proxy_list, cache_keys)
+            if key not in cached_results
+        ]
+
+        yield sse_event(
+            "start",
+            {
+                "total": total,
+                "session_id": session_id,
+                "lines": list_stats.lines,
+                "invalid": list_stats.invalid,
+                "duplicates": list_stats.duplicates,
+                "cached": total - len(pending),
+            },
+        )
 
         if total == 0:
             yield sse_event(
@@ -61,66 +326,109 @@ class CheckService:
         alive = 0
         dead = 0
         latencies: list[int] = []
-        all_results: list[dict] = []
-        semaphore = asyncio.Semaphore(min(request.max_workers, total))
+        phase_stats = PhaseStats()
+        all_results: list[ProxyResult] = []
+        fresh_results: list[tuple[str | None, ProxyResult]] = []
 
-        async def run_single(proxy: dict[str, str]) -> dict:
-            async with semaphore:
-                return await asyncio.to_thread(
-                    check_proxy_sync,
-                    proxy,
-                    request.check_url,
-                    request.timeout,
-                    request.proxy_type,
-                )
+        def record(result: ProxyResult) -> str:
+            nonlocal completed, alive, dead
+            completed += 1
+
+            if result.status == "OK":
+                alive += 1
+                if result.response_time_ms is not None:
+                    latencies.append(result.response_time_ms)
+                phase_stats.add(result)
+            else:
+                dead += 1
+            metrics.CHECKS_TOTAL.labels(
+                "cached" if result.cached else result.status.lower()
+            ).inc()
+
+            all_results.append(result)
+            payload = result.as_dict()
+            payload["_progress"] = {"completed": completed, "total": total}
+            return sse_event("result", payload)
 
-        tasks = [asyncio.create_task(run_single(proxy)) for proxy in proxy_list]
+        for proxy, key in zip(proxy_list, cache_keys):
+            cached = cached_results.get(key) if key is not None else None
+            if cached is not None:
+                yield record(self._cached_result(proxy, cached))
 
+        to_check = [proxy for proxy, _ in pending]
+        if self._coordinator is not None:
+            checks = self._coordinator.check(to_check, request)
+        else:
+            checks = check_proxies(
+                to_check,
+                request.check_url,
+                request.timeout,
+                request.proxy_type,
+                request.max_workers,
+            )
         try:
-            for task in asyncio.as_completed(tasks):
-                result = await task
-                completed += 1
-
-                if result["status"] == "OK":
-                    alive += 1
-                    if result["response_time_ms"] is not None:
-                        latencies.append(result["response_time_ms"])
-                else:
-                    dead += 1
-
-                result["_progress"] = {"completed": completed, "total": total}
-                all_results.append(result)
-                yield sse_event("result", result)
+            async for index, result in checks:
+                fresh_results.append((pending[index][1], result))
+                yield record(result)
         finally:
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
+            await checks.aclose()
 
-        exit_ips = [item["exit_ip"] for item in all_results if item["exit_ip"]]
+        # Cached results already carry their geo data.
+        exit_ips = [item.exit_ip for item in all_results if item.exit_ip and not item.cached]
         geo_map = await self._geoip_service.resolve_countries(exit_ips)
 
         for item in all_results:
-            geo = geo_map.get(item["exit_ip"])
+            geo = geo_map.get(item.exit_ip)
             if geo is None:
                 continue
-            item["country"] = geo.get("country", "")
-            item["country_code"] = geo.get("countryCode", "")
-            item["city"] = geo.get("city", "")
+            item.country = geo.get("country", "")
+            item.country_code = geo.get("countryCode", "")
+            item.city = geo.get("city", "")
 
         geo_results = {
-            item["id"]: {
-                "country": item.get("country", ""),
-                "countryCode": item.get("country_code", ""),
-                "city": item.get("city", ""),
+            item.id: {
+                "country": item.country,
+                "countryCode": item.country_code,
+                "city": item.city,
             }
             for item in all_results
-            if item.get("country")
+            if item.country
         }
         if geo_results:
             yield sse_event("geo", geo_results)
 
+        # After the checks rather than alongside them, so downloads do not
+        # skew the latencies just measured.
+        bandwidth_url = self.bandwidth_url(request) if request.measure_bandwidth else None
+        if bandwidth_url:
+            download_url = bandwidth_url
+            if self._judge_token and not request.bandwidth_url:
+                # The configured BANDWIDTH_URL may be the built-in judge.
+                download_url = sign_judge_url(bandwidth_url, request.bandwidth_bytes, self._judge_token)
+            measurements = measure_throughputs(
+                [item for item in all_results if item.status == "OK"],
+                download_url,
+                request.timeout,
+                request.proxy_type,
+                request.bandwidth_bytes,
+                request.bandwidth_workers,
+            )
+            try:
+                async for item in measurements:
+                    yield sse_event(
+                        "throughput",
+                        {
+                            "id": item.id,
+                            "throughput_bps": item.throughput_bps,
+                            "throughput_ttfb_ms": item.throughput_ttfb_ms,
+                            "throughput_error": item.throughput_error,
+                        },
+                    )
+            finally:
+                await measurements.aclose()
+
         avg_latency = round(sum(latencies) / len(latencies)) if latencies else None
-        countries = dict(Counter(item["country"] for item in all_results if item.get("country")))
+        countries = dict(Counter(item.country for item in all_results if item.country))
 
         stats = SessionStats(
             total=total,
@@ -128,11 +436,9 @@ class CheckService:
             dead=dead,
             avg_latency=avg_latency,
             countries=countries,
+            percentiles=phase_stats.percentiles(),
         )
 
-        for item in all_results:
-            item.pop("_progress", None)
-
         session_name = request.session_name.strip() or (
             f"Session {datetime.now(timezone.utc).strftime('%b %d, %H:%M')}"
         )
@@ -150,10 +456,39 @@ class CheckService:
                 proxy_type=request.proxy_type,
                 delimiter=request.delimiter,
                 field_order=request.field_order,
+                max_age=request.max_age,
+                measure_bandwidth=bool(bandwidth_url),
+                bandwidth_url=bandwidth_url,
+                bandwidth_bytes=request.bandwidth_bytes if bandwidth_url else None,
             ),
-            results=[ProxyResult(**item) for item in all_results],
+            results=all_results,
             stats=stats,
         )
         await self._session_repository.upsert(session_record)
+        if self._proxy_index is not None:
+            await self._proxy_index.add_results(owner_sub, session_id, all_results, checked_at)
+
+        if use_cache:
+            entries = {
+                key: {field: getattr(item, field) for field in CACHED_FIELDS}
+                for key, item in fresh_results
+                # Local failures say nothing about the proxy; check it again next time.
+                if key is not None and not item.error.startswith(LOCAL_ERROR_PREFIX)
+            }
+            try:
+                await self._cache_repository.store(owner_sub, entries, checked_at)
+            except SQLAlchemyError:
+                logger.exception("Updating the check result cache failed")
 
         yield sse_event("done", {"session_id": session_id, **stats.model_dump()})
+
+    @staticmethod
+    def _cached_result(proxy: dict[str, str], cached: dict) -> ProxyResult:
+        return ProxyResult(
+            proxy_ip=proxy["ip"],
+            proxy_port=proxy["port"],
+            user=proxy.get("user", ""),
+            password=proxy.get("pass", proxy.get("password", "")),
+            cached=True,
+            **{field: cached[field] for field in CACHED_FIELDS if field in cached},
+        )
@@ -0,0 +1,58 @@
+import math
+
+PHASES = ("total", "dns", "connect", "handshake", "tls", "ttfb", "body")
+PERCENTILES = (50, 90, 99)
+
+# Log-spaced buckets: each is ~2% wider than the previous, so any percentile
+# is within ~2% of the exact value while memory stays fixed per phase.
+_GROWTH = 1.02
+_LOG_GROWTH = math.log(_GROWTH)
+
+
+class LatencyHistogram:
+    """Streaming latency distribution in ms with bounded relative error."""
+
+    __slots__ = ("counts", "count")
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+
+    def add(self, value_ms: int) -> None:
+        index = int(math.log1p(max(value_ms, 0)) / _LOG_GROWTH)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+
+    def percentile(self, percent: float) -> int | None:
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Report the bucket's midpoint, mapped back from log space.
+                return round(math.expm1((index + 0.5) * _LOG_GROWTH))
+        return None
+
+
+class PhaseStats:
+    """Per-phase latency percentiles, updated as each result arrives."""
+
+    def __init__(self) -> None:
+        self._histograms = {phase: LatencyHistogram() for phase in PHASES}
+
+    def add(self, result) -> None:
+        if result.response_time_ms is not None:
+            self._histograms["total"].add(result.response_time_ms)
+        for phase in PHASES[1:]:
+            value = getattr(result, f"{phase}_ms")
+            if value is not None:
+                self._histograms[phase].add(value)
+
+    def percentiles(self) -> dict[str, dict[str, int | None]]:
+        return {
+            phase: {f"p{percent}": histogram.percentile(percent) for percent in PERCENTILES}
+            for phase, histogram in self._histograms.items()
+            if histogram.count
+        }
@@ -1,6 +1,7 @@
-import asyncio
+import time
 
-import requests
+from ..core import metrics
+from ..core.http import get_http_client
 
 
 class GeoIPService:
@@ -12,12 +13,13 @@ class GeoIPService:
 
         unique_ips = list(set(ips))
         result_map: dict[str, dict[str, str]] = {}
+        client = get_http_client()
 
         for index in range(0, len(unique_ips), 100):
             batch = unique_ips[index : index + 100]
+            start = time.perf_counter()
             try:
-                response = await asyncio.to_thread(
-                    requests.post,
+                response = await client.post(
                     "http://ip-api.com/batch",
                     json=[
                         {"query": ip, "fields": "query,country,countryCode,city"}
@@ -25,7 +27,9 @@ class GeoIPService:
                     ],
                     timeout=10,
                 )
+                metrics.GEOIP_BATCH_DURATION.observe(time.perf_counter() - start)
                 if response.status_code != 200:
+                    metrics.GEOIP_BATCH_FAILURES.inc()
                     continue
 
                 for item in response.json():
@@ -36,6 +40,7 @@ class GeoIPService:
                         "city": item.get("city", ""),
                     }
             except Exception:  # pragma: no cover - network/runtime dependent
+                metrics.GEOIP_BATCH_FAILURES.inc()
                 continue
 
         return result_map
@@ -1,28 +1,63 @@
 import base64
+import binascii
 import hashlib
+import os
+from collections.abc import Iterable
 
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
-_ENC_PREFIX = "enc:v1:"
+_ENC_PREFIX = "enc:v1:"  # Fernet (AES-128-CBC + HMAC-SHA256)
+_ENC_V2_PREFIX = "enc:v2:"  # AES-256-GCM, 96-bit random nonce
+_ENC_PREFIXES = (_ENC_PREFIX, _ENC_V2_PREFIX)
+_GCM_NONCE_SIZE = 12
+
+SCHEMES = ("fernet", "aesgcm")
 
 
 class PasswordCrypto:
-    def __init__(self, secret: str) -> None:
+    """
+    Encrypts proxy passwords at rest.
+
+    New values are written with the configured `scheme`; both `enc:v1:`
+    (Fernet) and `enc:v2:` (AES-GCM) values are always readable, so the scheme
+    can be switched without migrating stored sessions.
+    """
+
+    def __init__(self, secret: str, scheme: str = "fernet") -> None:
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown password encryption scheme: {scheme}")
         derived_key = hashlib.sha256(secret.encode("utf-8")).digest()
         fernet_key = base64.urlsafe_b64encode(derived_key)
         self._fernet = Fernet(fernet_key)
+        # Separate key for AES-GCM so the two formats never share key material.
+        self._aesgcm = AESGCM(hashlib.sha256(b"enc:v2\x00" + secret.encode("utf-8")).digest())
+        self._fingerprint_key = hashlib.sha256(b"fingerprint\x00" + secret.encode("utf-8")).digest()
+        self._scheme = scheme
 
     def encrypt(self, value: str) -> str:
         if not value:
             return ""
-        if value.startswith(_ENC_PREFIX):
+        if value.startswith(_ENC_PREFIXES):
             return value
+        if self._scheme == "aesgcm":
+            nonce = os.urandom(_GCM_NONCE_SIZE)
+            sealed = self._aesgcm.encrypt(nonce, value.encode("utf-8"), None)
+            return f"{_ENC_V2_PREFIX}{base64.urlsafe_b64encode(nonce + sealed).decode('ascii')}"
         token = self._fernet.encrypt(value.encode("utf-8")).decode("utf-8")
         return f"{_ENC_PREFIX}{token}"
 
     def decrypt(self, value: str) -> str:
         if not value:
             return ""
+        if value.startswith(_ENC_V2_PREFIX):
+            try:
+                raw = base64.urlsafe_b64decode(value[len(_ENC_V2_PREFIX) :])
+                nonce, sealed = raw[:_GCM_NONCE_SIZE], raw[_GCM_NONCE_SIZE:]
+                return self._aesgcm.decrypt(nonce, sealed, None).decode("utf-8")
+            except (InvalidTag, ValueError, binascii.Error):
+                return ""
         if not value.startswith(_ENC_PREFIX):
             return value
         token = value[len(_ENC_PREFIX) :]
@@ -30,3 +65,41 @@ class PasswordCrypto:
             return self._fernet.decrypt(token.encode("utf-8")).decode("utf-8")
         except InvalidToken:
             return ""
+
+    def fingerprint(self, value: str) -> str:
+        """
+        Keyed digest for equality lookups on values that must not be stored,
+        such as credentials in cache keys. Stable for a given secret.
+        """
+        return hashlib.blake2b(
+            value.encode("utf-8"),
+            key=self._fingerprint_key,
+            digest_size=16,
+        ).hexdigest()
+
+    def encrypt_many(self, values: Iterable[str]) -> list[str]:
+        """
+        Encrypt a batch, encrypting each distinct value once.
+
+        Rotating-proxy lists repeat the same credentials thousands of times, so
+        identical passwords in one batch share a ciphertext.
+        """
+        cache: dict[str, str] = {}
+        encrypted: list[str] = []
+        for value in values:
+            token = cache.get(value)
+            if token is None:
+                token = cache[value] = self.encrypt(value)
+            encrypted.append(token)
+        return encrypted
+
+    def decrypt_many(self, values: Iterable[str]) -> list[str]:
+        """Decrypt a batch, decrypting each distinct ciphertext once."""
+        cache: dict[str, str] = {}
+        decrypted: list[str] = []
+        for value in values:
+            plain = cache.get(value)
+            if plain is None:
+                plain = cache[value] = self.decrypt(value)
+            decrypted.append(plain)
+        return decrypted
@@ -0,0 +1,356 @@
+"""
+In-memory index of alive proxies for fast "give me a good proxy" lookups.
+
+Per owner, the latest result of each proxy (ip, port, user) is kept in
+latency-sorted buckets: one per country code plus one across all
+countries. Sessions update it incrementally when they complete; a newer
+FAIL removes the proxy. A lookup bisects the bucket for `max_latency`
+and picks `n` proxies, either the fastest or a latency-weighted random
+sample (weight 1/latency) so repeated callers spread their load.
+
+Lookups run on the event loop without locks. Small updates are applied
+in place; large ones (big sessions) rebuild a copy of the owner's index in
+a thread and swap it in, so lookups never wait on an update. Entries older
+than `max_age` are skipped by lookups, and once a lookup skips many, the
+owner's index is rebuilt without them the same way. Each API process keeps
+its own index, warmed from recent sessions at startup, for at most
+`max_owners` users; the least recently used one is dropped first and comes
+back with its next completed session.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core.database import SessionLocal
+from ..repositories.session_repository import MASKED_PASSWORD, SessionRepository
+from ..schemas.session import ProxyResult
+from .password_crypto import PasswordCrypto
+
+logger = logging.getLogger(__name__)
+
+ProxyKey = tuple[str, str, str]
+
+# Bucket holding every country.
+ALL_COUNTRIES = ""
+# Weighted picks draw from at most this many of the fastest candidates per
+# requested proxy, which keeps lookups sub-millisecond on huge buckets.
+CANDIDATES_PER_PICK = 20
+MIN_CANDIDATES = 200
+# Updates with more changes than this rebuild the owner's index in a thread
+# instead of inserting one by one on the event loop.
+INCREMENTAL_LIMIT = 2000
+
+# Tie-breaker for equal latencies: ints compare much faster than key tuples.
+_sequence = itertools.count()
+
+
+@dataclass(slots=True)
+class IndexedProxy:
+    proxy_ip: str
+    proxy_port: str
+    user: str
+    password: str
+    latency_ms: int
+    exit_ip: str
+    country: str
+    country_code: str
+    city: str
+    session_id: str
+    checked_at: float
+    seq: int
+
+    def as_dict(self, reveal_password: bool = False) -> dict:
+        return {
+            "proxy_ip": self.proxy_ip,
+            "proxy_port": self.proxy_port,
+            "user": self.user,
+            "password": self.password if reveal_password or not self.password else MASKED_PASSWORD,
+            "latency_ms": self.latency_ms,
+            "exit_ip": self.exit_ip,
+            "country": self.country,
+            "country_code": self.country_code,
+            "city": self.city,
+            "session_id": self.session_id,
+            "checked_at": datetime.fromtimestamp(self.checked_at, timezone.utc).isoformat(),
+        }
+
+
+class _OwnerIndex:
+    __slots__ = ("entries", "buckets")
+
+    def __init__(self) -> None:
+        self.entries: dict[ProxyKey, IndexedProxy] = {}
+        # Sorted (latency_ms, seq, entry); seqs are unique, so entries are never compared.
+        self.buckets: dict[str, list[tuple[int, int, IndexedProxy]]] = {ALL_COUNTRIES: []}
+
+    @classmethod
+    def build(cls, entries: dict[ProxyKey, IndexedProxy]) -> "_OwnerIndex":
+        # Grouped by latency and concatenated instead of one big list.sort(),
+        # which would hold the GIL, and so stall the event loop, throughout.
+        grouped: dict[str, dict[int, list]] = defaultdict(lambda: defaultdict(list))
+        for entry in entries.values():
+            item = (entry.latency_ms, entry.seq, entry)
+            grouped[ALL_COUNTRIES][entry.latency_ms].append(item)
+            if entry.country_code:
+                grouped[entry.country_code][entry.latency_ms].append(item)
+
+        owner = cls()
+        owner.entries = entries
+        for code, by_latency in grouped.items():
+            bucket = owner.buckets[code] = []
+            for latency in sorted(by_latency):
+                group = by_latency[latency]
+                group.sort()
+                bucket.extend(group)
+        return owner
+
+    def add(self, key: ProxyKey, entry: IndexedProxy) -> None:
+        self.remove(key)
+        self.entries[key] = entry
+        item = (entry.latency_ms, entry.seq, entry)
+        insort(self.buckets[ALL_COUNTRIES], item)
+        if entry.country_code:
+            insort(self.buckets.setdefault(entry.country_code, []), item)
+
+    def remove(self, key: ProxyKey) -> IndexedProxy | None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        codes = (ALL_COUNTRIES, entry.country_code) if entry.country_code else (ALL_COUNTRIES,)
+        for code in codes:
+            bucket = self.buckets[code]
+            position = bisect_left(bucket, (entry.latency_ms, entry.seq))
+            if position < len(bucket) and bucket[position][2] is entry:
+                del bucket[position]
+            if not bucket and code != ALL_COUNTRIES:
+                del self.buckets[code]
+        return entry
+
+
+# key -> (as-of timestamp, new entry or None to remove)
+Changes = dict[ProxyKey, tuple[float, IndexedProxy | None]]
+
+
+class ProxyIndex:
+    def __init__(
+        self,
+        max_age: float = 24 * 3600,
+        max_per_owner: int = 1_000_000,
+        max_owners: int = 10_000,
+    ) -> None:
+        self.max_age = max_age
+        self.max_per_owner = max_per_owner
+        self.max_owners = max_owners
+        # Least recently used first.
+        self._owners: dict[str, _OwnerIndex] = {}
+        # owner -> [lock, updates holding or waiting for it]; dropped when idle.
+        self._locks: dict[str, list] = {}
+        # Expiry prunes started by lookups, by owner.
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return sum(len(owner.entries) for owner in self._owners.values())
+
+    def size(self, owner_sub: str) -> int:
+        owner = self._owners.get(owner_sub)
+        return len(owner.entries) if owner is not None else 0
+
+    async def add_results(
+        self,
+        owner_sub: str,
+        session_id: str,
+        results: list[ProxyResult] | list[dict],
+        checked_at: datetime,
+    ) -> None:
+        """Apply a completed session: index alive proxies, drop ones that now fail."""
+        if checked_at.tzinfo is None:  # SQLite drops the offset
+            checked_at = checked_at.replace(tzinfo=timezone.utc)
+        stamp = checked_at.timestamp()
+        if stamp < time.time() - self.max_age or not results:
+            return
+        if len(results) > INCREMENTAL_LIMIT:
+            changes = await asyncio.to_thread(_collect_changes, session_id, results, stamp)
+        else:
+            changes = _collect_changes(session_id, results, stamp)
+        await self._apply(owner_sub, changes)
+
+    async def remove_session(self, owner_sub: str, session_id: str) -> None:
+        owner = self._owners.get(owner_sub)
+        if owner is None:
+            return
+        await self._apply(
+            owner_sub,
+            {
+                key: (math.inf, None)
+                for key, entry in owner.entries.items()
+                if entry.session_id == session_id
+            },
+        )
+
+    def best(
+        self,
+        owner_sub: str,
+        n: int = 10,
+        country: str | None = None,
+        max_latency: int | None = None,
+        weighted: bool = True,
+    ) -> list[IndexedProxy]:
+        owner = self._owners.pop(owner_sub, None)
+        if owner is None:
+            return []
+        self._owners[owner_sub] = owner
+        bucket = owner.buckets.get(country.strip().upper() if country else ALL_COUNTRIES)
+        if not bucket:
+            return []
+
+        end = len(bucket) if max_latency is None else bisect_left(bucket, (max_latency + 1,))
+        pool_size = max(n * CANDIDATES_PER_PICK, MIN_CANDIDATES) if weighted else n
+        cutoff = time.time() - self.max_age
+        candidates = []
+        expired = 0
+        for position in range(end):
+            entry = bucket[position][2]
+            if entry.checked_at < cutoff:
+                expired += 1
+                continue
+            candidates.append(entry)
+            if len(candidates) >= pool_size:
+                break
+        if expired > pool_size and owner_sub not in self._tasks:
+            # Expired entries are only swept from here, off the loop.
+            task = asyncio.get_running_loop().create_task(self._apply(owner_sub, {}, prune=True))
+            self._tasks[owner_sub] = task
+            task.add_done_callback(lambda _: self._tasks.pop(owner_sub, None))
+        if not weighted or len(candidates) <= n:
+            return candidates[:n]
+
+        # Weighted sampling without replacement (Efraimidis-Spirakis): the
+        # n largest log(u) / w with w = 1 / latency.
+        return heapq.nlargest(
+            n,
+            candidates,
+            key=lambda entry: math.log(1.0 - random.random()) * max(entry.latency_ms, 1),
+        )
+
+    async def _apply(self, owner_sub: str, changes: Changes, prune: bool = False) -> None:
+        holder = self._locks.setdefault(owner_sub, [asyncio.Lock(), 0])
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                await self._apply_locked(owner_sub, changes, prune)
+        finally:
+            holder[1] -= 1
+            if not holder[1]:
+                del self._locks[owner_sub]
+
+    async def _apply_locked(self, owner_sub: str, changes: Changes, prune: bool) -> None:
+        owner = self._owners.get(owner_sub) or _OwnerIndex()
+        if prune or len(changes) > INCREMENTAL_LIMIT:
+            # Rebuild a copy off the loop, without expired entries, and swap
+            # it in; lookups keep using the current one meanwhile.
+            owner = await asyncio.to_thread(self._rebuilt, owner.entries, changes)
+        else:
+            for key, (stamp, entry) in changes.items():
+                current = owner.entries.get(key)
+                if current is not None and current.checked_at > stamp:
+                    continue
+                if entry is None:
+                    owner.remove(key)
+                else:
+                    owner.add(key, entry)
+            everyone = owner.buckets[ALL_COUNTRIES]
+            while len(owner.entries) > self.max_per_owner:
+                owner.remove(_key(everyone[-1][2]))
+
+        self._owners.pop(owner_sub, None)
+        if owner.entries:
+            self._owners[owner_sub] = owner
+            while len(self._owners) > self.max_owners:
+                del self._owners[next(iter(self._owners))]
+
+    def _rebuilt(self, entries: dict[ProxyKey, IndexedProxy], changes: Changes) -> _OwnerIndex:
+        cutoff = time.time() - self.max_age
+        merged = {key: entry for key, entry in entries.items() if entry.checked_at >= cutoff}
+        for key, (stamp, entry) in changes.items():
+            current = merged.get(key)
+            if current is not None and current.checked_at > stamp:
+                continue
+            if entry is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = entry
+        if len(merged) > self.max_per_owner:
+            fastest = sorted(merged.values(), key=lambda entry: (entry.latency_ms, entry.seq))
+            merged = {_key(entry): entry for entry in fastest[: self.max_per_owner]}
+        return _OwnerIndex.build(merged)
+
+
+def _key(entry: IndexedProxy) -> ProxyKey:
+    return (entry.proxy_ip, entry.proxy_port, entry.user)
+
+
+def _collect_changes(session_id: str, results: list[ProxyResult] | list[dict], stamp: float) -> Changes:
+    changes: Changes = {}
+    for result in results:
+        item = result if isinstance(result, dict) else result.as_dict()
+        key = (item["proxy_ip"], str(item["proxy_port"]), item.get("user") or "")
+        latency = item.get("response_time_ms")
+        if item.get("status") != "OK" or latency is None:
+            changes[key] = (stamp, None)
+            continue
+        changes[key] = (
+            stamp,
+            IndexedProxy(
+                proxy_ip=key[0],
+                proxy_port=key[1],
+                user=key[2],
+                password=item.get("password") or "",
+                latency_ms=int(latency),
+                exit_ip=item.get("exit_ip") or "",
+                country=item.get("country") or "",
+                country_code=(item.get("country_code") or "").upper(),
+                city=item.get("city") or "",
+                session_id=session_id,
+                checked_at=stamp,
+                seq=next(_sequence),
+            ),
+        )
+    return changes
+
+
+async def warm_proxy_index(
+    index: ProxyIndex,
+    password_crypto: PasswordCrypto,
+    results_codec: str,
+    pause_seconds: float = 0.05,
+) -> int:
+    """Replay sessions younger than the index's `max_age` into it, oldest first."""
+    since = datetime.now(timezone.utc) - timedelta(seconds=index.max_age)
+    sessions = 0
+    try:
+        async with SessionLocal() as db:
+            repository = SessionRepository(
+                db=db,
+                password_crypto=password_crypto,
+                results_codec=results_codec,
+            )
+            async for owner_sub, session_id, created_at, results in repository.iter_recent_results(since):
+                await index.add_results(owner_sub, session_id, results, created_at)
+                sessions += 1
+                await asyncio.sleep(pause_seconds)
+    except SQLAlchemyError:
+        logger.exception("Warming the proxy index failed; it fills as new sessions complete")
+    if sessions:
+        logger.info("Proxy index warmed from %d sessions (%d proxies)", sessions, len(index))
+    return sessions
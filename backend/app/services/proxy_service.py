@@ -1,7 +1,29 @@
+import base64
+import hashlib
+import http.client
+import ipaddress
+import json
+import re
+import socket
+import ssl
 import time
-import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlsplit
 
-import requests
+import certifi
+
+from ..core.socket_budget import LOCAL_ERRNOS
+from ..schemas.session import ProxyResult
+
+_HOSTNAME_LABEL = re.compile(r"^(?!-)[a-z0-9-]{1,63}(?<!-)$")
+# Shared by all checks; wrap_socket on one context is thread-safe and loading
+# the CA bundle per check would dominate short checks.
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+_USER_AGENT = "proxy-checker"
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Redirects followed by `check_proxy_sync`, each over a new proxy connection.
+MAX_REDIRECTS = 5
 
 
 def parse_proxy(line: str, delimiter: str, field_order: list[str]) -> dict[str, str] | None:
@@ -23,10 +45,110 @@ def parse_proxy(line: str, delimiter: str, field_order: list[str]) -> dict[str,
     return proxy
 
 
+def normalize_host(host: str) -> str | None:
+    """Return the canonical form of an IP address or hostname, or None if invalid."""
+    host = host.strip().strip("[]")
+    try:
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        pass
+
+    host = host.lower().rstrip(".")
+    if host == "localhost":
+        return host
+    if not host or len(host) > 253 or "." not in host:
+        return None
+    labels = host.split(".")
+    # All-numeric dotted names are malformed IPv4 addresses, not hostnames.
+    if all(label.isdigit() for label in labels):
+        return None
+    if not all(_HOSTNAME_LABEL.match(label) for label in labels):
+        return None
+    return host
+
+
+def normalize_port(port: str) -> str | None:
+    port = port.strip()
+    if not port.isdigit():
+        return None
+    value = int(port)
+    return str(value) if 1 <= value <= 65535 else None
+
+
+def normalize_proxy(proxy: dict[str, str]) -> dict[str, str] | None:
+    """Validate and canonicalize the host and port of a parsed proxy."""
+    host = normalize_host(proxy["ip"])
+    port = normalize_port(proxy["port"])
+    if host is None or port is None:
+        return None
+    return {**proxy, "ip": host, "port": port}
+
+
+@dataclass
+class ProxyListStats:
+    lines: int = 0  # non-empty, non-comment input lines
+    invalid: int = 0  # unparsable lines, bad hosts or ports
+    duplicates: int = 0  # repeats of an earlier (ip, port, user, pass)
+
+
+def prepare_proxies(
+    lines: Iterable[str],
+    delimiter: str,
+    field_order: list[str],
+) -> tuple[list[dict[str, str]], ProxyListStats]:
+    """
+    Parse, validate and deduplicate a proxy list before any network work.
+
+    Duplicates are detected on (ip, port, user, pass) after normalization.
+    Only an 8-byte digest of each key is kept, so the seen-set stays small
+    for lists with millions of lines.
+    """
+    stats = ProxyListStats()
+    seen: set[bytes] = set()
+    proxies: list[dict[str, str]] = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        stats.lines += 1
+
+        proxy = parse_proxy(stripped, delimiter, field_order)
+        proxy = normalize_proxy(proxy) if proxy is not None else None
+        if proxy is None:
+            stats.invalid += 1
+            continue
+
+        key = "\0".join(
+            (proxy["ip"], proxy["port"], proxy.get("user", ""), proxy.get("pass", ""))
+        ).encode("utf-8")
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        if digest in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(digest)
+        proxies.append(proxy)
+    return proxies, stats
+
+
 def build_proxy_url(proxy: dict[str, str], proxy_type: str) -> str:
+    host = f"[{proxy['ip']}]" if ":" in proxy["ip"] else proxy["ip"]
     if proxy.get("user") and proxy.get("pass"):
-        return f"{proxy_type}://{proxy['user']}:{proxy['pass']}@{proxy['ip']}:{proxy['port']}"
-    return f"{proxy_type}://{proxy['ip']}:{proxy['port']}"
+        return f"{proxy_type}://{proxy['user']}:{proxy['pass']}@{host}:{proxy['port']}"
+    return f"{proxy_type}://{host}:{proxy['port']}"
+
+
+class ProxyCheckError(Exception):
+    """A check failed in a known way (bad status, refused handshake, ...)."""
+
+
+class LocalResourceError(Exception):
+    """A check failed because this host ran out of descriptors, ports or buffers."""
+
+
+# Error prefix of results that still failed locally after retries.
+LOCAL_ERROR_PREFIX = "local: "
+
+THROUGHPUT_READ_SIZE = 64 * 1024
 
 
 def check_proxy_sync(
@@ -34,38 +156,288 @@ def check_proxy_sync(
     check_url: str,
     timeout: int,
     proxy_type: str,
-) -> dict:
-    proxy_url = build_proxy_url(proxy, proxy_type)
-    result = {
-        "id": str(uuid.uuid4()),
-        "proxy_ip": proxy["ip"],
-        "proxy_port": proxy["port"],
-        "user": proxy.get("user", ""),
-        "password": proxy.get("pass", proxy.get("password", "")),
-        "status": "FAIL",
-        "exit_ip": "",
-        "response_time_ms": None,
-        "error": "",
-        "country": "",
-        "country_code": "",
-        "city": "",
-    }
-
-    proxies = {"http": proxy_url, "https": proxy_url}
+    addresses: list[tuple] | Exception | None = None,
+    dns_seconds: float = 0.0,
+) -> ProxyResult:
+    """
+    Fetch `check_url` through the proxy and time each phase.
+
+    The request is made over a raw socket (http.client only parses the
+    response) so DNS, TCP connect, the CONNECT/SOCKS5 handshake, TLS,
+    time to first byte and body read can be measured separately. `timeout`
+    applies to each socket operation. Phases that completed are recorded
+    even when a later one fails.
+
+    Async callers resolve the proxy host beforehand (`app.core.dns`) and
+    pass the `getaddrinfo`-style `addresses`, or the lookup error, plus the
+    time the lookup took; otherwise the system resolver is called here.
+
+    Redirects are followed up to `MAX_REDIRECTS` times, each hop over a new
+    connection through the proxy; the phase timings add up across hops.
+
+    Raises `LocalResourceError` instead of returning a failed result when
+    the error is on this host (EMFILE, EADDRNOTAVAIL, ...), since it says
+    nothing about the proxy.
+    """
+    result = ProxyResult(
+        proxy_ip=proxy["ip"],
+        proxy_port=proxy["port"],
+        user=proxy.get("user", ""),
+        password=proxy.get("pass", proxy.get("password", "")),
+    )
+    user, password = proxy.get("user", ""), proxy.get("pass", proxy.get("password", ""))
+
+    start = mark = time.perf_counter() - dns_seconds
+    phase = "dns"
 
+    def lap(next_phase: str) -> None:
+        nonlocal mark, phase
+        now = time.perf_counter()
+        field = f"{phase}_ms"
+        # Redirect hops add to the phases of the first request.
+        setattr(result, field, (getattr(result, field) or 0) + round((now - mark) * 1000))
+        mark, phase = now, next_phase
+
+    sock = None
     try:
-        start = time.perf_counter()
-        response = requests.get(check_url, proxies=proxies, timeout=timeout)
-        elapsed_ms = round((time.perf_counter() - start) * 1000)
-        response.raise_for_status()
+        if addresses is None:
+            addresses = socket.getaddrinfo(proxy["ip"], int(proxy["port"]), type=socket.SOCK_STREAM)
+        elif isinstance(addresses, Exception):
+            raise addresses
+        lap("connect")
+
+        for redirects in range(MAX_REDIRECTS + 1):
+            url = urlsplit(check_url)
+            https = url.scheme == "https"
+            target_host = url.hostname or ""
+            target_port = url.port or (443 if https else 80)
+
+            sock = _connect(addresses, timeout)
+
+            if proxy_type == "socks5":
+                lap("handshake")
+                _socks5_connect(sock, target_host, target_port, user, password)
+                tunneled = True
+            elif https:
+                lap("handshake")
+                _http_connect(sock, target_host, target_port, user, password)
+                tunneled = True
+            else:
+                tunneled = False
+
+            if https:
+                lap("tls")
+                sock = _SSL_CONTEXT.wrap_socket(sock, server_hostname=target_host)
 
-        data = response.json()
+            lap("ttfb")
+            connection = http.client.HTTPConnection(target_host, target_port, timeout=timeout)
+            connection.sock = sock
+            headers = {"Accept": "*/*", "Connection": "close", "User-Agent": _USER_AGENT}
+            if not tunneled and user and password:
+                headers["Proxy-Authorization"] = _basic_auth(user, password)
+            # Plain HTTP through an HTTP proxy uses the absolute-form target.
+            target = check_url if not tunneled else (url.path or "/") + (f"?{url.query}" if url.query else "")
+            connection.request("GET", target, headers=headers)
+            response = connection.getresponse()
+
+            lap("body")
+            body = response.read()
+            sock.close()
+            sock = None
+
+            location = response.getheader("Location")
+            if response.status not in _REDIRECT_STATUSES or not location or redirects == MAX_REDIRECTS:
+                break
+            check_url = urljoin(check_url, location)
+            lap("connect")
+        lap("done")
+
+        if response.status in _REDIRECT_STATUSES and location:
+            raise ProxyCheckError(f"more than {MAX_REDIRECTS} redirects")
+        if response.status >= 400:
+            raise ProxyCheckError(f"{response.status} {response.reason}")
+        data = json.loads(body)
         exit_ip = str(data.get("origin", "")).split(",")[0].strip()
 
-        result["status"] = "OK"
-        result["exit_ip"] = exit_ip
-        result["response_time_ms"] = elapsed_ms
-    except Exception as exc:  # pragma: no cover - network/runtime dependent
-        result["error"] = str(exc)[:200]
+        result.status = "OK"
+        result.exit_ip = exit_ip
+        result.response_time_ms = round((mark - start) * 1000)
+    except Exception as exc:
+        if isinstance(exc, OSError) and exc.errno in LOCAL_ERRNOS:
+            raise LocalResourceError(f"{phase}: {exc}") from exc
+        where = phase if phase != "done" else "response"
+        result.error = f"{where}: {str(exc) or type(exc).__name__}"[:200]
+    finally:
+        if sock is not None:
+            sock.close()
 
     return result
+
+
+def measure_throughput_sync(
+    proxy: dict[str, str],
+    url: str,
+    timeout: int,
+    proxy_type: str,
+    max_bytes: int,
+    addresses: list[tuple] | Exception | None = None,
+) -> tuple[int, int]:
+    """
+    Download up to `max_bytes` of `url` through the proxy and return
+    `(bytes_per_second, ttfb_ms)`.
+
+    Throughput counts the body from the response head on, so connection
+    setup and server think time do not dilute it. The download stops after
+    `timeout` seconds of body transfer and the rate covers what arrived by
+    then, so a crawling proxy costs at most that long. Raises on failure,
+    with `LocalResourceError` for errors on this host.
+    """
+    target_url = urlsplit(url)
+    https = target_url.scheme == "https"
+    target_host = target_url.hostname or ""
+    target_port = target_url.port or (443 if https else 80)
+    user, password = proxy.get("user", ""), proxy.get("pass", proxy.get("password", ""))
+
+    sock = None
+    try:
+        if addresses is None:
+            addresses = socket.getaddrinfo(proxy["ip"], int(proxy["port"]), type=socket.SOCK_STREAM)
+        elif isinstance(addresses, Exception):
+            raise addresses
+        sock = _connect(addresses, timeout)
+
+        tunneled = proxy_type == "socks5" or https
+        if proxy_type == "socks5":
+            _socks5_connect(sock, target_host, target_port, user, password)
+        elif https:
+            _http_connect(sock, target_host, target_port, user, password)
+        if https:
+            sock = _SSL_CONTEXT.wrap_socket(sock, server_hostname=target_host)
+
+        connection = http.client.HTTPConnection(target_host, target_port, timeout=timeout)
+        connection.sock = sock
+        headers = {
+            "Accept": "*/*",
+            "Accept-Encoding": "identity",
+            "Connection": "close",
+            "User-Agent": _USER_AGENT,
+        }
+        if not tunneled and user and password:
+            headers["Proxy-Authorization"] = _basic_auth(user, password)
+        target = url if not tunneled else (target_url.path or "/") + (
+            f"?{target_url.query}" if target_url.query else ""
+        )
+        sent = time.perf_counter()
+        connection.request("GET", target, headers=headers)
+        response = connection.getresponse()
+        first_byte = time.perf_counter()
+        if response.status >= 400:
+            raise ProxyCheckError(f"{response.status} {response.reason}")
+
+        received = 0
+        deadline = first_byte + timeout
+        while received < max_bytes and time.perf_counter() < deadline:
+            chunk = response.read1(min(THROUGHPUT_READ_SIZE, max_bytes - received))
+            if not chunk:
+                break
+            received += len(chunk)
+        if not received:
+            raise ProxyCheckError("empty response")
+        elapsed = max(time.perf_counter() - first_byte, 1e-3)
+        return round(received / elapsed), round((first_byte - sent) * 1000)
+    except OSError as exc:
+        if exc.errno in LOCAL_ERRNOS:
+            raise LocalResourceError(str(exc)) from exc
+        raise
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+def _connect(addresses: list[tuple], timeout: int) -> socket.socket:
+    """Connect to the first address that accepts, like `socket.create_connection`."""
+    error: OSError | None = None
+    for family, socktype, proto, _, address in addresses:
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+            return sock
+        except OSError as exc:
+            sock.close()
+            error = exc
+    raise error or ProxyCheckError("no addresses to connect to")
+
+
+def _basic_auth(user: str, password: str) -> str:
+    token = base64.b64encode(f"{user}:{password}".encode("utf-8")).decode("ascii")
+    return f"Basic {token}"
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ProxyCheckError("proxy closed the connection")
+        data += chunk
+    return data
+
+
+def _http_connect(sock: socket.socket, host: str, port: int, user: str, password: str) -> None:
+    authority = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+    lines = [f"CONNECT {authority} HTTP/1.1", f"Host: {authority}"]
+    if user and password:
+        lines.append(f"Proxy-Authorization: {_basic_auth(user, password)}")
+    sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    # Read byte-wise up to the blank line so no TLS bytes are consumed.
+    head = b""
+    while not head.endswith(b"\r\n\r\n"):
+        head += _recv_exact(sock, 1)
+        if len(head) > 16384:
+            raise ProxyCheckError("CONNECT response header too long")
+    status_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+    parts = status_line.split(" ", 2)
+    if len(parts) < 2 or parts[1] != "200":
+        raise ProxyCheckError(f"tunnel refused: {' '.join(parts[1:]) or status_line}")
+
+
+def _socks5_connect(sock: socket.socket, host: str, port: int, user: str, password: str) -> None:
+    methods = b"\x00\x02" if user and password else b"\x00"
+    sock.sendall(b"\x05" + bytes((len(methods),)) + methods)
+    version, method = _recv_exact(sock, 2)
+    if version != 5:
+        raise ProxyCheckError("not a SOCKS5 proxy")
+    if method == 2:
+        user_bytes, password_bytes = user.encode("utf-8"), password.encode("utf-8")
+        sock.sendall(
+            b"\x01"
+            + bytes((len(user_bytes),))
+            + user_bytes
+            + bytes((len(password_bytes),))
+            + password_bytes
+        )
+        if _recv_exact(sock, 2)[1] != 0:
+            raise ProxyCheckError("SOCKS5 authentication failed")
+    elif method != 0:
+        raise ProxyCheckError("SOCKS5 proxy accepted no offered auth method")
+
+    try:
+        address = ipaddress.ip_address(host)
+        target = (b"\x01" if address.version == 4 else b"\x04") + address.packed
+    except ValueError:
+        encoded = host.encode("idna")
+        target = b"\x03" + bytes((len(encoded),)) + encoded
+    sock.sendall(b"\x05\x01\x00" + target + port.to_bytes(2, "big"))
+
+    _, reply, _, address_type = _recv_exact(sock, 4)
+    if reply != 0:
+        raise ProxyCheckError(f"SOCKS5 connect failed (reply {reply})")
+    # Skip the bound address the proxy reports.
+    if address_type == 1:
+        _recv_exact(sock, 4 + 2)
+    elif address_type == 4:
+        _recv_exact(sock, 16 + 2)
+    else:
+        _recv_exact(sock, _recv_exact(sock, 1)[0] + 2)
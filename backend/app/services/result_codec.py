@@ -0,0 +1,99 @@
+"""
+Compact storage encoding for session results.
+
+Results are stored column-oriented (one list per key instead of repeating
+`proxy_ip`, `proxy_port`, ... in every element) and compressed. Layout:
+
+    b"PCR" | version (1 byte) | codec (1 byte) | compressed JSON payload
+
+where the payload is `{"n": rows, "keys": [...], "cols": [[...], ...]}`.
+The header makes the format self-describing, so any stored blob can be read
+back regardless of the codec currently configured for writes.
+"""
+
+import json
+import zlib
+from collections.abc import Iterator
+
+try:  # zstd is optional; zlib is always available.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the local environment
+    zstandard = None
+
+_MAGIC = b"PCR"
+_VERSION = 1
+_CODEC_IDS = {"zlib": 1, "zstd": 2}
+_CODEC_NAMES = {value: key for key, value in _CODEC_IDS.items()}
+
+CODECS = ("json", *_CODEC_IDS)  # "json" = legacy uncompressed JSON column
+
+
+def available(codec: str) -> bool:
+    return codec in ("json", "zlib") or (codec == "zstd" and zstandard is not None)
+
+
+def is_encoded(blob: bytes | None) -> bool:
+    return bool(blob) and blob[:3] == _MAGIC
+
+
+def encode_results(results: list[dict], codec: str = "zlib") -> bytes:
+    if codec not in _CODEC_IDS:
+        raise ValueError(f"Unknown results codec: {codec}")
+    if not available(codec):
+        raise ValueError(f"Results codec {codec!r} needs the `zstandard` package")
+
+    keys: list[str] = []
+    seen: set[str] = set()
+    for item in results:
+        for key in item:
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+
+    columns = [[item.get(key) for item in results] for key in keys]
+    payload = json.dumps(
+        {"n": len(results), "keys": keys, "cols": columns},
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    if codec == "zstd":
+        compressed = zstandard.ZstdCompressor(level=3).compress(payload)
+    else:
+        compressed = zlib.compress(payload, 6)
+    return _MAGIC + bytes((_VERSION, _CODEC_IDS[codec])) + compressed
+
+
+def decode_results(blob: bytes) -> list[dict]:
+    return list(iter_results(blob))
+
+
+def iter_results(blob: bytes) -> Iterator[dict]:
+    """
+    Yield result dicts one at a time from an encoded blob.
+
+    Only the column lists are materialized; rows are built lazily, so a
+    consumer that streams them out never holds every dict at once.
+    """
+    if not is_encoded(blob):
+        raise ValueError("Not an encoded results blob")
+    version, codec_id = blob[3], blob[4]
+    if version != _VERSION:
+        raise ValueError(f"Unsupported results format version: {version}")
+
+    codec = _CODEC_NAMES.get(codec_id)
+    body = blob[5:]
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Stored results use zstd; install the `zstandard` package")
+        payload = zstandard.ZstdDecompressor().decompress(body)
+    elif codec == "zlib":
+        payload = zlib.decompress(body)
+    else:
+        raise ValueError(f"Unknown results codec id: {codec_id}")
+
+    data = json.loads(payload)
+    del payload
+    keys = data["keys"]
+    if not keys:
+        return iter([{} for _ in range(data["n"])])
+    return (dict(zip(keys, row)) for row in zip(*data["cols"]))
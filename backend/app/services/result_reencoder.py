@@ -0,0 +1,25 @@
+import logging
+
+from .batch_jobs import run_in_batches
+from .password_crypto import PasswordCrypto
+
+logger = logging.getLogger(__name__)
+
+
+async def reencode_legacy_sessions(
+    password_crypto: PasswordCrypto,
+    results_codec: str,
+    batch_size: int = 50,
+    pause_seconds: float = 0.5,
+) -> int:
+    """Convert sessions stored as plain JSON results to the compact format."""
+    total = await run_in_batches(
+        lambda repository: repository.reencode_legacy(batch_size),
+        "Re-encoding legacy sessions",
+        password_crypto,
+        results_codec,
+        pause_seconds,
+    )
+    if total:
+        logger.info("Re-encoded %d legacy sessions with %s", total, results_codec)
+    return total
@@ -0,0 +1,25 @@
+import logging
+
+from .batch_jobs import run_in_batches
+from .password_crypto import PasswordCrypto
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_session_rollups(
+    password_crypto: PasswordCrypto,
+    results_codec: str,
+    batch_size: int = 50,
+    pause_seconds: float = 0.5,
+) -> int:
+    """Write analytics rollups for sessions saved before they existed."""
+    total = await run_in_batches(
+        lambda repository: repository.backfill_rollups(batch_size),
+        "Backfilling session rollups",
+        password_crypto,
+        results_codec,
+        pause_seconds,
+    )
+    if total:
+        logger.info("Backfilled analytics rollups for %d sessions", total)
+    return total
@@ -0,0 +1,204 @@
+"""
+Streaming export of stored session results as CSV, NDJSON or Parquet.
+
+Exports consume the chunk iterator from `SessionRepository.stream_results`
+and yield encoded bytes chunk by chunk, so the response is never built in
+memory as a whole. Parquet needs the optional `pyarrow` package.
+"""
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterable
+
+try:  # Parquet export is optional.
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - depends on the local environment
+    pyarrow = None
+
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Same columns as `main.write_results(include_passwords=True)`, so CLI and
+# API exports line up.
+CSV_FIELDNAMES = [
+    "proxy_ip",
+    "proxy_port",
+    "user",
+    "pass",
+    "status",
+    "exit_ip",
+    "response_time_ms",
+    "error",
+]
+
+
+def available(fmt: str) -> bool:
+    return fmt in EXPORT_FORMATS and (fmt != "parquet" or pyarrow is not None)
+
+
+def filter_results(
+    results: Iterable[dict],
+    alive_only: bool = False,
+    country: str | None = None,
+    max_latency: int | None = None,
+) -> list[dict]:
+    """Keep results that are alive, in `country` (code or name) and within `max_latency` ms."""
+    wanted_country = country.strip().lower() if country else None
+    selected = []
+    for item in results:
+        if alive_only and item.get("status") != "OK":
+            continue
+        if wanted_country and wanted_country not in (
+            str(item.get("country_code") or "").lower(),
+            str(item.get("country") or "").lower(),
+        ):
+            continue
+        if max_latency is not None:
+            latency = item.get("response_time_ms")
+            if latency is None or latency > max_latency:
+                continue
+        selected.append(item)
+    return selected
+
+
+async def stream_export(
+    chunks: AsyncIterator[list[dict]],
+    fmt: str,
+    alive_only: bool = False,
+    country: str | None = None,
+    max_latency: int | None = None,
+) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        encode, header, footer = _csv_encoder()
+    elif fmt == "ndjson":
+        encode, header, footer = _ndjson_encode, None, None
+    elif fmt == "parquet":
+        encode, header, footer = _parquet_encoder()
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    if header is not None:
+        yield header()
+    async for chunk in chunks:
+        rows = filter_results(chunk, alive_only, country, max_latency)
+        if rows:
+            yield encode(rows)
+    if footer is not None:
+        data = footer()
+        if data:
+            yield data
+
+
+def _csv_encoder():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    def header() -> bytes:
+        writer.writeheader()
+        return drain()
+
+    def encode(rows: list[dict]) -> bytes:
+        for item in rows:
+            writer.writerow({**item, "pass": item.get("password", "")})
+        return drain()
+
+    return encode, header, None
+
+
+def _ndjson_encode(rows: list[dict]) -> bytes:
+    return "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in rows).encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what ParquetWriter has written so far."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_encoder():
+    if pyarrow is None:
+        raise ValueError("Parquet export needs the `pyarrow` package")
+
+    schema = pyarrow.schema(
+        [
+            ("id", pyarrow.string()),
+            ("proxy_ip", pyarrow.string()),
+            ("proxy_port", pyarrow.string()),
+            ("user", pyarrow.string()),
+            ("password", pyarrow.string()),
+            ("status", pyarrow.string()),
+            ("exit_ip", pyarrow.string()),
+            ("response_time_ms", pyarrow.int64()),
+            ("error", pyarrow.string()),
+            ("country", pyarrow.string()),
+            ("country_code", pyarrow.string()),
+            ("city", pyarrow.string()),
+            ("dns_ms", pyarrow.int64()),
+            ("connect_ms", pyarrow.int64()),
+            ("handshake_ms", pyarrow.int64()),
+            ("tls_ms", pyarrow.int64()),
+            ("ttfb_ms", pyarrow.int64()),
+            ("body_ms", pyarrow.int64()),
+            ("throughput_bps", pyarrow.int64()),
+            ("throughput_ttfb_ms", pyarrow.int64()),
+            ("throughput_error", pyarrow.string()),
+            ("cached", pyarrow.bool_()),
+        ]
+    )
+    defaults = {field.name: "" if field.type == pyarrow.string() else None for field in schema}
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+
+    def encode(rows: list[dict]) -> bytes:
+        columns = {
+            name: [item.get(name, default) for item in rows]
+            for name, default in defaults.items()
+        }
+        # One row group per chunk keeps the writer's buffer bounded.
+        writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+        return sink.drain()
+
+    def footer() -> bytes:
+        writer.close()
+        return sink.drain()
+
+    return encode, None, footer
@@ -0,0 +1,42 @@
+"""
+Per-session aggregates stored in `proxy_session_rollups`.
+
+`session_rollups` reduces one session's results to a few rows; the
+analytics endpoint sums them in SQL. Totals and latency sums (not
+averages) are stored so any set of sessions combines exactly.
+"""
+
+from collections.abc import Iterable
+
+SESSION = "session"
+TAG = "tag"
+COUNTRY = "country"
+DIMENSIONS = (SESSION, TAG, COUNTRY)
+
+KEY_LENGTH = 255
+
+# (dimension, key, total, alive, latency_sum, latency_count)
+RollupRow = tuple[str, str, int, int, int, int]
+
+
+def session_rollups(results: Iterable[dict], tags: Iterable[str]) -> list[RollupRow]:
+    overall = [0, 0, 0, 0]
+    countries: dict[str, list[int]] = {}
+    for item in results:
+        alive = item.get("status") == "OK"
+        latency = item.get("response_time_ms") if alive else None
+        code = (item.get("country_code") or "").upper()
+        targets = (overall, countries.setdefault(code, [0, 0, 0, 0])) if code else (overall,)
+        for counts in targets:
+            counts[0] += 1
+            if alive:
+                counts[1] += 1
+                if latency is not None:
+                    counts[2] += latency
+                    counts[3] += 1
+
+    rows: list[RollupRow] = [(SESSION, "", *overall)]
+    unique_tags = dict.fromkeys(tag.strip()[:KEY_LENGTH] for tag in tags if tag.strip())
+    rows.extend((TAG, tag, *overall) for tag in unique_tags)
+    rows.extend((COUNTRY, code[:KEY_LENGTH], *counts) for code, counts in countries.items())
+    return rows
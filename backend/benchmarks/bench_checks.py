@@ -0,0 +1,231 @@
+"""
+Offline proxy-check benchmark.
+
+Runs the CLI checker (`main.check_proxy` on a thread pool) and the web service
+path (`CheckService.stream_check_events`) against a local `ProxySimulator`,
+and reports checks/s, time to first result and memory for each.
+
+Usage:
+    uv run python -m benchmarks.bench_checks [options]
+
+Examples:
+    uv run python -m benchmarks.bench_checks --proxies 2000 --workers 200
+    uv run python -m benchmarks.bench_checks --path service --failure-rate 0.2 --blackhole-rate 0.05
+    uv run python -m benchmarks.bench_checks --socks5 500 --auth --output json > checks.json
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+
+import main as cli
+from app.schemas.check import CheckRequest
+from app.services.check_service import CheckService
+
+from .fixtures import MemoryRepository, OfflineGeoIP, raise_fd_limit
+from .simulator import ProxySimulator, SimulatorConfig
+
+
+@dataclass
+class BenchResult:
+    """Measurements for one checker path."""
+
+    path: str
+    total: int
+    alive: int
+    elapsed: float  # seconds
+    first_result: float | None  # seconds until the first result was available
+    peak_memory_mb: float  # tracemalloc peak, or process peak RSS
+
+    @property
+    def checks_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_cli(
+    sim: ProxySimulator,
+    proxy_type: str,
+    workers: int,
+    timeout: int,
+) -> tuple[int, int, float, float | None]:
+    """Replicate `main.main` without console output."""
+    cli.CHECK_URL = sim.judge_url
+    cli.PROXY_TYPE = proxy_type
+    cli.TIMEOUT = timeout
+    proxies = [proxy.as_dict() for proxy in sim.proxies if proxy.kind == proxy_type]
+
+    first_result = None
+    alive = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(cli.check_proxy, proxy) for proxy in proxies]
+        for future in as_completed(futures):
+            if first_result is None:
+                first_result = time.perf_counter() - start
+            if future.result()["status"] == "OK":
+                alive += 1
+    return len(proxies), alive, time.perf_counter() - start, first_result
+
+
+async def bench_service(
+    sim: ProxySimulator,
+    proxy_type: str,
+    workers: int,
+    timeout: int,
+) -> tuple[int, int, float, float | None]:
+    """Drain `CheckService.stream_check_events` as the SSE endpoint would."""
+    service = CheckService(
+        session_repository=MemoryRepository(),
+        geoip_service=OfflineGeoIP(),
+    )
+    request = CheckRequest(
+        proxies="\n".join(sim.lines(proxy_type)),
+        check_url=sim.judge_url,
+        timeout=timeout,
+        max_workers=workers,
+        proxy_type=proxy_type,
+    )
+
+    total = alive = 0
+    first_result = None
+    start = time.perf_counter()
+    async for event in service.stream_check_events(request, owner_sub="bench"):
+        name, _, payload = event.partition("\ndata: ")
+        if name == "event: result" and first_result is None:
+            first_result = time.perf_counter() - start
+        elif name == "event: done":
+            done = json.loads(payload)
+            total, alive = done["total"], done["alive"]
+    return total, alive, time.perf_counter() - start, first_result
+
+
+def run_path(path: str, sim: ProxySimulator, args: argparse.Namespace) -> BenchResult:
+    if args.trace_memory:
+        tracemalloc.start()
+
+    if path == "cli":
+        total, alive, elapsed, first = bench_cli(sim, args.proxy_type, args.workers, args.timeout)
+    else:
+        total, alive, elapsed, first = asyncio.run(
+            bench_service(sim, args.proxy_type, args.workers, args.timeout)
+        )
+
+    if args.trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_memory_mb = peak / (1024 * 1024)
+    else:
+        peak_memory_mb = _peak_rss_mb()
+
+    return BenchResult(
+        path=path,
+        total=total,
+        alive=alive,
+        elapsed=elapsed,
+        first_result=first,
+        peak_memory_mb=peak_memory_mb,
+    )
+
+
+def print_results(results: list[BenchResult], config: SimulatorConfig, args: argparse.Namespace) -> None:
+    memory_label = "tracemalloc peak" if args.trace_memory else "peak RSS"
+    print("\n" + "=" * 64)
+    print("  PROXY CHECK BENCHMARK")
+    print("=" * 64)
+    print(f"  Proxies          : {config.http_proxies} http, {config.socks5_proxies} socks5")
+    print(f"  Checked Type     : {args.proxy_type}")
+    print(f"  Latency          : {config.latency_ms[0]:.0f}-{config.latency_ms[1]:.0f} ms")
+    print(f"  Failure Rate     : {config.failure_rate:.0%}")
+    print(f"  Blackhole Rate   : {config.blackhole_rate:.0%} (timeout {args.timeout}s)")
+    print(f"  Workers          : {args.workers}")
+    for result in results:
+        first = f"{result.first_result * 1000:.1f} ms" if result.first_result is not None else "—"
+        print("-" * 64)
+        print(f"  [{result.path}]")
+        print(f"  Checked          : {result.total} ({result.alive} alive)")
+        print(f"  Elapsed          : {result.elapsed:.2f}s")
+        print(f"  Throughput       : {result.checks_per_second:.1f} checks/s")
+        print(f"  First Result     : {first}")
+        print(f"  Memory           : {result.peak_memory_mb:.1f} MB ({memory_label})")
+    print("=" * 64 + "\n")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline proxy check benchmark")
+    parser.add_argument("--proxies", type=int, default=1000, help="HTTP proxy listeners (default: 1000)")
+    parser.add_argument("--socks5", type=int, default=0, help="SOCKS5 proxy listeners (default: 0)")
+    parser.add_argument(
+        "--proxy-type", default="http", choices=["http", "socks5"],
+        help="Which listeners to check (socks5 needs PySocks; default: http)",
+    )
+    parser.add_argument(
+        "--path", default="both", choices=["cli", "service", "both"],
+        help="Checker path to benchmark (default: both)",
+    )
+    parser.add_argument("--workers", type=int, default=200, help="Concurrent checks (default: 200)")
+    parser.add_argument("--timeout", type=int, default=2, help="Per-check timeout in seconds (default: 2)")
+    parser.add_argument(
+        "--latency", default="20:80",
+        help="Per-proxy latency range in ms as min:max (default: 20:80)",
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of failing proxies")
+    parser.add_argument("--blackhole-rate", type=float, default=0.0, help="Share of silent proxies")
+    parser.add_argument("--auth", action="store_true", help="Require user/pass on every proxy")
+    parser.add_argument("--seed", type=int, default=1337, help="Seed for proxy profiles")
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="Measure Python allocations with tracemalloc (slower) instead of peak RSS",
+    )
+    parser.add_argument("--output", default="text", choices=["text", "json"])
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    args = parse_args()
+    low, _, high = args.latency.partition(":")
+    config = SimulatorConfig(
+        http_proxies=args.proxies,
+        socks5_proxies=args.socks5,
+        latency_ms=(float(low), float(high or low)),
+        failure_rate=args.failure_rate,
+        blackhole_rate=args.blackhole_rate,
+        auth=args.auth,
+        seed=args.seed,
+    )
+    paths = ["cli", "service"] if args.path == "both" else [args.path]
+
+    raise_fd_limit()
+    with ProxySimulator(config) as sim:
+        results = [run_path(path, sim, args) for path in paths]
+
+    if args.output == "json":
+        print(json.dumps(
+            {
+                "simulator": asdict(config),
+                "workers": args.workers,
+                "timeout": args.timeout,
+                "proxy_type": args.proxy_type,
+                "results": [
+                    {**asdict(result), "checks_per_second": result.checks_per_second}
+                    for result in results
+                ],
+            },
+            indent=2,
+        ))
+    else:
+        print_results(results, config, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
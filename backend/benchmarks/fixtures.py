@@ -0,0 +1,27 @@
+"""Offline stand-ins for services that would otherwise reach the network."""
+
+import resource
+
+
+class MemoryRepository:
+    """Stands in for `SessionRepository`; keeps the saved record in memory."""
+
+    def __init__(self) -> None:
+        self.saved = None
+
+    async def upsert(self, session) -> None:
+        self.saved = session
+
+
+class OfflineGeoIP:
+    """Stands in for `GeoIPService`, which would call ip-api.com."""
+
+    async def resolve_countries(self, ips: list[str]) -> dict[str, dict[str, str]]:
+        return {}
+
+
+def raise_fd_limit() -> None:
+    """Thousands of listeners plus client sockets need more than the default 1024 fds."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
@@ -0,0 +1,448 @@
+"""
+Local proxy simulator for offline, reproducible benchmarks.
+
+Starts a judge server (returns `{"origin": <exit ip>}` like httpbin's `/ip`,
+`n` random bytes for `/bytes/<n>` and a chain of `n` redirects ending at
+`/ip` for `/redirect/<n>`) plus any number of fake HTTP and SOCKS5 proxy
+listeners on localhost. Pass `judge_ssl` to serve the judge over HTTPS.
+Each proxy gets a deterministic profile (latency, healthy / failing /
+blackholed, optional auth) derived from the configured seed, so two runs
+with the same configuration see the same pool.
+
+Everything runs on a private event loop in a background thread, so the
+simulator can serve both the threaded CLI checker and the async web service
+from the same process:
+
+    with ProxySimulator(SimulatorConfig(http_proxies=500)) as sim:
+        for proxy in sim.proxies:
+            ...  # proxy.line() -> "127.0.0.1:40123:user:pass"
+        sim.judge_url  # -> "http://127.0.0.1:40001/ip"
+"""
+
+import asyncio
+import base64
+import ipaddress
+import json
+import os
+import random
+import socket
+import ssl
+import struct
+import threading
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+_HOST = "127.0.0.1"
+_EXIT_IP_HEADER = "X-Mock-Exit-IP"
+_EXIT_NETWORK = ipaddress.ip_network("198.18.0.0/15")  # RFC 2544 benchmarking range
+# Repeated to fill `/bytes/<n>`; random like the API judge's payload, so
+# compression along the way cannot inflate measured throughput.
+_PAYLOAD = os.urandom(64 * 1024)
+
+
+@dataclass
+class SimulatorConfig:
+    """Shape of the simulated proxy pool."""
+
+    http_proxies: int = 100
+    socks5_proxies: int = 0
+    latency_ms: tuple[float, float] = (20.0, 80.0)  # uniform range per proxy
+    failure_rate: float = 0.0  # share of proxies that reject every request
+    blackhole_rate: float = 0.0  # share of proxies that accept but never answer
+    throughput_kbps: tuple[float, float] | None = None  # uniform download cap per proxy
+    auth: bool = False  # require user/pass on every proxy
+    username: str = "bench"
+    password: str = "bench-pass"
+    seed: int = 1337
+
+
+@dataclass
+class SimulatedProxy:
+    """One fake proxy listener and the behaviour it was assigned."""
+
+    kind: str  # "http" or "socks5"
+    host: str
+    port: int
+    exit_ip: str
+    latency: float  # seconds
+    behavior: str  # "ok", "fail" or "blackhole"
+    throughput: float | None = None  # bytes/s towards the client; None is unthrottled
+    user: str = ""
+    password: str = ""
+
+    def line(self, delimiter: str = ":") -> str:
+        """Render the proxy as an input line (`ip:port[:user:pass]`)."""
+        parts = [self.host, str(self.port)]
+        if self.user:
+            parts += [self.user, self.password]
+        return delimiter.join(parts)
+
+    def as_dict(self) -> dict[str, str]:
+        """Render the proxy as the dict produced by `parse_proxy`."""
+        proxy = {"ip": self.host, "port": str(self.port)}
+        if self.user:
+            proxy["user"] = self.user
+            proxy["pass"] = self.password
+        return proxy
+
+
+@dataclass
+class _Stats:
+    connections: int = 0
+    rejected: int = 0
+    blackholed: int = 0
+    judge_requests: int = 0
+
+
+class ProxySimulator:
+    """Runs the judge and proxy listeners on a background event loop."""
+
+    def __init__(
+        self,
+        config: SimulatorConfig | None = None,
+        judge_ssl: ssl.SSLContext | None = None,
+    ) -> None:
+        self.config = config or SimulatorConfig()
+        self.judge_ssl = judge_ssl
+        self.proxies: list[SimulatedProxy] = []
+        self.judge_port: int = 0
+        self.stats = _Stats()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._servers: list[asyncio.Server] = []
+        self._handlers: set[asyncio.Task] = set()
+
+    @property
+    def judge_url(self) -> str:
+        scheme = "https" if self.judge_ssl is not None else "http"
+        return f"{scheme}://{_HOST}:{self.judge_port}/ip"
+
+    def lines(self, kind: str | None = None) -> list[str]:
+        return [proxy.line() for proxy in self.proxies if kind is None or proxy.kind == kind]
+
+    def start(self) -> "ProxySimulator":
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="proxy-simulator",
+            daemon=True,
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self) -> "ProxySimulator":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def _start(self) -> None:
+        judge = await asyncio.start_server(
+            self._tracked(self._handle_judge),
+            _HOST,
+            0,
+            ssl=self.judge_ssl,
+        )
+        self._servers.append(judge)
+        self.judge_port = judge.sockets[0].getsockname()[1]
+
+        rng = random.Random(self.config.seed)
+        kinds = ["http"] * self.config.http_proxies + ["socks5"] * self.config.socks5_proxies
+        for index, kind in enumerate(kinds):
+            roll = rng.random()
+            if roll < self.config.failure_rate:
+                behavior = "fail"
+            elif roll < self.config.failure_rate + self.config.blackhole_rate:
+                behavior = "blackhole"
+            else:
+                behavior = "ok"
+
+            low, high = self.config.latency_ms
+            throughput = None
+            if self.config.throughput_kbps is not None:
+                throughput = rng.uniform(*self.config.throughput_kbps) * 1000
+            proxy = SimulatedProxy(
+                kind=kind,
+                host=_HOST,
+                port=0,
+                exit_ip=str(_EXIT_NETWORK[index % _EXIT_NETWORK.num_addresses + 1]),
+                latency=rng.uniform(low, high) / 1000,
+                behavior=behavior,
+                throughput=throughput,
+                user=self.config.username if self.config.auth else "",
+                password=self.config.password if self.config.auth else "",
+            )
+            handler = self._handle_http_proxy if kind == "http" else self._handle_socks5_proxy
+            server = await asyncio.start_server(
+                self._tracked(handler, proxy),
+                _HOST,
+                0,
+                backlog=1024,
+            )
+            proxy.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+            self.proxies.append(proxy)
+
+    async def _stop(self) -> None:
+        for server in self._servers:
+            server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+
+    def _tracked(self, handler, *args):
+        async def run(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            task = asyncio.current_task()
+            self._handlers.add(task)
+            try:
+                await handler(*args, reader, writer)
+            except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            finally:
+                self._handlers.discard(task)
+                writer.close()
+
+        return run
+
+    # ── judge ────────────────────────────────────────────────────────────────
+
+    async def _handle_judge(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        method, target, headers = await _read_http_head(reader)
+        self.stats.judge_requests += 1
+        path = urlsplit(target).path or target
+
+        if path == "/ip":
+            origin = headers.get(_EXIT_IP_HEADER.lower()) or writer.get_extra_info("peername")[0]
+            body = json.dumps({"origin": origin}).encode()
+            writer.write(_http_response(200, "OK", body, "application/json"))
+        elif path.startswith("/bytes/") and path[7:].isdigit():
+            size = int(path[7:])
+            body = (_PAYLOAD * (size // len(_PAYLOAD) + 1))[:size]
+            writer.write(_http_response(200, "OK", body, "application/octet-stream"))
+        elif path.startswith("/redirect/") and path[10:].isdigit():
+            remaining = int(path[10:]) - 1
+            location = f"/redirect/{remaining}" if remaining > 0 else "/ip"
+            writer.write(_http_response(302, "Found", b"", "text/plain", extra={"Location": location}))
+        else:
+            writer.write(_http_response(404, "Not Found", b"not found", "text/plain"))
+        await writer.drain()
+
+    # ── proxies ──────────────────────────────────────────────────────────────
+
+    async def _apply_behavior(self, proxy: SimulatedProxy, reader: asyncio.StreamReader) -> bool:
+        """Sleep for the proxy's latency; return False if it must not forward."""
+        self.stats.connections += 1
+        await asyncio.sleep(proxy.latency)
+        if proxy.behavior == "blackhole":
+            self.stats.blackholed += 1
+            while await reader.read(65536):
+                pass
+            return False
+        if proxy.behavior == "fail":
+            self.stats.rejected += 1
+            return False
+        return True
+
+    async def _handle_http_proxy(
+        self,
+        proxy: SimulatedProxy,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        method, target, headers = await _read_http_head(reader)
+
+        if proxy.user:
+            token = base64.b64encode(f"{proxy.user}:{proxy.password}".encode()).decode()
+            if headers.get("proxy-authorization") != f"Basic {token}":
+                writer.write(
+                    _http_response(
+                        407,
+                        "Proxy Authentication Required",
+                        b"",
+                        "text/plain",
+                        extra={"Proxy-Authenticate": 'Basic realm="bench"'},
+                    )
+                )
+                await writer.drain()
+                return
+
+        if not await self._apply_behavior(proxy, reader):
+            if proxy.behavior == "fail":
+                writer.write(_http_response(502, "Bad Gateway", b"upstream failed", "text/plain"))
+                await writer.drain()
+            return
+
+        if method == "CONNECT":
+            host, _, port = target.rpartition(":")
+            upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port))
+            writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            await writer.drain()
+            await _pipe_both(reader, writer, upstream_reader, upstream_writer, proxy.throughput)
+            return
+
+        url = urlsplit(target)
+        upstream_reader, upstream_writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+
+        forwarded = {
+            key: value
+            for key, value in headers.items()
+            if not key.startswith("proxy-") and key not in ("connection", "keep-alive")
+        }
+        forwarded[_EXIT_IP_HEADER] = proxy.exit_ip
+        forwarded["Connection"] = "close"
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(
+            f"{key}: {value}\r\n" for key, value in forwarded.items()
+        )
+        upstream_writer.write(head.encode("latin-1") + b"\r\n")
+        length = int(headers.get("content-length", "0") or 0)
+        if length:
+            upstream_writer.write(await reader.readexactly(length))
+        await upstream_writer.drain()
+
+        await _pipe(upstream_reader, writer, proxy.throughput)
+        upstream_writer.close()
+
+    async def _handle_socks5_proxy(
+        self,
+        proxy: SimulatedProxy,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        version, method_count = await reader.readexactly(2)
+        if version != 5:
+            return
+        methods = await reader.readexactly(method_count)
+
+        if proxy.user:
+            if 2 not in methods:
+                writer.write(b"\x05\xff")
+                await writer.drain()
+                return
+            writer.write(b"\x05\x02")
+            await writer.drain()
+            _, user_length = await reader.readexactly(2)
+            user = (await reader.readexactly(user_length)).decode()
+            (password_length,) = await reader.readexactly(1)
+            password = (await reader.readexactly(password_length)).decode()
+            if (user, password) != (proxy.user, proxy.password):
+                writer.write(b"\x01\x01")
+                await writer.drain()
+                return
+            writer.write(b"\x01\x00")
+        else:
+            writer.write(b"\x05\x00")
+        await writer.drain()
+
+        _, command, _, address_type = await reader.readexactly(4)
+        if address_type == 1:
+            host = socket.inet_ntoa(await reader.readexactly(4))
+        elif address_type == 3:
+            (length,) = await reader.readexactly(1)
+            host = (await reader.readexactly(length)).decode()
+        elif address_type == 4:
+            host = socket.inet_ntop(socket.AF_INET6, await reader.readexactly(16))
+        else:
+            return
+        (port,) = struct.unpack("!H", await reader.readexactly(2))
+
+        if command != 1:
+            writer.write(b"\x05\x07\x00\x01" + b"\x00" * 6)  # command not supported
+            await writer.drain()
+            return
+
+        if not await self._apply_behavior(proxy, reader):
+            if proxy.behavior == "fail":
+                writer.write(b"\x05\x01\x00\x01" + b"\x00" * 6)  # general failure
+                await writer.drain()
+            return
+
+        upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+        writer.write(b"\x05\x00\x00\x01" + socket.inet_aton(_HOST) + struct.pack("!H", 0))
+        await writer.drain()
+        await _pipe_both(reader, writer, upstream_reader, upstream_writer, proxy.throughput)
+
+
+async def _read_http_head(reader: asyncio.StreamReader) -> tuple[str, str, dict[str, str]]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = request_line.split(" ", 2)
+    headers: dict[str, str] = {}
+    for line in header_lines:
+        key, sep, value = line.partition(":")
+        if sep:
+            headers[key.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+def _http_response(
+    status: int,
+    reason: str,
+    body: bytes,
+    content_type: str,
+    extra: dict[str, str] | None = None,
+) -> bytes:
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "close",
+        **(extra or {}),
+    }
+    head = f"HTTP/1.1 {status} {reason}\r\n" + "".join(
+        f"{key}: {value}\r\n" for key, value in headers.items()
+    )
+    return head.encode("latin-1") + b"\r\n" + body
+
+
+async def _pipe(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    rate: float | None = None,
+) -> None:
+    """Copy until EOF, at most `rate` bytes/s if given."""
+    size = 65536 if rate is None else max(int(rate / 100), 1)  # ~10 ms slices when throttled
+    while chunk := await reader.read(size):
+        writer.write(chunk)
+        await writer.drain()
+        if rate is not None:
+            await asyncio.sleep(len(chunk) / rate)
+
+
+async def _pipe_both(
+    client_reader: asyncio.StreamReader,
+    client_writer: asyncio.StreamWriter,
+    upstream_reader: asyncio.StreamReader,
+    upstream_writer: asyncio.StreamWriter,
+    rate: float | None = None,
+) -> None:
+    """Tunnel both directions until either side hangs up; `rate` caps downloads."""
+    directions = {
+        asyncio.ensure_future(_pipe(client_reader, upstream_writer)),
+        asyncio.ensure_future(_pipe(upstream_reader, client_writer, rate)),
+    }
+    try:
+        await asyncio.wait(directions, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for direction in directions:
+            direction.cancel()
+        await asyncio.gather(*directions, return_exceptions=True)
+        upstream_writer.close()
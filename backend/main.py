@@ -1,3 +1,4 @@
+import argparse
 import csv
 import os
 import sys
@@ -57,6 +58,7 @@ def check_proxy(proxy: dict) -> dict:
         "proxy_ip": proxy["ip"],
         "proxy_port": proxy["port"],
         "user": proxy.get("user", ""),
+        "pass": proxy.get("pass", ""),
         "status": "FAIL",
         "exit_ip": "",
         "response_time_ms": "",
@@ -101,8 +103,11 @@ def load_proxies(path: str) -> list[dict]:
     return proxies
 
 
-def write_results(results: list[dict]) -> str:
-    """Write results to a timestamped CSV and return the file path."""
+def write_results(results: list[dict], include_passwords: bool = False) -> str:
+    """
+    Write results to a timestamped CSV and return the file path. Proxy
+    passwords are left out unless `include_passwords` is set.
+    """
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     filename = f"proxy_results_{timestamp}.csv"
@@ -112,11 +117,14 @@ def write_results(results: list[dict]) -> str:
         "proxy_ip",
         "proxy_port",
         "user",
+        "pass",
         "status",
         "exit_ip",
         "response_time_ms",
         "error",
     ]
+    if not include_passwords:
+        fieldnames.remove("pass")
 
     with open(filepath, "w", newline="", encoding="utf-8") as fh:
         writer = csv.DictWriter(fh, fieldnames=fieldnames)
@@ -128,6 +136,19 @@ def write_results(results: list[dict]) -> str:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Check proxies from input.txt")
+    parser.add_argument(
+        "--profile", default=None, metavar="PATH",
+        help="Sample all threads while checking and write collapsed stacks "
+        "(flamegraph.pl/speedscope input) to PATH",
+    )
+    parser.add_argument(
+        "--include-passwords", action="store_true",
+        help="Write proxy passwords in plaintext to the results CSV (needed to "
+        "feed it to stress_test.py --proxies for authenticated proxies)",
+    )
+    args = parser.parse_args()
+
     proxies = load_proxies(INPUT_FILE)
     if not proxies:
         print("[!] No proxies found in input file.")
@@ -140,6 +161,12 @@ def main():
     results: list[dict] = []
     ok_count = 0
 
+    profiler = None
+    if args.profile:
+        from app.core.profiling import SamplingProfiler
+
+        profiler = SamplingProfiler().start()
+
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
         futures = {pool.submit(check_proxy, p): p for p in proxies}
         for i, future in enumerate(as_completed(futures), 1):
@@ -151,7 +178,12 @@ def main():
             if result["status"] == "OK":
                 ok_count += 1
 
-    filepath = write_results(results)
+    if profiler is not None:
+        profiler.stop()
+        profiler.write(args.profile)
+        print(f"[*] Profile: {profiler.samples} samples written to {args.profile}")
+
+    filepath = write_results(results, include_passwords=args.include_passwords)
     print(f"\n[✓] Done — {ok_count}/{total} proxies alive")
     print(f"[✓] Results saved to {filepath}")
 
@@ -1,24 +1,74 @@
 """
 Async HTTP Stress Tester
 
-Stress-test any HTTP URL with configurable concurrency, duration, and request count.
+Stress-test any HTTP URL with configurable concurrency, duration, and request count,
+or replay a weighted mix of requests described in a scenario file.
 
 Usage:
     uv run stress_test.py <url> [options]
+    uv run stress_test.py --scenario scenario.json [base_url] [options]
 
 Examples:
     uv run stress_test.py https://httpbin.org/get --duration 10 --concurrency 100
     uv run stress_test.py https://example.com/api -n 500 -c 50
     uv run stress_test.py https://example.com -d 30 -c 200 --method POST --body '{"key":"val"}'
+    uv run stress_test.py --scenario scenario.json http://localhost:8000 -d 30
+    uv run stress_test.py https://example.com --proxies output/proxy_results.csv -d 30
+    uv run stress_test.py http://localhost:8000/api/health -d 30 --profile stress.collapsed
 """
 
 import argparse
 import asyncio
+import bisect
+import csv
+import itertools
+import json
+import os
+import random
+import socket
 import statistics
+import string
+import sys
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
+from typing import Any
 
 import aiohttp
+from aiohttp.abc import AbstractResolver
+
+try:  # YAML scenarios are optional; JSON works out of the box.
+    import yaml
+except ImportError:  # pragma: no cover - depends on the local environment
+    yaml = None
+
+
+@dataclass(frozen=True)
+class PreparedRequest:
+    """A fully rendered request, ready to be sent without further processing."""
+
+    name: str
+    method: str
+    url: str
+    headers: dict[str, str] | None = None
+    body: bytes | None = None
+
+
+@dataclass
+class ScenarioEntry:
+    """One weighted request in a scenario, with one variant per data row."""
+
+    name: str
+    weight: float
+    variants: list[PreparedRequest]
+
+
+@dataclass
+class Scenario:
+    """A weighted mix of requests loaded from a scenario file."""
+
+    path: str
+    entries: list[ScenarioEntry]
+    seed: int | None = None
 
 
 @dataclass
@@ -33,6 +83,12 @@ class StressConfig:
     timeout: float = 10.0
     headers: dict[str, str] = field(default_factory=dict)
     body: str | None = None
+    scenario: Scenario | None = None
+    proxy_pool: "ProxyPool | None" = None
+    output: str = "text"  # "text" or "json"
+    compare: str | None = None  # path to a baseline JSON report
+    thresholds: "RegressionThresholds" = field(default_factory=lambda: RegressionThresholds())
+    profile: str | None = None  # write a collapsed-stack profile here
 
 
 @dataclass
@@ -43,6 +99,8 @@ class RequestResult:
     latency: float = 0.0  # seconds
     error: str | None = None
     bytes_received: int = 0
+    endpoint: str | None = None
+    proxy: str | None = None
 
 
 @dataclass
@@ -57,6 +115,22 @@ class StressReport:
     status_codes: dict[int, int] = field(default_factory=dict)
     errors: dict[str, int] = field(default_factory=dict)
     total_bytes: int = 0
+    endpoints: dict[str, "StressReport"] = field(default_factory=dict)
+    proxies: dict[str, "StressReport"] = field(default_factory=dict)
+    ejected_proxies: list[str] = field(default_factory=list)
+
+    def add(self, result: RequestResult) -> None:
+        """Fold a single request result into the aggregate counters."""
+        self.total_requests += 1
+        self.total_bytes += result.bytes_received
+        if result.error:
+            self.failed += 1
+            self.errors[result.error] = self.errors.get(result.error, 0) + 1
+        else:
+            self.successful += 1
+            self.latencies.append(result.latency)
+            if result.status is not None:
+                self.status_codes[result.status] = self.status_codes.get(result.status, 0) + 1
 
     @property
     def rps(self) -> float:
@@ -86,6 +160,145 @@ class StressReport:
     def max_latency(self) -> float:
         return max(self.latencies) if self.latencies else 0
 
+    @property
+    def error_rate(self) -> float:
+        return self.failed / self.total_requests * 100 if self.total_requests else 0
+
+    def histogram(self) -> list[dict[str, float | int | None]]:
+        """Bucket successful latencies (ms) using `HISTOGRAM_BOUNDS_MS` upper bounds."""
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for latency in self.latencies:
+            counts[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, latency * 1000)] += 1
+        return [
+            {"le_ms": bound, "count": count}
+            for bound, count in zip([*HISTOGRAM_BOUNDS_MS, None], counts)
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the report (latencies in ms, raw samples as histogram buckets)."""
+        return {
+            "total_requests": self.total_requests,
+            "successful": self.successful,
+            "failed": self.failed,
+            "elapsed": round(self.elapsed, 4),
+            "rps": round(self.rps, 3),
+            "error_rate": round(self.error_rate, 4),
+            "total_bytes": self.total_bytes,
+            "latency_ms": {
+                "avg": round(self.avg_latency * 1000, 3),
+                "min": round(self.min_latency * 1000, 3),
+                "max": round(self.max_latency * 1000, 3),
+                "p50": round(self.p50 * 1000, 3),
+                "p95": round(self.p95 * 1000, 3),
+                "p99": round(self.p99 * 1000, 3),
+            },
+            "histogram": self.histogram(),
+            "status_codes": {str(code): count for code, count in self.status_codes.items()},
+            "errors": dict(self.errors),
+            "endpoints": {name: item.to_dict() for name, item in self.endpoints.items()},
+            "proxies": {label: item.to_dict() for label, item in self.proxies.items()},
+            "ejected_proxies": list(self.ejected_proxies),
+        }
+
+
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+
+
+@dataclass
+class RegressionThresholds:
+    """Allowed drift from a baseline before a run counts as a regression."""
+
+    max_rps_drop: float = 10.0  # percent
+    max_latency_increase: float = 10.0  # percent, applied to avg/p50/p95/p99
+    max_error_rate_increase: float = 1.0  # percentage points
+
+
+@dataclass
+class MetricDiff:
+    """Comparison of one metric between a baseline and the current run."""
+
+    scope: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # percent, or percentage points for error_rate
+    regression: bool
+
+
+def _relative_change(baseline: float, current: float) -> float:
+    if baseline == 0:
+        return 0.0 if current == 0 else 100.0
+    return (current - baseline) / baseline * 100
+
+
+def _compare_scope(
+    scope: str,
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    thresholds: RegressionThresholds,
+) -> list[MetricDiff]:
+    diffs: list[MetricDiff] = []
+
+    change = _relative_change(baseline["rps"], current["rps"])
+    diffs.append(
+        MetricDiff(scope, "rps", baseline["rps"], current["rps"], change,
+                   change < -thresholds.max_rps_drop)
+    )
+
+    for key in ("avg", "p50", "p95", "p99"):
+        before = baseline["latency_ms"][key]
+        after = current["latency_ms"][key]
+        change = _relative_change(before, after)
+        diffs.append(
+            MetricDiff(scope, f"{key}_ms", before, after, change,
+                       change > thresholds.max_latency_increase)
+        )
+
+    change = current["error_rate"] - baseline["error_rate"]
+    diffs.append(
+        MetricDiff(scope, "error_rate", baseline["error_rate"], current["error_rate"], change,
+                   change > thresholds.max_error_rate_increase)
+    )
+    return diffs
+
+
+def compare_reports(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    thresholds: RegressionThresholds,
+) -> list[MetricDiff]:
+    """Diff two serialized reports, overall and for endpoints present in both."""
+    diffs = _compare_scope("overall", baseline["report"], current["report"], thresholds)
+    baseline_endpoints = baseline["report"].get("endpoints", {})
+    for name, endpoint in current["report"].get("endpoints", {}).items():
+        if name in baseline_endpoints:
+            diffs.extend(_compare_scope(name, baseline_endpoints[name], endpoint, thresholds))
+    return diffs
+
+
+def load_baseline(path: str) -> dict[str, Any]:
+    if not os.path.isfile(path):
+        raise ValueError(f"Baseline file not found: {path}")
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    if not isinstance(data, dict) or not _is_report(data.get("report")):
+        raise ValueError(f"Not a stress test JSON report: {path}")
+    return data
+
+
+def _is_report(report: Any) -> bool:
+    """Whether `report` has every metric `compare_reports` reads."""
+    if not isinstance(report, dict):
+        return False
+    latency = report.get("latency_ms")
+    return (
+        all(isinstance(report.get(key), (int, float)) for key in ("rps", "error_rate"))
+        and isinstance(latency, dict)
+        and all(isinstance(latency.get(key), (int, float)) for key in ("avg", "p50", "p95", "p99"))
+        and isinstance(report.get("endpoints", {}), dict)
+        and all(_is_report(endpoint) for endpoint in report.get("endpoints", {}).values())
+    )
+
 
 def _percentile(data: list[float], pct: float) -> float:
     """Calculate the given percentile from a sorted-on-the-fly list."""
@@ -98,20 +311,347 @@ def _percentile(data: list[float], pct: float) -> float:
     return sorted_data[f] + (k - f) * (sorted_data[c] - sorted_data[f])
 
 
+def _render(value: Any, variables: dict[str, str]) -> Any:
+    """Substitute `${name}` placeholders in strings nested inside `value`."""
+    if isinstance(value, str):
+        try:
+            return string.Template(value).substitute(variables)
+        except KeyError as exc:
+            raise ValueError(f"Unknown template variable {exc}") from exc
+    if isinstance(value, list):
+        return [_render(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: _render(item, variables) for key, item in value.items()}
+    return value
+
+
+def _read_data_rows(path: str) -> list[dict[str, str]]:
+    """Read template variables from a CSV file (one variant per row)."""
+    if not os.path.isfile(path):
+        raise ValueError(f"Data file not found: {path}")
+    with open(path, newline="", encoding="utf-8") as fh:
+        rows = [dict(row) for row in csv.DictReader(fh)]
+    if not rows:
+        raise ValueError(f"Data file has no rows: {path}")
+    return rows
+
+
+def _read_scenario_file(path: str) -> dict:
+    if not os.path.isfile(path):
+        raise ValueError(f"Scenario file not found: {path}")
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError("YAML scenarios require PyYAML (`uv pip install pyyaml`)")
+            data = yaml.safe_load(fh)
+        else:
+            data = json.load(fh)
+    if not isinstance(data, dict) or not isinstance(data.get("requests"), list):
+        raise ValueError("Scenario must be a mapping with a `requests` list")
+    return data
+
+
+def load_scenario(
+    path: str,
+    base_url: str | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Scenario:
+    """
+    Load a scenario file and pre-render every request variant.
+
+    Templates are expanded and bodies encoded once here, so the hot loop only
+    picks a prepared request and sends it.
+    """
+    data = _read_scenario_file(path)
+    root = os.path.dirname(os.path.abspath(path))
+    base_url = (base_url or data.get("base_url") or "").rstrip("/")
+    variables = {key: str(value) for key, value in (data.get("variables") or {}).items()}
+    shared_headers = {**(data.get("headers") or {}), **(extra_headers or {})}
+
+    entries: list[ScenarioEntry] = []
+    for index, spec in enumerate(data["requests"]):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Request #{index + 1} must be a mapping")
+        method = str(spec.get("method", "GET")).upper()
+        target = spec.get("url") or spec.get("path")
+        if not target:
+            raise ValueError(f"Request #{index + 1} needs a `url` or `path`")
+        name = str(spec.get("name") or f"{method} {target}")
+        weight = float(spec.get("weight", 1))
+        if weight <= 0:
+            raise ValueError(f"Request {name!r} must have a positive weight")
+
+        rows: list[dict[str, str]] = [{}]
+        if spec.get("data"):
+            rows = _read_data_rows(os.path.join(root, spec["data"]))
+
+        variants: list[PreparedRequest] = []
+        for row in rows:
+            row_vars = {**variables, **row}
+            url = _render(str(target), row_vars)
+            if not url.startswith(("http://", "https://")):
+                if not base_url:
+                    raise ValueError(f"Request {name!r} uses a relative path but no base URL is set")
+                url = f"{base_url}/{url.lstrip('/')}"
+
+            headers = {**shared_headers, **(spec.get("headers") or {})}
+            body: bytes | None = None
+            if spec.get("json") is not None:
+                body = json.dumps(_render(spec["json"], row_vars)).encode("utf-8")
+                headers.setdefault("Content-Type", "application/json")
+            elif spec.get("body") is not None:
+                body = _render(str(spec["body"]), row_vars).encode("utf-8")
+
+            variants.append(
+                PreparedRequest(
+                    name=name,
+                    method=method,
+                    url=url,
+                    headers=_render(headers, row_vars) or None,
+                    body=body,
+                )
+            )
+        entries.append(ScenarioEntry(name=name, weight=weight, variants=variants))
+
+    if not entries:
+        raise ValueError("Scenario has no requests")
+    return Scenario(path=path, entries=entries, seed=data.get("seed"))
+
+
+class RequestPicker:
+    """Weighted selection of prepared requests, cycling through data variants."""
+
+    def __init__(self, config: StressConfig) -> None:
+        if config.scenario is None:
+            body = config.body.encode("utf-8") if config.body is not None else None
+            request = PreparedRequest(
+                name=f"{config.method} {config.url}",
+                method=config.method,
+                url=config.url,
+                headers=config.headers or None,
+                body=body,
+            )
+            entries = [ScenarioEntry(name=request.name, weight=1, variants=[request])]
+            seed = None
+        else:
+            entries = config.scenario.entries
+            seed = config.scenario.seed
+
+        self._rng = random.Random(seed)
+        self._cycles = [itertools.cycle(entry.variants) for entry in entries]
+        self._cumulative = list(itertools.accumulate(entry.weight for entry in entries))
+        self._total = self._cumulative[-1]
+        self._single = self._cycles[0] if len(entries) == 1 else None
+
+    def next(self) -> PreparedRequest:
+        if self._single is not None:
+            return next(self._single)
+        index = bisect.bisect_right(self._cumulative, self._rng.random() * self._total)
+        return next(self._cycles[min(index, len(self._cycles) - 1)])
+
+
+@dataclass
+class ProxyEndpoint:
+    """An upstream proxy that load is routed through."""
+
+    label: str
+    url: str
+    auth: aiohttp.BasicAuth | None = None
+    latency: float = 1.0  # seconds; moving average seeded from the checker
+    consecutive_failures: int = 0
+    ejected: bool = False
+
+
+# Statuses that blame the proxy rather than the target: bad credentials, or
+# an upstream the proxy could not reach.
+PROXY_FAILURE_STATUSES = frozenset({407, 502, 503, 504})
+
+
+class ProxyPool:
+    """
+    Spreads requests across alive proxies and ejects the ones that keep failing.
+
+    - `round-robin` cycles through the pool in order.
+    - `least-latency` picks the faster of two random proxies (power of two
+      choices), using a moving average seeded from `response_time_ms`.
+    """
+
+    STRATEGIES = ("round-robin", "least-latency")
+
+    def __init__(
+        self,
+        proxies: list[ProxyEndpoint],
+        strategy: str = "round-robin",
+        max_failures: int = 3,
+    ) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown proxy strategy: {strategy}")
+        self._alive = list(proxies)
+        self._strategy = strategy
+        self._max_failures = max_failures
+        self._cursor = 0
+        self._rng = random.Random()
+        self.ejected: list[ProxyEndpoint] = []
+
+    @property
+    def size(self) -> int:
+        return len(self._alive)
+
+    def acquire(self) -> ProxyEndpoint | None:
+        if not self._alive:
+            return None
+        if self._strategy == "round-robin" or len(self._alive) == 1:
+            self._cursor = (self._cursor + 1) % len(self._alive)
+            return self._alive[self._cursor]
+        first, second = self._rng.sample(self._alive, 2)
+        return first if first.latency <= second.latency else second
+
+    def record(self, proxy: ProxyEndpoint, result: RequestResult) -> None:
+        if result.error is None and result.status not in PROXY_FAILURE_STATUSES:
+            proxy.consecutive_failures = 0
+            proxy.latency = proxy.latency * 0.8 + result.latency * 0.2
+            return
+
+        proxy.consecutive_failures += 1
+        if proxy.consecutive_failures >= self._max_failures and not proxy.ejected:
+            proxy.ejected = True
+            self._alive.remove(proxy)
+            self.ejected.append(proxy)
+
+
+def load_proxy_pool(
+    path: str,
+    proxy_type: str = "http",
+    strategy: str = "round-robin",
+    max_failures: int = 3,
+) -> ProxyPool:
+    """
+    Load proxies from a plain `ip:port[:user:pass]` list or a results CSV
+    written by `main.write_results` (only rows with status OK are used).
+    The CSV has passwords only when written with `--include-passwords`.
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"Proxy file not found: {path}")
+
+    rows: list[tuple[dict[str, str], str]] = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(fh):
+                if row.get("status", "OK") != "OK":
+                    continue
+                proxy = {
+                    "ip": row.get("proxy_ip", ""),
+                    "port": row.get("proxy_port", ""),
+                    "user": row.get("user", ""),
+                    "pass": row.get("pass", ""),
+                }
+                if proxy["ip"] and proxy["port"]:
+                    rows.append((proxy, row.get("response_time_ms", "")))
+        else:
+            rows.extend((proxy, "") for proxy in _parse_proxy_list(fh))
+
+    endpoints: list[ProxyEndpoint] = []
+    for proxy, response_time_ms in rows:
+        auth = None
+        if proxy.get("user") and proxy.get("pass"):
+            auth = aiohttp.BasicAuth(proxy["user"], proxy["pass"])
+        try:
+            latency = int(response_time_ms) / 1000
+        except ValueError:
+            latency = 1.0
+        endpoints.append(
+            ProxyEndpoint(
+                label=f"{proxy['ip']}:{proxy['port']}",
+                url=f"{proxy_type}://{proxy['ip']}:{proxy['port']}",
+                auth=auth,
+                latency=latency,
+            )
+        )
+
+    if not endpoints:
+        raise ValueError(f"No usable proxies in {path}")
+    return ProxyPool(endpoints, strategy=strategy, max_failures=max_failures)
+
+
+def _parse_proxy_list(lines) -> list[dict[str, str]]:
+    """Parse `ip:port[:user:pass]` lines, skipping comments, bad ports and repeats."""
+    seen: set[tuple[str, ...]] = set()
+    proxies: list[dict[str, str]] = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = [part.strip() for part in line.split(":")]
+        if len(parts) < 2 or not parts[0] or not parts[1].isdigit() or not 1 <= int(parts[1]) <= 65535:
+            continue
+        key = tuple(parts[:4])
+        if key in seen:
+            continue
+        seen.add(key)
+        proxies.append(dict(zip(("ip", "port", "user", "pass"), parts)))
+    return proxies
+
+
+def _make_resolver() -> AbstractResolver | None:
+    """
+    The API's shared, TTL-aware DNS cache when run from the backend tree;
+    None (aiohttp's default resolver) when this file is used on its own.
+    """
+    try:
+        from app.core.dns import get_dns_cache
+    except ImportError:
+        return None
+    return CachedResolver(get_dns_cache())
+
+
+class CachedResolver(AbstractResolver):
+    """aiohttp resolver backed by the API's `DNSCache`."""
+
+    def __init__(self, cache) -> None:
+        self._cache = cache
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[dict[str, Any]]:
+        addresses = [
+            {
+                "hostname": host,
+                "host": ip,
+                "port": port,
+                "family": address_family,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+            for address_family, ip in await self._cache.lookup(host)
+            if family in (socket.AF_UNSPEC, address_family)
+        ]
+        if not addresses:
+            raise OSError(f"No address for {host} in family {family}")
+        return addresses
+
+    async def close(self) -> None:
+        pass
+
+
 async def _do_request(
     session: aiohttp.ClientSession,
-    config: StressConfig,
+    request: PreparedRequest,
+    timeout: aiohttp.ClientTimeout,
+    proxy: ProxyEndpoint | None = None,
 ) -> RequestResult:
     """Execute a single HTTP request and return its result."""
+    proxy_label = proxy.label if proxy else None
     start = time.perf_counter()
     try:
         async with session.request(
-            config.method,
-            config.url,
-            headers=config.headers or None,
-            data=config.body,
-            timeout=aiohttp.ClientTimeout(total=config.timeout),
+            request.method,
+            request.url,
+            headers=request.headers,
+            data=request.body,
+            timeout=timeout,
             ssl=False,
+            proxy=proxy.url if proxy else None,
+            proxy_auth=proxy.auth if proxy else None,
         ) as resp:
             body = await resp.read()
             latency = time.perf_counter() - start
@@ -119,17 +659,45 @@ async def _do_request(
                 status=resp.status,
                 latency=latency,
                 bytes_received=len(body),
+                endpoint=request.name,
+                proxy=proxy_label,
             )
     except asyncio.CancelledError:
         raise
     except Exception as exc:
         latency = time.perf_counter() - start
-        return RequestResult(latency=latency, error=type(exc).__name__)
+        return RequestResult(
+            latency=latency,
+            error=type(exc).__name__,
+            endpoint=request.name,
+            proxy=proxy_label,
+        )
+
+
+async def _send(
+    session: aiohttp.ClientSession,
+    picker: RequestPicker,
+    timeout: aiohttp.ClientTimeout,
+    pool: ProxyPool | None,
+) -> RequestResult:
+    """Pick the next request (and proxy, if routing through a pool) and send it."""
+    request = picker.next()
+    if pool is None:
+        return await _do_request(session, request, timeout)
+
+    proxy = pool.acquire()
+    if proxy is None:
+        return RequestResult(error="NoProxyAvailable", endpoint=request.name)
+    result = await _do_request(session, request, timeout, proxy)
+    pool.record(proxy, result)
+    return result
 
 
 async def _worker(
     session: aiohttp.ClientSession,
-    config: StressConfig,
+    picker: RequestPicker,
+    timeout: aiohttp.ClientTimeout,
+    pool: ProxyPool | None,
     results: list[RequestResult],
     stop_event: asyncio.Event,
     semaphore: asyncio.Semaphore,
@@ -139,7 +707,10 @@ async def _worker(
         async with semaphore:
             if stop_event.is_set():
                 break
-            result = await _do_request(session, config)
+            if pool is not None and pool.size == 0:
+                stop_event.set()
+                break
+            result = await _send(session, picker, timeout, pool)
             results.append(result)
 
 
@@ -154,8 +725,16 @@ async def run_stress_test(config: StressConfig) -> StressReport:
     results: list[RequestResult] = []
     stop_event = asyncio.Event()
     semaphore = asyncio.Semaphore(config.concurrency)
+    picker = RequestPicker(config)
+    timeout = aiohttp.ClientTimeout(total=config.timeout)
 
-    connector = aiohttp.TCPConnector(limit=config.concurrency, limit_per_host=config.concurrency)
+    resolver = _make_resolver()
+    connector = aiohttp.TCPConnector(
+        limit=config.concurrency,
+        limit_per_host=config.concurrency,
+        resolver=resolver,
+        use_dns_cache=resolver is None,  # the shared cache already keeps TTLs
+    )
     async with aiohttp.ClientSession(connector=connector) as session:
         wall_start = time.perf_counter()
 
@@ -163,7 +742,7 @@ async def run_stress_test(config: StressConfig) -> StressReport:
             # Fixed number of requests mode
             tasks = []
             for _ in range(config.total_requests):
-                tasks.append(_do_request(session, config))
+                tasks.append(_send(session, picker, timeout, config.proxy_pool))
             # Run with bounded concurrency
             sem = asyncio.Semaphore(config.concurrency)
 
@@ -177,7 +756,10 @@ async def run_stress_test(config: StressConfig) -> StressReport:
             # Duration-based mode
             workers = [
                 asyncio.create_task(
-                    _worker(session, config, results, stop_event, semaphore)
+                    _worker(
+                        session, picker, timeout, config.proxy_pool,
+                        results, stop_event, semaphore,
+                    )
                 )
                 for _ in range(config.concurrency)
             ]
@@ -191,29 +773,82 @@ async def run_stress_test(config: StressConfig) -> StressReport:
         wall_end = time.perf_counter()
 
     # Build report
-    report = StressReport(elapsed=wall_end - wall_start)
+    elapsed = wall_end - wall_start
+    report = StressReport(elapsed=elapsed)
     for r in results:
-        report.total_requests += 1
-        report.total_bytes += r.bytes_received
-        if r.error:
-            report.failed += 1
-            report.errors[r.error] = report.errors.get(r.error, 0) + 1
-        else:
-            report.successful += 1
-            report.latencies.append(r.latency)
-            if r.status is not None:
-                report.status_codes[r.status] = report.status_codes.get(r.status, 0) + 1
+        report.add(r)
+        if config.scenario is not None and r.endpoint is not None:
+            endpoint = report.endpoints.get(r.endpoint)
+            if endpoint is None:
+                endpoint = report.endpoints[r.endpoint] = StressReport(elapsed=elapsed)
+            endpoint.add(r)
+        if r.proxy is not None:
+            proxy = report.proxies.get(r.proxy)
+            if proxy is None:
+                proxy = report.proxies[r.proxy] = StressReport(elapsed=elapsed)
+            proxy.add(r)
+
+    if config.proxy_pool is not None:
+        report.ejected_proxies = [proxy.label for proxy in config.proxy_pool.ejected]
 
     return report
 
 
+def report_document(report: StressReport, config: StressConfig) -> dict[str, Any]:
+    """Build the machine-readable form of a run (`--output json`)."""
+    return {
+        "config": {
+            "url": config.url if config.scenario is None else None,
+            "method": config.method if config.scenario is None else None,
+            "scenario": config.scenario.path if config.scenario else None,
+            "concurrency": config.concurrency,
+            "total_requests": config.total_requests,
+            "duration": config.duration,
+            "timeout": config.timeout,
+        },
+        "report": report.to_dict(),
+    }
+
+
+def print_comparison(diffs: list[MetricDiff], baseline_path: str) -> None:
+    """Pretty-print a baseline comparison."""
+    print("=" * 64)
+    print(f"  BASELINE COMPARISON ({baseline_path})")
+    print("=" * 64)
+    scope = None
+    for diff in diffs:
+        if diff.scope != scope:
+            scope = diff.scope
+            print(f"  {scope}:")
+        unit = "pp" if diff.metric == "error_rate" else "%"
+        mark = "  << REGRESSION" if diff.regression else ""
+        print(
+            f"    {diff.metric:<11} {diff.baseline:>10.2f} -> {diff.current:>10.2f}"
+            f"  ({diff.change:+.1f}{unit}){mark}"
+        )
+    regressions = sum(1 for diff in diffs if diff.regression)
+    print("-" * 64)
+    print(f"  {'REGRESSED' if regressions else 'OK'}: {regressions} metric(s) over threshold")
+    print("=" * 64 + "\n")
+
+
+PROXY_REPORT_LIMIT = 20
+
+
 def print_report(report: StressReport, config: StressConfig) -> None:
     """Pretty-print the stress test results."""
     print("\n" + "=" * 64)
     print("  STRESS TEST REPORT")
     print("=" * 64)
-    print(f"  Target URL       : {config.url}")
-    print(f"  Method           : {config.method}")
+    if config.scenario is not None:
+        print(f"  Scenario         : {config.scenario.path}")
+        print(f"  Endpoints        : {len(config.scenario.entries)}")
+    else:
+        print(f"  Target URL       : {config.url}")
+        print(f"  Method           : {config.method}")
+    if config.proxy_pool is not None:
+        total_proxies = config.proxy_pool.size + len(config.proxy_pool.ejected)
+        print(f"  Proxies          : {total_proxies}")
     print(f"  Concurrency      : {config.concurrency}")
     if config.total_requests:
         print(f"  Total Requests   : {config.total_requests} (fixed)")
@@ -250,6 +885,39 @@ def print_report(report: StressReport, config: StressConfig) -> None:
         for err, count in sorted(report.errors.items(), key=lambda x: -x[1]):
             print(f"    {err} : {count}")
 
+    if report.endpoints:
+        print("-" * 64)
+        print("  Per Endpoint:")
+        for name, endpoint in sorted(report.endpoints.items(), key=lambda x: -x[1].total_requests):
+            share = endpoint.total_requests / report.total_requests * 100
+            print(f"    {name}")
+            print(
+                f"      {endpoint.total_requests} req ({share:.1f}%), "
+                f"{endpoint.failed} failed, {endpoint.rps:.1f} req/s"
+            )
+            if endpoint.latencies:
+                print(
+                    f"      avg {endpoint.avg_latency * 1000:.1f} ms, "
+                    f"p50 {endpoint.p50 * 1000:.1f} ms, "
+                    f"p95 {endpoint.p95 * 1000:.1f} ms, "
+                    f"p99 {endpoint.p99 * 1000:.1f} ms"
+                )
+
+    if report.proxies:
+        print("-" * 64)
+        print(f"  Per Proxy (top {min(len(report.proxies), PROXY_REPORT_LIMIT)} by requests):")
+        ejected = set(report.ejected_proxies)
+        ranked = sorted(report.proxies.items(), key=lambda x: -x[1].total_requests)
+        for label, proxy in ranked[:PROXY_REPORT_LIMIT]:
+            p50 = f"{proxy.p50 * 1000:.1f} ms" if proxy.latencies else "—"
+            mark = " [ejected]" if label in ejected else ""
+            print(
+                f"    {label:<21} {proxy.total_requests:>6} req  "
+                f"{proxy.failed:>5} failed  {proxy.rps:>7.1f} req/s  p50 {p50}{mark}"
+            )
+        if report.ejected_proxies:
+            print(f"  Ejected Proxies  : {len(report.ejected_proxies)}")
+
     print("=" * 64 + "\n")
 
 
@@ -262,9 +930,15 @@ Examples:
   uv run stress_test.py https://httpbin.org/get -d 10 -c 100
   uv run stress_test.py https://example.com/api -n 500 -c 50
   uv run stress_test.py https://example.com -d 30 -c 200 --method POST --body '{"k":"v"}'
+  uv run stress_test.py --scenario scenario.json http://localhost:8000 -d 30
+  uv run stress_test.py https://example.com --proxies output/proxy_results.csv -d 30
+  uv run stress_test.py http://localhost:8000/api/health -d 30 --profile stress.collapsed
         """,
     )
-    parser.add_argument("url", help="Target URL to stress test")
+    parser.add_argument(
+        "url", nargs="?", default=None,
+        help="Target URL to stress test (base URL when --scenario is used)",
+    )
     parser.add_argument(
         "-c", "--concurrency", type=int, default=100,
         help="Number of concurrent connections (default: 100)",
@@ -293,16 +967,84 @@ Examples:
         "--body", default=None,
         help="Request body string (for POST/PUT/PATCH)",
     )
+    parser.add_argument(
+        "--scenario", default=None,
+        help="JSON/YAML scenario file with a weighted mix of requests",
+    )
+    parser.add_argument(
+        "--output", default="text", choices=["text", "json"],
+        help="Report format written to stdout (default: text)",
+    )
+    parser.add_argument(
+        "--compare", default=None, metavar="BASELINE",
+        help="Compare against a saved --output json report; exit 1 on regression",
+    )
+    parser.add_argument(
+        "--max-rps-drop", type=float, default=10.0,
+        help="Allowed throughput drop vs. baseline, in percent (default: 10)",
+    )
+    parser.add_argument(
+        "--max-latency-increase", type=float, default=10.0,
+        help="Allowed avg/p50/p95/p99 latency increase vs. baseline, in percent (default: 10)",
+    )
+    parser.add_argument(
+        "--max-error-rate-increase", type=float, default=1.0,
+        help="Allowed error rate increase vs. baseline, in percentage points (default: 1)",
+    )
+    parser.add_argument(
+        "--proxies", default=None,
+        help="Route requests through proxies from an ip:port[:user:pass] list "
+        "or a results CSV from main.py",
+    )
+    parser.add_argument(
+        "--proxy-type", default="http", choices=["http"],
+        help="Upstream proxy scheme (default: http)",
+    )
+    parser.add_argument(
+        "--proxy-strategy", default="round-robin", choices=ProxyPool.STRATEGIES,
+        help="How requests are spread over proxies (default: round-robin)",
+    )
+    parser.add_argument(
+        "--proxy-max-failures", type=int, default=3,
+        help="Consecutive failures before a proxy is ejected (default: 3)",
+    )
+
+    parser.add_argument(
+        "--profile", default=None, metavar="PATH",
+        help="Sample the tester's own stacks and event-loop lag; write collapsed stacks "
+        "(flamegraph.pl/speedscope input) to PATH",
+    )
 
     args = parser.parse_args(argv)
+    if args.url is None and args.scenario is None:
+        parser.error("either a url or --scenario is required")
 
     headers = {}
     for h in args.header:
         key, _, value = h.partition(":")
         headers[key.strip()] = value.strip()
 
+    scenario = None
+    if args.scenario:
+        try:
+            scenario = load_scenario(args.scenario, base_url=args.url, extra_headers=headers)
+        except ValueError as exc:
+            parser.error(f"invalid scenario: {exc}")
+
+    proxy_pool = None
+    if args.proxies:
+        try:
+            proxy_pool = load_proxy_pool(
+                args.proxies,
+                proxy_type=args.proxy_type,
+                strategy=args.proxy_strategy,
+                max_failures=args.proxy_max_failures,
+            )
+        except ValueError as exc:
+            parser.error(f"invalid proxy list: {exc}")
+
     return StressConfig(
-        url=args.url,
+        url=args.url or args.scenario,
         method=args.method.upper(),
         concurrency=args.concurrency,
         total_requests=args.requests,
@@ -310,23 +1052,90 @@ Examples:
         timeout=args.timeout,
         headers=headers,
         body=args.body,
+        scenario=scenario,
+        proxy_pool=proxy_pool,
+        output=args.output,
+        compare=args.compare,
+        profile=args.profile,
+        thresholds=RegressionThresholds(
+            max_rps_drop=args.max_rps_drop,
+            max_latency_increase=args.max_latency_increase,
+            max_error_rate_increase=args.max_error_rate_increase,
+        ),
     )
 
 
-async def main() -> None:
+async def main() -> int:
     config = parse_args()
 
+    baseline = None
+    if config.compare:
+        try:
+            baseline = load_baseline(config.compare)
+        except (ValueError, json.JSONDecodeError) as exc:
+            print(f"[!] Error: {exc}", file=sys.stderr)
+            return 2
+
+    # In JSON mode stdout carries only the report, so progress goes to stderr.
+    log = sys.stderr if config.output == "json" else sys.stdout
     mode = (
         f"{config.total_requests} requests"
         if config.total_requests
         else f"{config.duration}s duration"
     )
-    print(f"\nStress testing {config.url}")
-    print(f"  {mode}, concurrency={config.concurrency}\n")
+    target = f"scenario {config.scenario.path}" if config.scenario else config.url
+    print(f"\nStress testing {target}", file=log)
+    via = f", via {config.proxy_pool.size} proxies" if config.proxy_pool else ""
+    print(f"  {mode}, concurrency={config.concurrency}{via}\n", file=log)
+
+    if config.profile:
+        # The profiler lives in the backend package; everything else in this
+        # file runs on its own.
+        try:
+            from app.core.profiling import LoopLagSampler, SamplingProfiler
+        except ImportError:
+            print("[!] Error: --profile needs the backend package (run from backend/)", file=sys.stderr)
+            return 2
+        profiler = SamplingProfiler().start()
+        lag_sampler = LoopLagSampler()
+        lag_task = asyncio.create_task(lag_sampler.run())
+        try:
+            report = await run_stress_test(config)
+        finally:
+            lag_task.cancel()
+            profiler.stop()
+        profiler.write(config.profile)
+        lag = lag_sampler.stats
+        print(
+            f"[*] Profile: {profiler.samples} samples -> {config.profile} "
+            f"(loop lag mean {lag.mean_ms:.1f} ms, p99 {lag.percentile(99):.1f} ms, "
+            f"max {lag.max_ms:.1f} ms; max {lag.max_tasks} tasks)",
+            file=log,
+        )
+    else:
+        report = await run_stress_test(config)
+    document = report_document(report, config)
+
+    diffs: list[MetricDiff] = []
+    if baseline is not None:
+        diffs = compare_reports(baseline, document, config.thresholds)
+
+    if config.output == "json":
+        if baseline is not None:
+            document["comparison"] = {
+                "baseline": config.compare,
+                "thresholds": asdict(config.thresholds),
+                "diffs": [asdict(diff) for diff in diffs],
+                "regressed": any(diff.regression for diff in diffs),
+            }
+        print(json.dumps(document, indent=2))
+    else:
+        print_report(report, config)
+        if baseline is not None:
+            print_comparison(diffs, config.compare)
 
-    report = await run_stress_test(config)
-    print_report(report, config)
+    return 1 if any(diff.regression for diff in diffs) else 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
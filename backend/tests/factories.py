@@ -0,0 +1,53 @@
+"""Builders for the session records and check results used across tests."""
+
+from app.schemas.check import SessionConfig
+from app.schemas.session import ProxyResult, SessionRecord, SessionStats
+
+OWNER = "auth0|tester"
+
+
+def make_session(
+    session_id: str,
+    results: list[ProxyResult],
+    created_at: str,
+    tags=(),
+    owner_sub: str = OWNER,
+) -> SessionRecord:
+    alive = sum(result.status == "OK" for result in results)
+    return SessionRecord(
+        id=session_id,
+        owner_sub=owner_sub,
+        name=session_id,
+        tags=list(tags),
+        created_at=created_at,
+        config=SessionConfig(
+            check_url="http://judge.invalid/ip",
+            timeout=5,
+            max_workers=10,
+            proxy_type="http",
+            delimiter=":",
+            field_order="ip:port:user:pass",
+        ),
+        results=results,
+        stats=SessionStats(total=len(results), alive=alive, dead=len(results) - alive, avg_latency=None),
+    )
+
+
+def result(
+    ip: str,
+    status: str = "OK",
+    latency: int | None = 100,
+    country: str = "",
+    country_code: str = "",
+    password: str = "",
+) -> ProxyResult:
+    return ProxyResult(
+        proxy_ip=ip,
+        proxy_port="8080",
+        user="user" if password else "",
+        password=password,
+        status=status,
+        response_time_ms=latency if status == "OK" else None,
+        country=country,
+        country_code=country_code,
+    )
@@ -0,0 +1,38 @@
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.models import ProxySession
+from app.repositories.session_repository import SessionRepository
+from app.services import batch_jobs
+from app.services.result_reencoder import reencode_legacy_sessions
+
+from .factories import make_session, result
+
+
+async def test_runs_until_no_work_is_left(sessions, crypto, monkeypatch):
+    async with sessions() as db:
+        legacy = SessionRepository(db, crypto, results_codec="json")
+        for index in range(5):
+            await legacy.upsert(make_session(f"s{index}", [result("10.0.0.1")], "2026-01-05T10:00:00Z"))
+    monkeypatch.setattr(batch_jobs, "SessionLocal", sessions)
+
+    assert await reencode_legacy_sessions(crypto, "zlib", batch_size=2, pause_seconds=0) == 5
+    assert await reencode_legacy_sessions(crypto, "zlib", batch_size=2, pause_seconds=0) == 0
+    async with sessions() as db:
+        blobs = (await db.execute(select(ProxySession.results_blob))).scalars().all()
+    assert len(blobs) == 5 and all(blobs)
+
+
+async def test_database_error_stops_the_run(sessions, crypto, monkeypatch, caplog):
+    monkeypatch.setattr(batch_jobs, "SessionLocal", sessions)
+    calls = []
+
+    async def step(repository):
+        calls.append(repository)
+        if len(calls) == 2:
+            raise OperationalError("UPDATE", {}, Exception("database is locked"))
+        return 3
+
+    assert await batch_jobs.run_in_batches(step, "Testing", crypto, "zlib", pause_seconds=0) == 3
+    assert len(calls) == 2
+    assert "Testing failed; will retry on next startup" in caplog.text
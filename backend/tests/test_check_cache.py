@@ -0,0 +1,103 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import CheckCacheEntry
+from app.repositories.check_cache_repository import CheckCacheRepository
+from app.repositories.session_repository import SessionRepository
+from app.schemas.check import CheckRequest
+from app.services.check_service import CheckService
+from benchmarks.fixtures import OfflineGeoIP
+from benchmarks.simulator import ProxySimulator, SimulatorConfig
+
+OWNER = "auth0|tester"
+URL = "http://judge.invalid/ip"
+PROXY = {"ip": "10.0.0.1", "port": "8080", "user": "user", "pass": "secret"}
+
+
+async def count_entries(db) -> int:
+    return (await db.execute(select(func.count()).select_from(CheckCacheEntry))).scalar()
+
+
+def test_proxy_key_covers_target_and_credentials(crypto):
+    repository = CheckCacheRepository(db=None, password_crypto=crypto)
+    key = repository.proxy_key(URL, "http", PROXY)
+
+    assert key == repository.proxy_key(URL, "http", dict(PROXY))
+    assert "secret" not in key
+    assert key != repository.proxy_key("https://judge.invalid/ip", "http", PROXY)
+    assert key != repository.proxy_key(URL, "socks5", PROXY)
+    assert key != repository.proxy_key(URL, "http", {**PROXY, "pass": "other"})
+    assert key != repository.proxy_key(URL, "http", {**PROXY, "port": "8081"})
+
+
+async def test_lookup_honours_max_age_and_owner(db, crypto):
+    repository = CheckCacheRepository(db, crypto)
+    now = datetime.now(timezone.utc)
+    await repository.store(OWNER, {"fresh": {"status": "OK"}}, now - timedelta(seconds=30))
+    await repository.store(OWNER, {"stale": {"status": "OK"}}, now - timedelta(seconds=300))
+    await repository.store("auth0|other", {"theirs": {"status": "OK"}}, now)
+
+    found = await repository.lookup(OWNER, ["fresh", "stale", "theirs", "missing"], max_age=60)
+
+    assert found == {"fresh": {"status": "OK"}}
+    assert set(await repository.lookup(OWNER, ["fresh", "stale"], max_age=600)) == {"fresh", "stale"}
+
+
+async def test_store_refreshes_existing_entries(db, crypto):
+    repository = CheckCacheRepository(db, crypto)
+    now = datetime.now(timezone.utc)
+    await repository.store(OWNER, {"key": {"status": "FAIL"}}, now - timedelta(seconds=300))
+    await repository.store(OWNER, {"key": {"status": "OK"}}, now)
+
+    assert await count_entries(db) == 1
+    assert await repository.lookup(OWNER, ["key"], max_age=60) == {"key": {"status": "OK"}}
+
+
+async def test_prune_removes_only_expired_entries(db, crypto):
+    repository = CheckCacheRepository(db, crypto)
+    now = datetime.now(timezone.utc)
+    await repository.store(OWNER, {"old": {}}, now - timedelta(days=8))
+    await repository.store(OWNER, {"new": {}}, now - timedelta(days=1))
+
+    assert await repository.prune(7 * 24 * 3600) == 1
+    assert set(await repository.lookup(OWNER, ["old", "new"], max_age=30 * 24 * 3600)) == {"new"}
+
+
+async def run_check(service: CheckService, request: CheckRequest) -> dict:
+    events = {}
+    async for event in service.stream_check_events(request, OWNER):
+        name, data = event.strip().split("\n", 1)
+        events.setdefault(name.removeprefix("event: "), []).append(json.loads(data.removeprefix("data: ")))
+    return events
+
+
+@pytest.fixture
+def simulator():
+    with ProxySimulator(SimulatorConfig(http_proxies=3)) as sim:
+        yield sim
+
+
+@pytest.mark.parametrize("always_store", [False, True])
+async def test_service_only_uses_the_cache_when_asked(db, crypto, simulator, always_store):
+    service = CheckService(
+        SessionRepository(db, crypto),
+        OfflineGeoIP(),
+        cache_repository=CheckCacheRepository(db, crypto),
+        cache_always_store=always_store,
+    )
+    request = CheckRequest(proxies="\n".join(simulator.lines()), check_url=simulator.judge_url, timeout=5)
+
+    await run_check(service, request)
+    assert await count_entries(db) == (3 if always_store else 0)
+
+    first = await run_check(service, request.model_copy(update={"max_age": 60}))
+    assert await count_entries(db) == 3
+    assert first["start"][0]["cached"] == (3 if always_store else 0)
+
+    second = await run_check(service, request.model_copy(update={"max_age": 60}))
+    assert second["start"][0]["cached"] == 3
+    assert all(result["cached"] for result in second["result"])
+    assert second["done"][0]["alive"] == 3
@@ -0,0 +1,147 @@
+import asyncio
+import json
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.schemas.check import CheckRequest
+from app.schemas.session import ProxyResult
+from app.services import check_coordinator
+from app.services.check_coordinator import WORKER_CHECK_PATH, CheckCoordinator
+
+PROXIES = [{"ip": f"10.0.{i // 256}.{i % 256}", "port": "8080"} for i in range(50)]
+REQUEST = CheckRequest(proxies="", check_url="http://judge.test/ip", timeout=5)
+
+
+def checked(proxy: dict[str, str], node: str) -> ProxyResult:
+    return ProxyResult(proxy_ip=proxy["ip"], proxy_port=proxy["port"], status="OK", exit_ip=node)
+
+
+class StubWorkers:
+    """
+    Worker nodes behind an `httpx.MockTransport`, keyed by host.
+
+    `fail_after[host]` makes a worker drop the connection after that many
+    result lines; `hang` makes every worker stall after its first line.
+    """
+
+    def __init__(self, fail_after: dict[str, int] | None = None, hang: bool = False) -> None:
+        self.fail_after = fail_after or {}
+        self.hang = hang
+        self.requests: Counter[str] = Counter()
+        self.open_streams = 0
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        assert request.url.path == WORKER_CHECK_PATH
+        assert request.headers["Authorization"] == "Bearer worker-secret"
+        self.requests[host] += 1
+        proxies = json.loads(request.content)["proxies"]
+        return httpx.Response(200, content=self.lines(host, proxies))
+
+    async def lines(self, host: str, proxies: list[dict[str, str]]):
+        self.open_streams += 1
+        try:
+            for index, proxy in enumerate(proxies):
+                if index == self.fail_after.get(host):
+                    raise httpx.ReadError("connection reset by worker")
+                result = checked(proxy, host).as_dict()
+                yield (json.dumps({"index": index, "result": result}) + "\n").encode()
+                await asyncio.sleep(0)
+                if self.hang:
+                    await asyncio.Event().wait()
+        finally:
+            self.open_streams -= 1
+
+
+@pytest.fixture
+def local_checks(monkeypatch):
+    """Replace the local checker; returns the proxies it was asked to check."""
+    seen: list[dict[str, str]] = []
+
+    async def check_proxies(proxies, check_url, timeout, proxy_type, max_workers):
+        for index, proxy in enumerate(proxies):
+            seen.append(proxy)
+            yield index, checked(proxy, "local")
+
+    monkeypatch.setattr(check_coordinator, "check_proxies", check_proxies)
+    return seen
+
+
+def coordinator(workers: StubWorkers, monkeypatch, hosts: list[str], local: bool = False) -> CheckCoordinator:
+    monkeypatch.setattr(check_coordinator, "get_http_client", lambda: workers.client)
+    return CheckCoordinator(
+        [f"http://{host}/" for host in hosts],
+        "worker-secret",
+        chunk_size=10,
+        local_checks=local,
+    )
+
+
+async def collect(coordinator: CheckCoordinator) -> dict[int, ProxyResult]:
+    results: dict[int, ProxyResult] = {}
+    async for index, result in coordinator.check(PROXIES, REQUEST):
+        assert index not in results, f"proxy {index} reported twice"
+        assert result.proxy_ip == PROXIES[index]["ip"]
+        results[index] = result
+    assert sorted(results) == list(range(len(PROXIES)))
+    return results
+
+
+async def test_chunks_are_spread_over_workers_and_local_checks(monkeypatch, local_checks):
+    workers = StubWorkers()
+
+    results = await collect(coordinator(workers, monkeypatch, ["w1", "w2"], local=True))
+
+    nodes = Counter(result.exit_ip for result in results.values())
+    assert set(nodes) <= {"w1", "w2", "local"}
+    assert nodes["w1"] and nodes["w2"]
+    assert sum(workers.requests.values()) * 10 + len(local_checks) == len(PROXIES)
+
+
+async def test_worker_failing_mid_chunk_is_requeued_once(monkeypatch, local_checks):
+    workers = StubWorkers(fail_after={"w1": 4})
+
+    results = await collect(coordinator(workers, monkeypatch, ["w1", "w2"]))
+
+    # w1 answered 4 proxies of its first chunk, then dropped out; w2 took the rest.
+    assert workers.requests["w1"] <= 2
+    assert Counter(result.exit_ip for result in results.values())["w1"] == 4 * workers.requests["w1"]
+    assert not local_checks
+
+
+async def test_all_workers_failing_falls_back_to_local_checks(monkeypatch, local_checks):
+    workers = StubWorkers(fail_after={"w1": 3, "w2": 0})
+
+    results = await collect(coordinator(workers, monkeypatch, ["w1", "w2"]))
+
+    remote = [result for result in results.values() if result.exit_ip != "local"]
+    assert len(remote) == 3 * workers.requests["w1"]
+    assert len(local_checks) == len(PROXIES) - len(remote)
+
+
+async def test_non_200_worker_is_dropped(monkeypatch, local_checks):
+    workers = StubWorkers()
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(401) if request.url.host == "w1" else workers.handle(request)
+    )
+    workers.client = httpx.AsyncClient(transport=transport)
+
+    results = await collect(coordinator(workers, monkeypatch, ["w1", "w2"]))
+
+    assert {result.exit_ip for result in results.values()} == {"w2"}
+
+
+async def test_client_disconnect_cancels_worker_streams(monkeypatch, local_checks):
+    workers = StubWorkers(hang=True)
+    stream = coordinator(workers, monkeypatch, ["w1", "w2"]).check(PROXIES, REQUEST)
+
+    await anext(stream)
+    assert workers.open_streams > 0
+    # What StreamingResponse does when the client goes away.
+    await stream.aclose()
+
+    assert workers.open_streams == 0
+    assert not local_checks
@@ -0,0 +1,25 @@
+from app.schemas.session import ProxyResult, SessionStats
+from app.services.check_stats import LatencyHistogram, PhaseStats
+
+
+def test_histogram_percentiles_are_within_two_percent():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.add(value)
+
+    assert LatencyHistogram().percentile(50) is None
+    for percent, exact in ((50, 500), (90, 900), (99, 990)):
+        assert abs(histogram.percentile(percent) - exact) <= exact * 0.02
+
+
+def test_phase_percentiles_fit_the_session_stats_schema():
+    stats = PhaseStats()
+    assert stats.percentiles() == {}
+
+    stats.add(ProxyResult("10.0.0.1", "8080", response_time_ms=120, connect_ms=20, ttfb_ms=80))
+    percentiles = stats.percentiles()
+
+    assert set(percentiles) == {"total", "connect", "ttfb"}
+    assert set(percentiles["total"]) == {"p50", "p90", "p99"}
+    stats_model = SessionStats(total=1, alive=1, dead=0, avg_latency=120, percentiles=percentiles)
+    assert stats_model.percentiles == percentiles
@@ -0,0 +1,95 @@
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import dependencies
+from app.api.v1.endpoints.judge import router
+from app.core.security import sign_judge_url, verify_judge_signature
+from app.repositories.session_repository import SessionRepository
+from app.schemas.check import CheckRequest
+from app.services import check_service
+from app.services.check_service import CheckService
+from benchmarks.fixtures import OfflineGeoIP
+from benchmarks.simulator import ProxySimulator, SimulatorConfig
+
+SECRET = "judge-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(dependencies.settings, "judge_enabled", True)
+    monkeypatch.setattr(dependencies.settings, "judge_max_bytes", 1_000_000)
+    monkeypatch.setattr(dependencies.settings, "judge_token", SECRET)
+    app = FastAPI()
+    app.include_router(router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def test_signed_download_is_served(client):
+    response = await client.get(sign_judge_url("/judge/bytes/100000", 100_000, SECRET))
+
+    assert response.status_code == 200
+    assert len(response.content) == 100_000
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/judge/bytes/1000",
+        sign_judge_url("/judge/bytes/1000", 1000, "other-secret"),
+        # A link signed for one size cannot be reused for a bigger one.
+        sign_judge_url("/judge/bytes/1000", 1000, SECRET).replace("/1000?", "/900000?"),
+        sign_judge_url("/judge/bytes/1000", 1000, SECRET, ttl=-1),
+    ],
+)
+async def test_unsigned_forged_or_expired_downloads_are_refused(client, url):
+    assert (await client.get(url)).status_code == 403
+
+
+async def test_downloads_are_off_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(dependencies.settings, "judge_token", "")
+
+    assert (await client.get(sign_judge_url("/judge/bytes/1000", 1000, ""))).status_code == 404
+    assert (await client.get("/judge/ip")).status_code == 200
+
+
+async def test_size_cap_still_applies(client):
+    assert (await client.get(sign_judge_url("/judge/bytes/2000000", 2_000_000, SECRET))).status_code == 400
+
+
+@pytest.mark.parametrize("own_url", [False, True])
+async def test_jobs_sign_only_the_configured_bandwidth_url(db, crypto, monkeypatch, own_url):
+    urls = []
+
+    async def measure_throughputs(results, url, *args):
+        urls.append(url)
+        for item in ():
+            yield item
+
+    monkeypatch.setattr(check_service, "measure_throughputs", measure_throughputs)
+    service = CheckService(
+        SessionRepository(db, crypto),
+        OfflineGeoIP(),
+        bandwidth_url="http://judge.test/judge/bytes/{bytes}",
+        judge_token=SECRET,
+    )
+    with ProxySimulator(SimulatorConfig(http_proxies=1)) as sim:
+        request = CheckRequest(
+            proxies="\n".join(sim.lines()),
+            check_url=sim.judge_url,
+            measure_bandwidth=True,
+            bandwidth_url="http://elsewhere.test/bytes/{bytes}" if own_url else None,
+            bandwidth_bytes=4096,
+        )
+        async for _ in service.stream_check_events(request, "auth0|tester"):
+            pass
+
+    (url,) = urls
+    if own_url:
+        assert url == "http://elsewhere.test/bytes/4096"
+    else:
+        query = parse_qs(urlsplit(url).query)
+        assert url.startswith("http://judge.test/judge/bytes/4096?")
+        assert verify_judge_signature(4096, int(query["expires"][0]), query["signature"][0], SECRET)
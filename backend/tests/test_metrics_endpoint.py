@@ -0,0 +1,31 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import dependencies
+from app.api.metrics import router
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def test_metrics_are_hidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(dependencies.settings, "metrics_token", "")
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer anything"})
+
+    assert response.status_code == 404
+
+
+async def test_metrics_need_the_bearer_token(client, monkeypatch):
+    monkeypatch.setattr(dependencies.settings, "metrics_token", "scrape-secret")
+
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "# TYPE" in response.text
@@ -0,0 +1,164 @@
+import datetime
+import ipaddress
+import ssl
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from app.services import proxy_service
+from app.services.proxy_service import MAX_REDIRECTS, check_proxy_sync
+from benchmarks.simulator import ProxySimulator, SimulatorConfig
+
+LATENCY_MS = 30
+TIMED_PHASES = ("dns", "connect", "handshake", "tls", "ttfb", "body")
+
+
+def config(**overrides) -> SimulatorConfig:
+    return SimulatorConfig(**{"http_proxies": 0, "latency_ms": (LATENCY_MS, LATENCY_MS), **overrides})
+
+
+def check(sim: ProxySimulator, url: str, proxy: dict[str, str] | None = None):
+    simulated = sim.proxies[0]
+    return check_proxy_sync(proxy or simulated.as_dict(), url, 5, simulated.kind)
+
+
+def phases(result) -> set[str]:
+    return {phase for phase in TIMED_PHASES if getattr(result, f"{phase}_ms") is not None}
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory) -> tuple[str, str]:
+    """Self-signed certificate for 127.0.0.1, as (cert path, key path)."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "judge.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    directory = tmp_path_factory.mktemp("tls")
+    cert_path, key_path = directory / "judge.pem", directory / "judge.key"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return str(cert_path), str(key_path)
+
+
+@pytest.fixture
+def judge_ssl(certificate, monkeypatch) -> ssl.SSLContext:
+    """Server context for the simulated judge; the checker is made to trust it."""
+    cert_path, key_path = certificate
+    server = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server.load_cert_chain(cert_path, key_path)
+    monkeypatch.setattr(proxy_service, "_SSL_CONTEXT", ssl.create_default_context(cafile=cert_path))
+    return server
+
+
+def test_http_proxy_fetches_plain_http():
+    with ProxySimulator(config(http_proxies=1)) as sim:
+        result = check(sim, sim.judge_url)
+
+    assert result.status == "OK", result.error
+    assert result.exit_ip == sim.proxies[0].exit_ip
+    assert phases(result) == {"dns", "connect", "ttfb", "body"}
+    # The proxy's latency is spent before it forwards the request.
+    assert result.ttfb_ms >= LATENCY_MS
+    assert result.response_time_ms >= result.ttfb_ms + result.body_ms
+
+
+def test_http_proxy_tunnels_https_through_connect(judge_ssl):
+    with ProxySimulator(config(http_proxies=1, auth=True), judge_ssl=judge_ssl) as sim:
+        result = check(sim, sim.judge_url)
+
+    assert result.status == "OK", result.error
+    assert result.exit_ip == "127.0.0.1"  # the judge sees the tunnel, not a forwarded header
+    assert phases(result) == set(TIMED_PHASES)
+    assert result.handshake_ms >= LATENCY_MS
+
+
+@pytest.mark.parametrize("auth", [False, True])
+def test_socks5_proxy(judge_ssl, auth):
+    with ProxySimulator(config(socks5_proxies=1, auth=auth), judge_ssl=judge_ssl) as sim:
+        result = check(sim, sim.judge_url)
+
+    assert result.status == "OK", result.error
+    assert phases(result) == set(TIMED_PHASES)
+    assert result.handshake_ms >= LATENCY_MS
+
+
+def test_socks5_proxy_rejects_wrong_password():
+    with ProxySimulator(config(socks5_proxies=1, auth=True)) as sim:
+        proxy = {**sim.proxies[0].as_dict(), "pass": "wrong"}
+        result = check(sim, sim.judge_url, proxy)
+
+    assert result.status == "FAIL"
+    assert result.error == "handshake: SOCKS5 authentication failed"
+    assert phases(result) == {"dns", "connect"}
+
+
+def test_http_proxy_without_credentials_gets_407():
+    with ProxySimulator(config(http_proxies=1, auth=True)) as sim:
+        anonymous = {"ip": sim.proxies[0].host, "port": str(sim.proxies[0].port)}
+        result = check(sim, sim.judge_url, anonymous)
+
+    assert result.error == "response: 407 Proxy Authentication Required"
+    assert result.body_ms is not None
+
+
+def test_connect_without_credentials_is_refused(judge_ssl):
+    with ProxySimulator(config(http_proxies=1, auth=True), judge_ssl=judge_ssl) as sim:
+        anonymous = {"ip": sim.proxies[0].host, "port": str(sim.proxies[0].port)}
+        result = check(sim, sim.judge_url, anonymous)
+
+    assert result.error == "handshake: tunnel refused: 407 Proxy Authentication Required"
+    assert result.tls_ms is None
+
+
+def test_connect_to_a_failing_upstream_is_refused(judge_ssl):
+    with ProxySimulator(config(http_proxies=1, failure_rate=1.0), judge_ssl=judge_ssl) as sim:
+        result = check(sim, sim.judge_url)
+
+    assert result.error == "handshake: tunnel refused: 502 Bad Gateway"
+
+
+@pytest.mark.parametrize("kind", ["http", "socks5"])
+def test_redirect_chain_is_followed(kind):
+    counts = {"http_proxies": 1} if kind == "http" else {"socks5_proxies": 1}
+    with ProxySimulator(config(**counts)) as sim:
+        result = check(sim, sim.judge_url.replace("/ip", "/redirect/3"))
+        requests = sim.stats.judge_requests
+
+    assert result.status == "OK", result.error
+    assert requests == 4
+    # Each hop opens a new proxy connection and its timings add up.
+    delayed = result.ttfb_ms if kind == "http" else result.handshake_ms
+    assert delayed >= 4 * LATENCY_MS
+
+
+def test_more_than_max_redirects_fails():
+    with ProxySimulator(config(http_proxies=1)) as sim:
+        result = check(sim, sim.judge_url.replace("/ip", f"/redirect/{MAX_REDIRECTS + 1}"))
+        requests = sim.stats.judge_requests
+
+    assert result.status == "FAIL"
+    assert result.error == f"response: more than {MAX_REDIRECTS} redirects"
+    assert requests == MAX_REDIRECTS + 1
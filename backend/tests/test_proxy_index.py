@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.repositories.session_repository import SessionRepository
+from app.services import proxy_index
+from app.services.proxy_index import INCREMENTAL_LIMIT, ProxyIndex, warm_proxy_index
+
+from .factories import OWNER, make_session, result
+
+NOW = datetime.now(timezone.utc)
+
+
+def ips(entries) -> list[str]:
+    return [entry.proxy_ip for entry in entries]
+
+
+async def test_best_ranks_by_latency_within_country_and_limit():
+    index = ProxyIndex()
+    await index.add_results(
+        OWNER,
+        "s1",
+        [
+            result("10.0.0.1", latency=300, country_code="de"),
+            result("10.0.0.2", latency=100, country_code="DE"),
+            result("10.0.0.3", latency=50, country_code="US"),
+            result("10.0.0.4", latency=200),
+            result("10.0.0.5", status="FAIL"),
+        ],
+        NOW,
+    )
+
+    assert index.size(OWNER) == 4
+    assert ips(index.best(OWNER, n=10, weighted=False)) == ["10.0.0.3", "10.0.0.2", "10.0.0.4", "10.0.0.1"]
+    assert ips(index.best(OWNER, n=10, country="de", weighted=False)) == ["10.0.0.2", "10.0.0.1"]
+    assert ips(index.best(OWNER, n=10, max_latency=100, weighted=False)) == ["10.0.0.3", "10.0.0.2"]
+    assert ips(index.best(OWNER, n=1, weighted=False)) == ["10.0.0.3"]
+    assert index.best(OWNER, country="FR") == []
+    assert index.best("auth0|someone-else") == []
+
+
+async def test_weighted_picks_are_distinct_and_within_filters():
+    index = ProxyIndex()
+    await index.add_results(OWNER, "s1", [result(f"10.0.1.{i}", latency=10 * i) for i in range(1, 51)], NOW)
+
+    picked = index.best(OWNER, n=10, max_latency=250)
+
+    assert len(picked) == len(set(ips(picked))) == 10
+    assert all(entry.latency_ms <= 250 for entry in picked)
+
+
+async def test_newer_failures_and_deleted_sessions_remove_proxies():
+    index = ProxyIndex()
+    await index.add_results(OWNER, "s1", [result("10.0.0.1"), result("10.0.0.2")], NOW - timedelta(minutes=5))
+    await index.add_results(OWNER, "s2", [result("10.0.0.3")], NOW)
+
+    # An older session cannot override a newer result.
+    await index.add_results(OWNER, "s0", [result("10.0.0.3", status="FAIL")], NOW - timedelta(minutes=10))
+    await index.add_results(OWNER, "s3", [result("10.0.0.1", status="FAIL")], NOW)
+    assert sorted(ips(index.best(OWNER, weighted=False))) == ["10.0.0.2", "10.0.0.3"]
+
+    await index.remove_session(OWNER, "s1")
+    assert ips(index.best(OWNER, weighted=False)) == ["10.0.0.3"]
+
+
+async def test_large_updates_rebuild_and_cap_per_owner():
+    index = ProxyIndex(max_per_owner=INCREMENTAL_LIMIT)
+    results = [
+        result(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", latency=i + 1)
+        for i in range(INCREMENTAL_LIMIT + 500)
+    ]
+
+    await index.add_results(OWNER, "s1", results, NOW)
+
+    assert index.size(OWNER) == INCREMENTAL_LIMIT
+    fastest = index.best(OWNER, n=3, weighted=False)
+    assert [entry.latency_ms for entry in fastest] == [1, 2, 3]
+
+
+async def test_expired_entries_are_skipped_and_pruned():
+    index = ProxyIndex(max_age=3600)
+    old = [result(f"10.0.0.{i}") for i in range(1, 250)]
+    await index.add_results(OWNER, "old", old, NOW - timedelta(minutes=50))
+    await index.add_results(OWNER, "new", [result("10.0.1.1", latency=500)], NOW)
+    index.max_age = 600
+
+    # Small updates leave the sweep to lookups instead of scanning on the loop.
+    await index.add_results(OWNER, "newer", [result("10.0.2.1", latency=600)], NOW)
+    assert index.size(OWNER) == 251
+
+    assert ips(index.best(OWNER, n=5, weighted=False)) == ["10.0.1.1", "10.0.2.1"]
+    # Lookups that skip many expired entries start one prune per owner.
+    assert OWNER in index._tasks
+    await asyncio.gather(*index._tasks.values())
+    assert index.size(OWNER) == 2
+    assert not index._tasks
+
+
+async def test_least_recently_used_owners_are_dropped():
+    index = ProxyIndex(max_owners=2)
+    for owner in ("a", "b"):
+        await index.add_results(owner, "s1", [result("10.0.0.1")], NOW)
+    index.best("a")
+
+    await index.add_results("c", "s1", [result("10.0.0.1")], NOW)
+
+    assert (index.size("a"), index.size("b"), index.size("c")) == (1, 0, 1)
+    assert not index._locks
+
+
+async def test_warm_from_sqlite_sessions(sessions, crypto, monkeypatch):
+    async with sessions() as db:
+        repository = SessionRepository(db, crypto)
+        hour_ago, two_days_ago = (NOW - timedelta(hours=1)).isoformat(), (NOW - timedelta(days=2)).isoformat()
+        alive_and_dead = [result("10.0.0.1", password="secret"), result("10.0.0.2", status="FAIL")]
+        await repository.upsert(make_session("s1", alive_and_dead, hour_ago))
+        other = make_session("s2", [result("10.0.0.2", latency=40)], NOW.isoformat(), owner_sub="auth0|other")
+        await repository.upsert(other)
+        await repository.upsert(make_session("s3", [result("10.0.0.3")], two_days_ago))
+    monkeypatch.setattr(proxy_index, "SessionLocal", sessions)
+    index = ProxyIndex(max_age=24 * 3600)
+
+    assert await warm_proxy_index(index, crypto, "zlib", pause_seconds=0) == 2
+
+    best = index.best(OWNER, weighted=False)
+    assert ips(best) == ["10.0.0.1"]
+    assert best[0].password == "secret"
+    assert best[0].as_dict()["password"] != "secret"
+    assert ips(index.best("auth0|other", weighted=False)) == ["10.0.0.2"]
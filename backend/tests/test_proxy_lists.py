@@ -0,0 +1,79 @@
+import pytest
+
+from app.services.proxy_service import normalize_host, normalize_port, prepare_proxies
+
+FIELDS = ["ip", "port", "user", "pass"]
+
+
+def test_dedupes_after_normalization():
+    lines = [
+        "10.0.0.1:8080",
+        " 10.0.0.1:08080 ",
+        "Proxy.Example.COM.:3128",
+        "proxy.example.com:3128",
+        "10.0.0.1:8080:user:pass",
+        "10.0.0.1:8080:user:pass",
+        "10.0.0.1:8080:user:other",
+    ]
+
+    proxies, stats = prepare_proxies(lines, ":", FIELDS)
+
+    assert [(p["ip"], p["port"], p.get("user", ""), p.get("pass", "")) for p in proxies] == [
+        ("10.0.0.1", "8080", "", ""),
+        ("proxy.example.com", "3128", "", ""),
+        ("10.0.0.1", "8080", "user", "pass"),
+        ("10.0.0.1", "8080", "user", "other"),
+    ]
+    assert (stats.lines, stats.invalid, stats.duplicates) == (7, 0, 3)
+
+
+def test_counts_invalid_lines_and_skips_blanks_and_comments():
+    lines = [
+        "",
+        "   ",
+        "# comment",
+        "10.0.0.1",  # no port
+        "10.0.0.1:0",
+        "10.0.0.1:65536",
+        "10.0.0.1:http",
+        "999.1.1.1:80",
+        "bad_host!.com:80",
+        "10.0.0.2:80",
+    ]
+
+    proxies, stats = prepare_proxies(lines, ":", FIELDS)
+
+    assert [p["ip"] for p in proxies] == ["10.0.0.2"]
+    assert (stats.lines, stats.invalid, stats.duplicates) == (7, 6, 0)
+
+
+def test_custom_delimiter_and_field_order():
+    proxies, _ = prepare_proxies(["user|pass|[2001:DB8::1]|1080"], "|", ["user", "pass", "ip", "port"])
+
+    assert proxies == [{"user": "user", "pass": "pass", "ip": "2001:db8::1", "port": "1080"}]
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("192.168.0.1", "192.168.0.1"),
+        ("[2001:DB8:0::1]", "2001:db8::1"),
+        ("Gate.Example.com.", "gate.example.com"),
+        ("localhost", "localhost"),
+        ("intranet", None),
+        ("1.2.3", None),
+        ("-bad.example.com", None),
+        ("a" * 64 + ".example.com", None),
+        ("", None),
+    ],
+)
+def test_normalize_host(host, expected):
+    assert normalize_host(host) == expected
+
+
+@pytest.mark.parametrize(
+    "port, expected",
+    [("80", "80"), ("0080", "80"), ("65535", "65535"), ("0", None), ("-1", None), ("8o", None)],
+)
+def test_normalize_port(port, expected):
+    assert normalize_port(port) == expected
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.services import result_codec
+from app.services.result_codec import decode_results, encode_results, is_encoded, iter_results
+
+CODECS = [
+    pytest.param(
+        codec,
+        marks=pytest.mark.skipif(not result_codec.available(codec), reason=f"{codec} not installed"),
+    )
+    for codec in ("zlib", "zstd")
+]
+
+RESULTS = [
+    {"proxy_ip": "10.0.0.1", "proxy_port": "8080", "status": "OK", "response_time_ms": 120, "country": "DE"},
+    {"proxy_ip": "10.0.0.2", "proxy_port": "3128", "status": "FAIL", "error": "timeout"},
+    {"proxy_ip": "2001:db8::1", "proxy_port": "1080", "response_time_ms": 45, "city": "Zürich"},
+]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(codec):
+    blob = encode_results(RESULTS, codec)
+
+    assert is_encoded(blob)
+    decoded = decode_results(blob)
+    # Keys missing from a row come back as None; everything else is unchanged.
+    keys = {key for item in RESULTS for key in item}
+    assert decoded == [{key: item.get(key) for key in keys} for item in RESULTS]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_iter_results_is_lazy_and_matches_decode(codec):
+    blob = encode_results(RESULTS, codec)
+
+    rows = iter_results(blob)
+
+    assert not isinstance(rows, list)
+    assert list(rows) == decode_results(blob)
+
+
+def test_empty_and_keyless_rows():
+    assert decode_results(encode_results([])) == []
+    assert decode_results(encode_results([{}, {}])) == [{}, {}]
+
+
+def test_columnar_blob_is_smaller_than_json():
+    many = [dict(RESULTS[0], proxy_ip=f"10.0.{i // 256}.{i % 256}") for i in range(1000)]
+
+    assert len(encode_results(many)) < len(json.dumps(many)) / 5
+
+
+def test_legacy_json_rows_are_not_encoded():
+    # Sessions stored before the blob format keep plain JSON rows.
+    assert not is_encoded(None)
+    assert not is_encoded(b"")
+    assert not is_encoded(b'[{"proxy_ip": "10.0.0.1"}]')
+    with pytest.raises(ValueError, match="Not an encoded"):
+        decode_results(b'[{"proxy_ip": "10.0.0.1"}]')
+
+
+def test_unknown_codec_and_version_are_rejected():
+    with pytest.raises(ValueError, match="Unknown results codec"):
+        encode_results(RESULTS, "json")
+
+    blob = encode_results(RESULTS)
+    with pytest.raises(ValueError, match="version"):
+        decode_results(blob[:3] + b"\x09" + blob[4:])
+    with pytest.raises(ValueError, match="codec id"):
+        decode_results(blob[:4] + b"\x09" + blob[5:])
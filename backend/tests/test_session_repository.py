@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+
+from app.models import ProxySession, ProxySessionRollup
+from app.repositories.session_repository import MASKED_PASSWORD, SessionRepository
+
+from .factories import OWNER, make_session, result
+
+
+async def test_results_are_stored_encoded_and_read_back(db, crypto):
+    repository = SessionRepository(db, crypto, results_codec="zlib")
+    session = make_session("s1", [result("10.0.0.1", password="secret")], "2026-01-05T10:00:00Z")
+    await repository.upsert(session)
+
+    row = (await db.execute(select(ProxySession.results, ProxySession.results_blob))).one()
+    assert row.results == []
+    assert row.results_blob
+
+    masked = await repository.get("s1", OWNER)
+    assert masked["results"][0]["password"] == MASKED_PASSWORD
+    revealed = await repository.get("s1", OWNER, reveal_passwords=True)
+    assert revealed["results"][0]["password"] == "secret"
+
+
+async def test_legacy_json_sessions_are_read_and_reencoded(db, crypto):
+    legacy = SessionRepository(db, crypto, results_codec="json")
+    await legacy.upsert(make_session("old", [result("10.0.0.1", password="secret")], "2026-01-05T10:00:00Z"))
+    row = (await db.execute(select(ProxySession.results, ProxySession.results_blob))).one()
+    assert row.results_blob is None
+    assert row.results[0]["password"].startswith("enc:")
+
+    repository = SessionRepository(db, crypto, results_codec="zlib")
+    assert (await repository.get("old", OWNER, reveal_passwords=True))["results"][0]["password"] == "secret"
+
+    assert await repository.reencode_legacy() == 1
+    assert await repository.reencode_legacy() == 0
+    db.expire_all()
+    row = (await db.execute(select(ProxySession.results, ProxySession.results_blob))).one()
+    assert row.results == []
+    assert row.results_blob
+    assert await repository.get_passwords("old", OWNER) == {
+        item["id"]: "secret" for item in (await repository.get("old", OWNER))["results"]
+    }
+
+
+async def test_other_owners_cannot_read(db, crypto):
+    repository = SessionRepository(db, crypto)
+    await repository.upsert(make_session("s1", [result("10.0.0.1")], datetime.now(timezone.utc).isoformat()))
+
+    assert await repository.get("s1", "auth0|someone-else") is None
+    assert await repository.get_passwords("s1", "auth0|someone-else") is None
+
+
+async def save_analytics_sessions(repository: SessionRepository) -> None:
+    await repository.upsert(
+        make_session(
+            "s1",
+            [
+                result("10.0.0.1", latency=100, country_code="DE"),
+                result("10.0.0.2", status="FAIL", country_code="DE"),
+                result("10.0.0.3", latency=300, country_code="US"),
+            ],
+            "2026-01-05T10:00:00+00:00",  # Monday
+            tags=["a", "b", "a"],
+        )
+    )
+    s2 = [result("10.0.0.1", latency=50, country_code="de")]
+    await repository.upsert(make_session("s2", s2, "2026-01-07T23:30:00+00:00", tags=["a"]))
+    s3 = [result("10.0.0.4", status="FAIL", country_code="US")]
+    await repository.upsert(make_session("s3", s3, "2026-02-02T08:00:00+00:00"))
+    theirs = make_session("theirs", [result("10.0.0.9")], "2026-01-06T00:00:00Z", owner_sub="auth0|other")
+    await repository.upsert(theirs)
+
+
+def summary(rows: list[dict]) -> list[tuple]:
+    fields = ("bucket", "key", "sessions", "total", "alive", "avg_latency")
+    return [tuple(row[field] for field in fields) for row in rows]
+
+
+async def test_aggregate_per_dimension(db, crypto):
+    repository = SessionRepository(db, crypto)
+    await save_analytics_sessions(repository)
+
+    overall = await repository.aggregate(OWNER, "session")
+    assert summary(overall) == [(None, "", 3, 5, 3, 150)]
+    assert overall[0]["alive_ratio"] == 0.6
+    assert summary(await repository.aggregate(OWNER, "tag")) == [
+        (None, "a", 2, 4, 3, 150),
+        (None, "b", 1, 3, 2, 200),
+    ]
+    assert summary(await repository.aggregate(OWNER, "country")) == [
+        (None, "DE", 2, 3, 2, 75),
+        (None, "US", 2, 2, 1, 300),
+    ]
+    assert summary(await repository.aggregate(OWNER, "country", key="US")) == [(None, "US", 2, 2, 1, 300)]
+
+
+async def test_aggregate_per_interval_and_range(db, crypto):
+    repository = SessionRepository(db, crypto)
+    await save_analytics_sessions(repository)
+
+    assert summary(await repository.aggregate(OWNER, "country", interval="week")) == [
+        ("2026-01-05", "DE", 2, 3, 2, 75),
+        ("2026-01-05", "US", 1, 1, 1, 300),
+        ("2026-02-02", "US", 1, 1, 0, None),
+    ]
+    assert summary(await repository.aggregate(OWNER, "session", interval="month")) == [
+        ("2026-01-01", "", 2, 4, 3, 150),
+        ("2026-02-01", "", 1, 1, 0, None),
+    ]
+    assert summary(await repository.aggregate(OWNER, "session", interval="day")) == [
+        ("2026-01-05", "", 1, 3, 2, 200),
+        ("2026-01-07", "", 1, 1, 1, 50),
+        ("2026-02-02", "", 1, 1, 0, None),
+    ]
+
+    since = datetime(2026, 1, 6, tzinfo=timezone.utc)
+    until = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    in_range = await repository.aggregate(OWNER, "session", since=since, until=until)
+    assert summary(in_range) == [(None, "", 1, 1, 1, 50)]
+
+
+async def test_rollups_follow_session_updates_deletes_and_backfill(db, crypto):
+    repository = SessionRepository(db, crypto)
+    await save_analytics_sessions(repository)
+
+    failed = [result("10.0.0.1", status="FAIL")]
+    await repository.upsert(make_session("s2", failed, "2026-01-07T23:30:00+00:00"))
+    assert summary(await repository.aggregate(OWNER, "session")) == [(None, "", 3, 5, 2, 200)]
+
+    assert await repository.delete("s1", OWNER)
+    assert summary(await repository.aggregate(OWNER, "session")) == [(None, "", 2, 2, 0, None)]
+
+    # Sessions saved before rollups existed get them from the backfill.
+    await db.execute(delete(ProxySessionRollup))
+    await db.commit()
+    assert await repository.aggregate(OWNER, "session") == []
+    assert await repository.backfill_rollups() == 3
+    assert await repository.backfill_rollups() == 0
+    assert summary(await repository.aggregate(OWNER, "session")) == [(None, "", 2, 2, 0, None)]
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import sys
+
+import pytest
+
+import stress_test
+from stress_test import (
+    ProxyEndpoint,
+    ProxyPool,
+    RegressionThresholds,
+    RequestResult,
+    StressReport,
+    compare_reports,
+    load_baseline,
+)
+
+
+def endpoints(count: int) -> list[ProxyEndpoint]:
+    return [ProxyEndpoint(label=f"p{index}", url=f"http://10.0.0.{index}:8080") for index in range(count)]
+
+
+def ok(latency: float = 0.1) -> RequestResult:
+    return RequestResult(status=200, latency=latency)
+
+
+@pytest.mark.parametrize(
+    "failure",
+    [
+        RequestResult(error="ClientProxyConnectionError"),
+        RequestResult(error="TimeoutError"),
+        RequestResult(status=407),
+        RequestResult(status=502),
+        RequestResult(status=503),
+        RequestResult(status=504),
+    ],
+)
+def test_pool_ejects_proxy_after_consecutive_failures(failure):
+    proxies = endpoints(2)
+    pool = ProxyPool(proxies, max_failures=3)
+
+    pool.record(proxies[0], failure)
+    pool.record(proxies[0], failure)
+    assert pool.size == 2
+
+    pool.record(proxies[0], failure)
+    assert pool.size == 1
+    assert pool.ejected == [proxies[0]]
+    assert all(pool.acquire() is proxies[1] for _ in range(5))
+
+
+def test_success_resets_the_failure_streak():
+    proxies = endpoints(1)
+    pool = ProxyPool(proxies, max_failures=2)
+
+    for _ in range(3):
+        pool.record(proxies[0], RequestResult(status=502))
+        pool.record(proxies[0], ok())
+
+    assert pool.size == 1
+    assert proxies[0].consecutive_failures == 0
+
+
+@pytest.mark.parametrize("status", [404, 500])
+def test_target_errors_do_not_count_against_the_proxy(status):
+    proxies = endpoints(1)
+    pool = ProxyPool(proxies, max_failures=1)
+
+    pool.record(proxies[0], RequestResult(status=status, latency=0.1))
+
+    assert pool.size == 1
+
+
+def test_gateway_errors_do_not_lower_latency_estimate():
+    fast, dead = endpoints(2)
+    fast.latency, dead.latency = 0.2, 0.5
+    pool = ProxyPool([fast, dead], strategy="least-latency", max_failures=10)
+
+    for _ in range(5):
+        pool.record(dead, RequestResult(status=503, latency=0.001))
+
+    assert dead.latency == 0.5
+    assert all(pool.acquire() is fast for _ in range(10))
+
+
+def test_empty_pool_returns_none():
+    proxies = endpoints(1)
+    pool = ProxyPool(proxies, max_failures=1)
+    pool.record(proxies[0], RequestResult(error="boom"))
+
+    assert pool.acquire() is None
+
+
+def make_report(latency: float, requests: int = 100, failed: int = 0, elapsed: float = 10.0) -> StressReport:
+    report = StressReport(elapsed=elapsed)
+    for index in range(requests):
+        if index < failed:
+            report.add(RequestResult(error="TimeoutError"))
+        else:
+            report.add(RequestResult(status=200, latency=latency, endpoint="get"))
+    report.endpoints["get"] = StressReport(
+        total_requests=report.total_requests,
+        successful=report.successful,
+        elapsed=elapsed,
+        latencies=list(report.latencies),
+    )
+    return report
+
+
+def document(report: StressReport) -> dict:
+    return {"config": {}, "report": report.to_dict()}
+
+
+def regressions(baseline: StressReport, current: StressReport) -> set[tuple[str, str]]:
+    diffs = compare_reports(document(baseline), document(current), RegressionThresholds())
+    return {(diff.scope, diff.metric) for diff in diffs if diff.regression}
+
+
+def test_compare_passes_within_thresholds():
+    assert regressions(make_report(0.100), make_report(0.105)) == set()
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    slower = regressions(make_report(0.100), make_report(0.150))
+    assert {("overall", "p50_ms"), ("get", "p99_ms")} <= slower
+    assert ("overall", "rps") not in slower
+
+    assert ("overall", "rps") in regressions(make_report(0.1), make_report(0.1, elapsed=20.0))
+    assert ("overall", "error_rate") in regressions(make_report(0.1), make_report(0.1, failed=5))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "not json",
+        "[]",
+        '{"config": {}}',
+        '{"report": {"rps": 10}}',
+        '{"report": {"rps": 10, "error_rate": 0, "latency_ms": {"avg": 1}}}',
+    ],
+)
+def test_malformed_baseline_is_rejected(tmp_path, content):
+    path = tmp_path / "baseline.json"
+    path.write_text(content)
+
+    with pytest.raises((ValueError, json.JSONDecodeError)):
+        load_baseline(str(path))
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Run `main()` against a saved baseline with a canned current report."""
+
+    def run(baseline: str | dict, current: StressReport) -> int:
+        path = tmp_path / "baseline.json"
+        path.write_text(baseline if isinstance(baseline, str) else json.dumps(baseline))
+
+        async def run_stress_test(config):
+            return current
+
+        monkeypatch.setattr(stress_test, "run_stress_test", run_stress_test)
+        argv = ["stress_test.py", "http://127.0.0.1:1/", "-n", "1", "--output", "json"]
+        monkeypatch.setattr(sys, "argv", [*argv, "--compare", str(path)])
+        return asyncio.run(stress_test.main())
+
+    return run
+
+
+def test_compare_exit_codes(run, capsys):
+    baseline = document(make_report(0.100))
+
+    assert run(baseline, make_report(0.101)) == 0
+    assert json.loads(capsys.readouterr().out)["comparison"]["regressed"] is False
+
+    assert run(baseline, make_report(0.200)) == 1
+    assert json.loads(capsys.readouterr().out)["comparison"]["regressed"] is True
+
+    assert run('{"report": {}}', make_report(0.100)) == 2
+    assert "Not a stress test JSON report" in capsys.readouterr().err
@@ -187,7 +187,16 @@ function SessionCard({ session, onOpen, onDelete }: {
 }
 
 export function History() {
-    const { sessions, sessionsLoading, sessionsError, loadSession, deleteSession, fetchSessions } = useProxyChecker();
+    const {
+        sessions,
+        sessionsLoading,
+        sessionsError,
+        loadSession,
+        deleteSession,
+        fetchSessions,
+        hasMoreSessions,
+        fetchMoreSessions,
+    } = useProxyChecker();
     const [search, setSearch] = useState("");
     const [tagFilter, setTagFilter] = useState("");
 
@@ -227,7 +236,7 @@ export function History() {
                         Session History
                     </h1>
                     <span style={{ fontSize: 12, color: "var(--text-3)" }}>
-                        {sessions.length} sessions {sessionsLoading ? "• updating…" : ""}
+                        {sessions.length}{hasMoreSessions ? "+" : ""} sessions {sessionsLoading ? "• updating…" : ""}
                     </span>
                 </div>
                 <Button
@@ -415,6 +424,29 @@ export function History() {
                     ))}
                 </div>
             )}
+
+            {hasMoreSessions && sessions.length > 0 && (
+                <Button
+                    id="history-load-more-btn"
+                    className="ra-btn"
+                    isDisabled={sessionsLoading}
+                    onPress={() => fetchMoreSessions()}
+                    style={{
+                        alignSelf: "center",
+                        fontSize: 12,
+                        fontWeight: 500,
+                        padding: "5px 12px",
+                        borderRadius: "var(--radius)",
+                        background: "var(--btn-surface)",
+                        border: "1px solid var(--btn-border)",
+                        color: "var(--btn-text)",
+                        cursor: "pointer",
+                        opacity: sessionsLoading ? 0.75 : 1,
+                    }}
+                >
+                    {sessionsLoading ? "Loading…" : "Load older sessions"}
+                </Button>
+            )}
         </div>
     );
 }
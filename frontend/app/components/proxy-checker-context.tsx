@@ -105,9 +105,12 @@ interface ProxyCheckerState {
     sessionsLoading: boolean;
     sessionsError: string | null;
     fetchSessions: () => Promise<void>;
+    hasMoreSessions: boolean;
+    fetchMoreSessions: () => Promise<void>;
     selectedSession: SessionDetail | null;
     loadSession: (id: string) => Promise<void>;
     deleteSession: (id: string) => Promise<void>;
+    revealPasswords: (id: string, resultIds?: string[]) => Promise<Record<string, string>>;
 }
 
 const DEFAULT_CONFIG: Config = {
@@ -121,6 +124,26 @@ const DEFAULT_CONFIG: Config = {
 
 const DEFAULT_STATS: Stats = { total: 0, alive: 0, dead: 0, avgLatency: null };
 
+// Sessions per history page; later pages load on "Load more".
+const SESSIONS_PAGE_SIZE = "50";
+
+function toSessionSummary(s: Record<string, unknown>): SessionSummary {
+    const stats = s.stats as Record<string, unknown>;
+    return {
+        id: s.id,
+        name: s.name,
+        tags: s.tags,
+        created_at: s.created_at,
+        stats: {
+            total: stats.total,
+            alive: stats.alive,
+            dead: stats.dead,
+            avgLatency: stats.avg_latency,
+            countries: stats.countries as Record<string, number> | undefined,
+        },
+    } as SessionSummary;
+}
+
 // ── Context ─────────────────────────────────────────────────────────────────
 const Ctx = createContext<ProxyCheckerState | null>(null);
 
@@ -170,8 +193,11 @@ export function ProxyCheckerProvider({ children }: { children: ReactNode }) {
     const [sessions, setSessions] = useState<SessionSummary[]>([]);
     const [sessionsLoading, setSessionsLoading] = useState(false);
     const [sessionsError, setSessionsError] = useState<string | null>(null);
+    const [sessionsCursor, setSessionsCursor] = useState<string | null>(null);
     const [selectedSession, setSelectedSession] = useState<SessionDetail | null>(null);
     const sessionsFetchCountRef = useRef(0);
+    // Bumped by every refresh so a "Load more" started before it is dropped.
+    const sessionsGenerationRef = useRef(0);
 
     const abortRef = useRef<AbortController | null>(null);
     const timerRef = useRef<ReturnType<typeof setInterval> | null>(null);
@@ -376,31 +402,24 @@ export function ProxyCheckerProvider({ children }: { children: ReactNode }) {
     }, []);
 
     // ── Fetch sessions list ─────────────────────────────────────────────
-    const fetchSessions = useCallback(async () => {
+    const fetchSessionsPage = useCallback(async (cursor: string | null, append: boolean) => {
         sessionsFetchCountRef.current += 1;
+        const generation = append ? sessionsGenerationRef.current : ++sessionsGenerationRef.current;
         setSessionsLoading(true);
         setSessionsError(null);
 
         try {
             const headers = await getAuthHeaders();
-            const res = await fetch("/api/sessions", { headers });
+            const params = new URLSearchParams({ limit: SESSIONS_PAGE_SIZE });
+            if (cursor) params.set("cursor", cursor);
+            const res = await fetch(`/api/sessions?${params}`, { headers });
+            if (generation !== sessionsGenerationRef.current) return;
             if (res.ok) {
-                const data = await res.json();
-                setSessions(
-                    data.map((s: Record<string, unknown>) => ({
-                        id: s.id,
-                        name: s.name,
-                        tags: s.tags,
-                        created_at: s.created_at,
-                        stats: {
-                            total: (s.stats as Record<string, unknown>).total,
-                            alive: (s.stats as Record<string, unknown>).alive,
-                            dead: (s.stats as Record<string, unknown>).dead,
-                            avgLatency: (s.stats as Record<string, unknown>).avg_latency,
-                            countries: (s.stats as Record<string, unknown>).countries as Record<string, number> | undefined,
-                        },
-                    }))
-                );
+                const page = await res.json();
+                if (generation !== sessionsGenerationRef.current) return;
+                const items = (page.items as Record<string, unknown>[]).map(toSessionSummary);
+                setSessions((prev) => (append ? [...prev, ...items] : items));
+                setSessionsCursor(page.next_cursor ?? null);
             } else {
                 setSessionsError(`Failed to fetch sessions (${res.status})`);
             }
@@ -415,6 +434,12 @@ export function ProxyCheckerProvider({ children }: { children: ReactNode }) {
         }
     }, [getAuthHeaders]);
 
+    const fetchSessions = useCallback(() => fetchSessionsPage(null, false), [fetchSessionsPage]);
+
+    const fetchMoreSessions = useCallback(async () => {
+        if (sessionsCursor) await fetchSessionsPage(sessionsCursor, true);
+    }, [fetchSessionsPage, sessionsCursor]);
+
     // ── Load a single session detail ────────────────────────────────────
     const loadSession = useCallback(async (id: string) => {
         try {
@@ -444,6 +469,20 @@ export function ProxyCheckerProvider({ children }: { children: ReactNode }) {
         }
     }, [getAuthHeaders]);
 
+    // ── Reveal stored passwords (session reads return them masked) ──────
+    const revealPasswords = useCallback(async (id: string, resultIds?: string[]) => {
+        const headers = await getAuthHeaders(true);
+        const res = await fetch(`/api/sessions/${id}/passwords`, {
+            method: "POST",
+            headers,
+            body: JSON.stringify({ result_ids: resultIds ?? null }),
+        });
+        if (!res.ok) {
+            throw new Error(`Failed to reveal passwords (${res.status})`);
+        }
+        return (await res.json()) as Record<string, string>;
+    }, [getAuthHeaders]);
+
     // ── Delete session ──────────────────────────────────────────────────
     const deleteSession = useCallback(async (id: string) => {
         try {
@@ -628,9 +667,12 @@ export function ProxyCheckerProvider({ children }: { children: ReactNode }) {
                 sessionsLoading,
                 sessionsError,
                 fetchSessions,
+                hasMoreSessions: sessionsCursor !== null,
+                fetchMoreSessions,
                 selectedSession,
                 loadSession,
                 deleteSession,
+                revealPasswords,
             }}
         >
             {children}
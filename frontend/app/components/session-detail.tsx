@@ -88,9 +88,10 @@ function downloadCSV(rows: ProxyResult[], filename: string) {
 }
 
 export function SessionDetailView() {
-    const { selectedSession, setCurrentView, deleteSession } = useProxyChecker();
+    const { selectedSession, setCurrentView, deleteSession, revealPasswords } = useProxyChecker();
     const [filter, setFilter] = useState("");
     const [countryFilter, setCountryFilter] = useState("");
+    const [exportError, setExportError] = useState<string | null>(null);
 
     const s = selectedSession;
     const countries = s?.stats.countries || {};
@@ -306,9 +307,19 @@ export function SessionDetailView() {
                     <Button
                         id="session-export-csv-btn"
                         className="ra-btn"
-                        onPress={() => {
+                        onPress={async () => {
                             const timestamp = new Date(s.created_at).toISOString().replace(/[:.]/g, "-").slice(0, 19);
-                            downloadCSV(rows, `${s.name.replace(/\s+/g, "_")}_${timestamp}.csv`);
+                            setExportError(null);
+                            let passwords: Record<string, string>;
+                            try {
+                                passwords = await revealPasswords(s.id, rows.map((r) => r.id));
+                            } catch (err) {
+                                // A CSV with masked passwords is useless for re-importing; don't export one.
+                                setExportError(err instanceof Error ? err.message : "Failed to reveal passwords");
+                                return;
+                            }
+                            const exportRows = rows.map((r) => ({ ...r, password: passwords[r.id] ?? "" }));
+                            downloadCSV(exportRows, `${s.name.replace(/\s+/g, "_")}_${timestamp}.csv`);
                         }}
                         style={{
                             display: "inline-flex",
@@ -330,6 +341,23 @@ export function SessionDetailView() {
                 </div>
             </div>
 
+            {exportError && (
+                <div
+                    role="status"
+                    aria-live="polite"
+                    style={{
+                        padding: "8px 10px",
+                        fontSize: 12,
+                        color: "var(--red)",
+                        background: "var(--red-muted)",
+                        border: "1px solid rgba(217,83,79,0.25)",
+                        borderRadius: "var(--radius)",
+                    }}
+                >
+                    Couldn&apos;t export CSV: {exportError}. No file was downloaded.
+                </div>
+            )}
+
             {/* Table */}
             <div style={{ border: "1px solid var(--border)", borderRadius: "var(--radius-lg)", overflowX: "auto", overflowY: "hidden" }}>
                 <table style={{ width: "100%", minWidth: 920, borderCollapse: "collapse" }}>